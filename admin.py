@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Payslip
+from .models import BankAccount, DeductionRuleSet, EmployeeYearToDate, Payslip, PayslipAuditLog, PayrollPeriodRollup, PayrollRun, PayrollRunTask
 
 @admin.register(Payslip)
 class PayslipAdmin(admin.ModelAdmin):
@@ -8,3 +8,49 @@ class PayslipAdmin(admin.ModelAdmin):
     search_fields = ['employee_name', 'status', 'notes']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(PayslipAuditLog)
+class PayslipAuditLogAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'hub_id', 'payslip_id', 'action', 'actor_name', 'source']
+    list_filter = ['action']
+    search_fields = ['payslip_id', 'actor_name']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(PayrollPeriodRollup)
+class PayrollPeriodRollupAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'period', 'status', 'payslip_count', 'gross_total', 'net_total', 'updated_at']
+    list_filter = ['status']
+    readonly_fields = ['updated_at']
+
+@admin.register(EmployeeYearToDate)
+class EmployeeYearToDateAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'employee_id', 'tax_year', 'payslip_count', 'gross_total', 'deductions_total', 'net_total', 'paid_total', 'updated_at']
+    list_filter = ['tax_year']
+    readonly_fields = ['updated_at']
+
+@admin.register(DeductionRuleSet)
+class DeductionRuleSetAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'social_security_rate', 'social_security_cap', 'fixed_deductions', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(BankAccount)
+class BankAccountAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'employee_id', 'holder_name', 'iban', 'bic', 'updated_at']
+    search_fields = ['holder_name', 'iban']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'period_start', 'status', 'tasks_done', 'tasks_total', 'created_count', 'skipped_count', 'started_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(PayrollRunTask)
+class PayrollRunTaskAdmin(admin.ModelAdmin):
+    list_display = ['run', 'status', 'after', 'until', 'checkpoint_employee_id', 'created_count', 'skipped_count', 'updated_at']
+    list_filter = ['status']
+    readonly_fields = ['updated_at']
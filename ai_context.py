@@ -23,6 +23,7 @@ CONTEXT = """
 2. **Confirm payslip**: Change status from draft → confirmed after reviewing figures
 3. **Mark as paid**: Change status to paid, set paid_date
 4. **Cancel payslip**: Change status to cancelled (no deletion)
+5. **Month-end**: use bulk_update_payslip_status with a period to confirm or pay a whole month in one step
 
 ### Notes
 
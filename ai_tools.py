@@ -1,38 +1,82 @@
 """AI tools for the Payroll module."""
+from django.core.exceptions import ValidationError
+
 from assistant.tools import AssistantTool, register_tool
 
+from .audit import audit_tool
+from .instrumentation import instrument_tool
+
+
+def _parse_args(args, model, field_name, names):
+    """
+    The ``names`` args parsed by ``model``'s ``field_name`` field (None when
+    absent); raises ``ValueError`` naming the first invalid one.
+    """
+    field = model._meta.get_field(field_name)
+    parsed = {}
+    for name in names:
+        try:
+            parsed[name] = field.to_python(args[name]) if args.get(name) else None
+        except (ValidationError, ValueError):
+            raise ValueError(f"Invalid {name}: {args[name]!r}")
+    return parsed
+
 
 @register_tool
+@instrument_tool
 class ListPayslips(AssistantTool):
     name = "list_payslips"
-    description = "List payslips with filters."
+    description = (
+        "List payslips with filters, newest period first. Returns at most 'limit' payslips (max 200) "
+        "and a next_cursor to pass back as 'cursor' for the following page."
+    )
     module_id = "payroll"
     required_permission = "payroll.view_payslip"
     parameters = {
         "type": "object",
         "properties": {
             "status": {"type": "string", "description": "draft, confirmed, paid, cancelled"},
-            "employee_id": {"type": "string"}, "limit": {"type": "integer"},
+            "statuses": {"type": "array", "items": {"type": "string"}, "description": "Any of these statuses"},
+            "employee_id": {"type": "string"},
+            "period_start": {"type": "string", "description": "Payslips with period start on/after (YYYY-MM-DD)"},
+            "period_end": {"type": "string", "description": "Payslips with period end on/before (YYYY-MM-DD)"},
+            "limit": {"type": "integer", "description": "Page size (default 20, max 200)"},
+            "cursor": {"type": "string", "description": "next_cursor of the previous page"},
         },
         "required": [],
         "additionalProperties": False,
     }
+    FIELDS = ('id', 'employee_name', 'period_start', 'period_end', 'gross_salary', 'deductions', 'net_salary', 'status')
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 200
 
     def execute(self, args, request):
         from payroll.models import Payslip
-        qs = Payslip.objects.all()
-        if args.get('status'):
-            qs = qs.filter(status=args['status'])
+        from payroll.pagination import keyset_values
+        qs = Payslip.objects.filter(hub_id=request.session.get('hub_id'), is_deleted=False)
+        statuses = list(args.get('statuses') or []) + ([args['status']] if args.get('status') else [])
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+        try:
+            dates = _parse_args(args, Payslip, 'period_start', ('period_start', 'period_end'))
+        except ValueError as exc:
+            return {"error": str(exc)}
         if args.get('employee_id'):
             qs = qs.filter(employee_id=args['employee_id'])
-        limit = args.get('limit', 20)
-        return {"payslips": [{"id": str(p.id), "employee_name": p.employee_name, "period_start": str(p.period_start), "period_end": str(p.period_end), "gross_salary": str(p.gross_salary), "deductions": str(p.deductions), "net_salary": str(p.net_salary), "status": p.status} for p in qs.order_by('-period_start')[:limit]]}
+        if dates['period_start']:
+            qs = qs.filter(period_start__gte=dates['period_start'])
+        if dates['period_end']:
+            qs = qs.filter(period_end__lte=dates['period_end'])
+        limit = min(max(int(args.get('limit') or self.DEFAULT_LIMIT), 1), self.MAX_LIMIT)
+        rows, next_cursor = keyset_values(qs, self.FIELDS, 'period_start', descending=True, limit=limit, token=args.get('cursor'))
+        return {"payslips": [dict(zip(self.FIELDS, map(str, row))) for row in rows], "next_cursor": next_cursor}
 
 
 @register_tool
+@instrument_tool
 class CreatePayslip(AssistantTool):
     name = "create_payslip"
-    description = "Create a payslip."
+    description = "Create a payslip. Leave deductions out to compute them (and net) with the hub's deduction rules."
     module_id = "payroll"
     required_permission = "payroll.add_payslip"
     requires_confirmation = True
@@ -50,19 +94,29 @@ class CreatePayslip(AssistantTool):
 
     def execute(self, args, request):
         from decimal import Decimal
+        from payroll.calculation import price_payslips
         from payroll.models import Payslip
+        from payroll.rulesets import hub_rules
+        hub_id = request.session.get('hub_id')
         gross = Decimal(args['gross_salary'])
         deductions = Decimal(args.get('deductions', '0'))
-        p = Payslip.objects.create(
+        p = Payslip(
+            hub_id=hub_id,
             employee_id=args['employee_id'], employee_name=args['employee_name'],
             period_start=args['period_start'], period_end=args['period_end'],
             gross_salary=gross, deductions=deductions, net_salary=gross - deductions,
             notes=args.get('notes', ''),
         )
+        rules = hub_rules(hub_id)
+        if rules and 'deductions' not in args:
+            price_payslips([p], rules)
+        p.save()
         return {"id": str(p.id), "net_salary": str(p.net_salary), "created": True}
 
 
 @register_tool
+@instrument_tool
+@audit_tool
 class UpdatePayslipStatus(AssistantTool):
     name = "update_payslip_status"
     description = "Update payslip status: confirm (draft→confirmed), pay (confirmed→paid), cancel."
@@ -80,27 +134,73 @@ class UpdatePayslipStatus(AssistantTool):
     }
 
     def execute(self, args, request):
-        from django.utils import timezone
         from payroll.models import Payslip
+        from payroll.transitions import can_transition, transition_values
         p = Payslip.objects.get(id=args['payslip_id'])
         action = args['action']
-        if action == 'confirm' and p.status == 'draft':
-            p.status = 'confirmed'
-        elif action == 'pay' and p.status == 'confirmed':
-            p.status = 'paid'
-            p.paid_date = timezone.now().date()
-        elif action == 'cancel' and p.status in ('draft', 'confirmed'):
-            p.status = 'cancelled'
-        else:
+        if not can_transition(p.status, action):
             return {"error": f"Cannot {action} a {p.status} payslip"}
-        p.save(update_fields=['status', 'paid_date'] if action == 'pay' else ['status'])
+        values = transition_values(action)
+        for field, value in values.items():
+            setattr(p, field, value)
+        p.save(update_fields=list(values))
         return {"id": str(p.id), "employee_name": p.employee_name, "status": p.status}
 
 
 @register_tool
+@instrument_tool
+@audit_tool
+class BulkUpdatePayslipStatus(AssistantTool):
+    name = "bulk_update_payslip_status"
+    description = (
+        "Confirm, pay or cancel many payslips at once (draft→confirmed→paid, cancel from draft/confirmed). "
+        "Select payslips by id or by period; returns how many moved and how many were rejected."
+    )
+    module_id = "payroll"
+    required_permission = "payroll.change_payslip"
+    requires_confirmation = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "action": {"type": "string", "enum": ["confirm", "pay", "cancel"], "description": "Action: confirm, pay, cancel"},
+            "payslip_ids": {"type": "array", "items": {"type": "string"}, "description": "Payslip IDs"},
+            "period_start": {"type": "string", "description": "Select payslips with period start on/after (YYYY-MM-DD)"},
+            "period_end": {"type": "string", "description": "Select payslips with period end on/before (YYYY-MM-DD)"},
+        },
+        "required": ["action"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from payroll.models import Payslip
+        from payroll.transitions import TRANSITIONS, bulk_transition, parse_ids
+        action = args['action']
+        if action not in TRANSITIONS:
+            return {"error": "Action must be confirm, pay or cancel"}
+        ids, malformed = parse_ids(args.get('payslip_ids') or [])
+        by_id = bool(ids or malformed)
+        if not (by_id or args.get('period_start') or args.get('period_end')):
+            return {"error": "Provide payslip_ids or a period to select payslips"}
+        hub_id = request.session.get('hub_id')
+        qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False)
+        if by_id:
+            qs = qs.filter(id__in=ids)
+        if args.get('period_start'):
+            qs = qs.filter(period_start__gte=args['period_start'])
+        if args.get('period_end'):
+            qs = qs.filter(period_end__lte=args['period_end'])
+        # Malformed ids are reported as rejected
+        return bulk_transition(qs, action, hub_id, requested=len(ids) + malformed if by_id else None)
+
+
+@register_tool
+@instrument_tool
 class GetPayrollSummary(AssistantTool):
     name = "get_payroll_summary"
-    description = "Get payroll summary for a period: total gross, deductions, net, count by status."
+    description = (
+        "Get payroll summary for a period: total gross, deductions, net, count and amounts by status. "
+        "Use group_by='month' or 'employee' for a breakdown (e.g. payroll cost by month this year)."
+    )
     module_id = "payroll"
     required_permission = "payroll.view_payslip"
     parameters = {
@@ -108,38 +208,142 @@ class GetPayrollSummary(AssistantTool):
         "properties": {
             "period_start": {"type": "string", "description": "Period start date (YYYY-MM-DD)"},
             "period_end": {"type": "string", "description": "Period end date (YYYY-MM-DD)"},
+            "group_by": {"type": "string", "enum": ["month", "employee"], "description": "Optional breakdown: month, employee"},
         },
         "required": [],
         "additionalProperties": False,
     }
 
     def execute(self, args, request):
-        from django.db.models import Sum, Count
         from payroll.models import Payslip
-        qs = Payslip.objects.all()
-        if args.get('period_start'):
-            qs = qs.filter(period_start__gte=args['period_start'])
-        if args.get('period_end'):
-            qs = qs.filter(period_end__lte=args['period_end'])
-        totals = qs.aggregate(
-            total_gross=Sum('gross_salary'),
-            total_deductions=Sum('deductions'),
-            total_net=Sum('net_salary'),
-            count=Count('id'),
+        from payroll.summary import cached_payroll_summary
+        try:
+            dates = _parse_args(args, Payslip, 'period_start', ('period_start', 'period_end'))
+        except ValueError as exc:
+            return {"error": str(exc)}
+        return cached_payroll_summary(
+            request.session.get('hub_id'),
+            period_start=dates['period_start'],
+            period_end=dates['period_end'],
+            group_by=args.get('group_by'),
         )
-        by_status = {}
-        for status in ('draft', 'confirmed', 'paid', 'cancelled'):
-            by_status[status] = qs.filter(status=status).count()
-        return {
-            "total_gross": str(totals['total_gross'] or 0),
-            "total_deductions": str(totals['total_deductions'] or 0),
-            "total_net": str(totals['total_net'] or 0),
-            "count": totals['count'],
-            "by_status": by_status,
-        }
 
 
 @register_tool
+@instrument_tool
+class GetPayrollAnalytics(AssistantTool):
+    name = "get_payroll_analytics"
+    description = (
+        "Get payroll cost analytics for a range of months: totals, average net per payslip and per employee, "
+        "and net salary percentiles (p50/p90/p99). Only confirmed and paid payslips count. "
+        "Reads closed-period snapshots when available."
+    )
+    module_id = "payroll"
+    required_permission = "payroll.view_payslip"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "period_start": {"type": "string", "description": "First month (YYYY-MM-DD or YYYY-MM)"},
+            "period_end": {"type": "string", "description": "Last month (YYYY-MM-DD or YYYY-MM, default: period_start)"},
+        },
+        "required": ["period_start"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from payroll.generation import parse_period
+        from payroll.snapshots import payroll_analytics
+        period_start = parse_period(args['period_start'])[0]
+        period_end = parse_period(args.get('period_end') or args['period_start'])[0]
+        return payroll_analytics(request.session.get('hub_id'), period_start, period_end)
+
+
+@register_tool
+@instrument_tool
+class GetEmployeeYearToDate(AssistantTool):
+    name = "get_employee_year_to_date"
+    description = (
+        "Get an employee's year-to-date payroll totals for a tax year: payslip count, gross, deductions (tax) "
+        "and net of confirmed and paid payslips, and the net already paid. Reads a maintained accumulator."
+    )
+    module_id = "payroll"
+    required_permission = "payroll.view_payslip"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "employee_id": {"type": "string", "description": "Employee ID"},
+            "year": {"type": "integer", "description": "Tax year (default: current year)"},
+        },
+        "required": ["employee_id"],
+        "additionalProperties": False,
+    }
+
+    def execute(self, args, request):
+        from django.utils import timezone
+        from payroll.models import EmployeeYearToDate
+        from payroll.year_to_date import year_to_date
+        try:
+            employee_id = _parse_args(args, EmployeeYearToDate, 'employee_id', ('employee_id',))['employee_id']
+        except ValueError as exc:
+            return {"error": str(exc)}
+        if employee_id is None:
+            return {"error": "employee_id is required"}
+        year = args.get('year') or timezone.now().year
+        return year_to_date(request.session.get('hub_id'), employee_id, int(year))
+
+
+@register_tool
+@instrument_tool
+class ListPayslipAuditLog(AssistantTool):
+    name = "list_payslip_audit_log"
+    description = (
+        "List the audit log of payslip changes, newest first: who changed which fields from what to what "
+        "(edits, confirm/pay/cancel, deletes). Filter by payslip or time range; pass next_cursor back as 'cursor'."
+    )
+    module_id = "payroll"
+    required_permission = "payroll.view_payslip"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "payslip_id": {"type": "string", "description": "Only this payslip"},
+            "since": {"type": "string", "description": "Changes at or after (ISO date or datetime)"},
+            "until": {"type": "string", "description": "Changes before (ISO date or datetime)"},
+            "limit": {"type": "integer", "description": "Page size (default 50, max 200)"},
+            "cursor": {"type": "string", "description": "next_cursor of the previous page"},
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
+    FIELDS = ('id', 'created_at', 'payslip_id', 'action', 'changes', 'actor_name', 'source')
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 200
+
+    def execute(self, args, request):
+        from payroll.models import PayslipAuditLog
+        from payroll.pagination import keyset_values
+        qs = PayslipAuditLog.objects.filter(hub_id=request.session.get('hub_id'))
+        if args.get('payslip_id'):
+            qs = qs.filter(payslip_id=args['payslip_id'])
+        try:
+            bounds = _parse_args(args, PayslipAuditLog, 'created_at', ('since', 'until'))
+        except ValueError as exc:
+            return {"error": str(exc)}
+        if bounds['since']:
+            qs = qs.filter(created_at__gte=bounds['since'])
+        if bounds['until']:
+            qs = qs.filter(created_at__lt=bounds['until'])
+        limit = min(max(int(args.get('limit') or self.DEFAULT_LIMIT), 1), self.MAX_LIMIT)
+        rows, next_cursor = keyset_values(qs, self.FIELDS, 'created_at', descending=True, limit=limit, token=args.get('cursor'))
+        entries = [
+            {**dict(zip(self.FIELDS, row)), 'created_at': row[1].isoformat(), 'payslip_id': str(row[2])}
+            for row in rows
+        ]
+        return {"entries": entries, "next_cursor": next_cursor}
+
+
+@register_tool
+@instrument_tool
+@audit_tool
 class UpdatePayrollRun(AssistantTool):
     name = "update_payroll_run"
     description = "Update a payslip's status (confirm, pay, or cancel)."
@@ -176,6 +380,8 @@ class UpdatePayrollRun(AssistantTool):
 
 
 @register_tool
+@instrument_tool
+@audit_tool
 class DeletePayrollRun(AssistantTool):
     name = "delete_payroll_run"
     description = "Delete a payslip (only allowed when status is draft)."
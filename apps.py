@@ -9,4 +9,4 @@ class PayrollConfig(AppConfig):
     verbose_name = _('Payroll')
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,159 @@
+"""
+Append-only payslip audit log.
+
+Every change to an existing payslip is recorded as a ``PayslipAuditLog``
+row with the changed fields as ``[old, new]`` pairs, in the transaction of
+the change:
+
+- single saves and deletes are diffed in the ``Payslip`` signal handlers
+  against the values the instance was loaded with;
+- bulk paths (``bulk_transition``, bulk delete) pass what they changed to
+  ``record_bulk``, which writes all rows with ``bulk_create``.
+
+Who made the change comes from ``audit_context``, entered by the
+``@audited`` views and ``@audit_tool`` AI tools; other writers (commands,
+scheduled tasks) are logged without a user. Payslip creation is not
+logged; ``created_at``/``run`` already say where a payslip came from.
+"""
+import functools
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import Payslip, PayslipAuditLog
+
+# Fields whose changes are recorded
+AUDIT_FIELDS = (
+    'employee_id', 'employee_name', 'period_start', 'period_end', 'gross_salary', 'deductions',
+    'net_salary', 'status', 'paid_date', 'notes', 'run_id', 'is_deleted',
+)
+# Resulting status: audit action
+STATUS_ACTIONS = {'confirmed': 'confirm', 'paid': 'pay', 'cancelled': 'cancel'}
+AUDIT_BATCH_SIZE = 2000
+
+_context = ContextVar('payroll_audit_context', default=(None, '', ''))
+
+
+def _uuid_or_none(value):
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+@contextmanager
+def audit_context(actor_id=None, actor_name='', source=''):
+    """Attribute the payslip changes made in the enclosed block to a user and source."""
+    token = _context.set((_uuid_or_none(actor_id), actor_name or '', source or ''))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_audit_context():
+    """``(actor_id, actor_name, source)`` in effect, to re-enter later with ``audit_context(*context)``."""
+    return _context.get()
+
+
+def _request_context(request, source):
+    session = getattr(request, 'session', None) or {}
+    return audit_context(session.get('local_user_id'), session.get('user_name', ''), source)
+
+
+def audited(view):
+    """Attribute the payslip changes of a view to the session's user."""
+    source = f'view:{view.__name__}'
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with _request_context(request, source):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def audit_tool(tool_class):
+    """Class decorator attributing the payslip changes of an AI tool to the session's user."""
+    execute = tool_class.execute
+
+    @functools.wraps(execute)
+    def wrapper(self, args, request):
+        with _request_context(request, f'tool:{self.name}'):
+            return execute(self, args, request)
+
+    tool_class.execute = wrapper
+    return tool_class
+
+
+def audit_value(name, value):
+    """JSON value of a payslip field as stored (amounts keep their two decimals)."""
+    field = Payslip._meta.get_field(name)
+    value = field.to_python(value)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value.quantize(Decimal(1).scaleb(-field.decimal_places)))
+    return str(value)
+
+
+def _entry(hub_id, payslip_id, action, changes, now):
+    actor_id, actor_name, source = _context.get()
+    return PayslipAuditLog(
+        hub_id=hub_id, payslip_id=payslip_id, action=action, changes=changes,
+        actor_id=actor_id, actor_name=actor_name, source=source, created_at=now,
+    )
+
+
+def _action(changes):
+    if 'is_deleted' in changes and changes['is_deleted'][1]:
+        return 'delete'
+    if 'status' in changes:
+        return STATUS_ACTIONS.get(changes['status'][1], 'update')
+    return 'update'
+
+
+def record_save(instance, update_fields=None):
+    """Log what a ``save()`` of a loaded payslip changed; nothing for new or unchanged ones."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return None
+    changes = {}
+    for name in AUDIT_FIELDS:
+        field = Payslip._meta.get_field(name)
+        if name not in loaded or (update_fields is not None and not {field.name, field.attname} & set(update_fields)):
+            continue
+        old, new = audit_value(name, loaded[name]), audit_value(name, getattr(instance, name))
+        if old != new:
+            changes[name] = [old, new]
+    if not changes:
+        return None
+    entry = _entry(instance.hub_id, instance.pk, _action(changes), changes, timezone.now())
+    entry.save()
+    return entry
+
+
+def record_delete(instance):
+    """Log a hard delete with the payslip's last values."""
+    changes = {name: [audit_value(name, getattr(instance, name)), None] for name in AUDIT_FIELDS if name != 'is_deleted'}
+    _entry(instance.hub_id, instance.pk, 'delete', changes, timezone.now()).save()
+
+
+def record_bulk(hub_id, action, changes_by_id, batch_size=AUDIT_BATCH_SIZE):
+    """
+    Log a bulk write: ``changes_by_id`` yields ``(payslip_id, changes)``.
+    All rows share one timestamp and are inserted with ``bulk_create``,
+    ``batch_size`` at a time.
+    """
+    now = timezone.now()
+    entries = (_entry(hub_id, payslip_id, action, changes, now) for payslip_id, changes in changes_by_id)
+    while batch := list(islice(entries, batch_size)):
+        PayslipAuditLog.objects.bulk_create(batch)
+
+
+def audit_trail(payslip_id):
+    """Audit entries of one payslip, oldest first."""
+    return PayslipAuditLog.objects.filter(payslip_id=payslip_id).order_by('created_at', 'id')
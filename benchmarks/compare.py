@@ -0,0 +1,46 @@
+"""
+Compare two benchmark result files written by the suite::
+
+    python -m payroll.benchmarks.compare before.json after.json [--threshold 1.25]
+
+Prints the ratio of every (operation, size) present in both files and exits
+with status 1 when any operation got slower than ``threshold`` times, or
+issues more queries than before.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as fileobj:
+        report = json.load(fileobj)
+    return {(row['name'], row['size']): row for row in report['results']}
+
+
+def compare(before, after, threshold=1.25):
+    """Rows of ``(name, size, before s, after s, ratio, queries before, queries after, regressed)``."""
+    rows = []
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[1], key[0])):
+        old, new = before[key], after[key]
+        ratio = new['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        regressed = ratio > threshold or new['queries'] > old['queries']
+        rows.append((*key, old['seconds'], new['seconds'], ratio, old['queries'], new['queries'], regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two payroll benchmark result files.')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+    rows = compare(load(args.before), load(args.after), args.threshold)
+    for name, size, old, new, ratio, old_queries, new_queries, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<36} {size:>9} {old * 1000:>10.1f}ms {new * 1000:>10.1f}ms {ratio:>6.2f}x  q {old_queries}->{new_queries}{flag}')
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
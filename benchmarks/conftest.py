@@ -0,0 +1,62 @@
+"""
+Fixtures for the payroll benchmarks.
+
+Benchmarks are skipped unless ``PAYROLL_BENCH=1`` is set; sizes come from
+``PAYROLL_BENCH_SIZES`` (comma separated, default ``10000,100000``), e.g.::
+
+    PAYROLL_BENCH=1 PAYROLL_BENCH_SIZES=10000,100000,1000000 pytest benchmarks/
+
+Data comes from ``payroll.factories.seed_payslips``, so every run of a size
+writes the same rows.
+"""
+import json
+import os
+import platform
+import uuid
+from datetime import datetime, timezone
+
+import django
+import pytest
+from django.db import connection
+
+BENCH_SIZES = [int(n) for n in os.environ.get('PAYROLL_BENCH_SIZES', '10000,100000').split(',') if n.strip()]
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get('PAYROLL_BENCH'):
+        return
+    skip = pytest.mark.skip(reason='set PAYROLL_BENCH=1 to run benchmarks')
+    for item in items:
+        if 'benchmarks' in item.nodeid:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def hub_id():
+    """Benchmark hub_id."""
+    return uuid.uuid4()
+
+
+@pytest.fixture(scope='session')
+def bench_results():
+    """
+    Collects benchmark results and writes them as JSON to ``PAYROLL_BENCH_OUTPUT``
+    (default ``bench_results.json``) at the end of the session; compare two
+    runs with ``python -m payroll.benchmarks.compare old.json new.json``.
+    """
+    results = []
+    yield results
+    if not results:
+        return
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'sizes': sorted(BENCH_SIZES),
+        },
+        'results': results,
+    }
+    with open(os.environ.get('PAYROLL_BENCH_OUTPUT', 'bench_results.json'), 'w') as fileobj:
+        json.dump(report, fileobj, indent=2, sort_keys=True)
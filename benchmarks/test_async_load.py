@@ -0,0 +1,89 @@
+"""
+Load test: sync vs async payslip list and dashboard under concurrent ASGI requests.
+
+Requests go through Django's real ASGI handler in-process, so sync views
+run in the handler's thread pool exactly as in an ASGI deployment. Tune
+with ``PAYROLL_BENCH_CONCURRENCY`` (default ``32``) and
+``PAYROLL_BENCH_REQUESTS`` (default ``256``). SQLite serializes every query
+on one file, so the figures only mean something on PostgreSQL.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.asgi import get_asgi_application
+from django.urls import reverse
+
+from payroll.factories import seed_payslips
+
+from .conftest import BENCH_SIZES
+
+CONCURRENCY = int(os.environ.get('PAYROLL_BENCH_CONCURRENCY', 32))
+REQUESTS = int(os.environ.get('PAYROLL_BENCH_REQUESTS', 256))
+ROUTES = (('payroll:payslips_list', 'payroll:payslips_list_async'), ('payroll:dashboard', 'payroll:dashboard_async'))
+
+
+async def _get(app, path, query, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    status = None
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    done = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+async def _load(app, path, query, cookie):
+    """Run REQUESTS GETs with CONCURRENCY in flight; returns requests/sec."""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            assert await _get(app, path, query, cookie) == 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - started)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_throughput(hub_id):
+    """Compare requests/sec of the sync and async views (e.g. sizes 10000,100000)."""
+    session = SessionStore()
+    session.update({'local_user_id': '1', 'user_role': 'admin', 'hub_id': str(hub_id), 'store_config_checked': True})
+    session.create()
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+    app = get_asgi_application()
+
+    seeded = 0
+    for size in sorted(BENCH_SIZES):
+        seed_payslips(hub_id, payslips=size - seeded, seed=seeded, with_users=False)
+        seeded = size
+        for sync_route, async_route in ROUTES:
+            query = 'page=3&sort=employee_name' if 'payslips' in sync_route else ''
+            sync_rps = asyncio.run(_load(app, reverse(sync_route), query, cookie))
+            async_rps = asyncio.run(_load(app, reverse(async_route), query, cookie))
+            print(
+                f'rows={size} view={sync_route.split(":")[1]} concurrency={CONCURRENCY} '
+                f'sync={sync_rps:.0f} req/s async={async_rps:.0f} req/s'
+            )
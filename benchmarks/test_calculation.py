@@ -0,0 +1,27 @@
+"""Throughput benchmark for the calculation engine."""
+import random
+import time
+
+from payroll.calculation import DeductionRules, calculate_batch
+
+from .conftest import BENCH_SIZES
+
+RULES = DeductionRules.from_config({
+    'tax_brackets': [['0', '19'], ['1037.50', '24'], ['1683.33', '30'], ['5000', '37'], ['25000', '45']],
+    'social_security_rate': '6.35',
+    'social_security_cap': '4720.50',
+    'fixed_deductions': ['12.05'],
+})
+
+
+def test_price_batch_under_a_second():
+    """Pricing 50k employees (or the largest bench size) must take well under a second."""
+    rng = random.Random(1)
+    for size in sorted({50000, *BENCH_SIZES}):
+        grosses = [rng.randint(80000, 1500000) for _ in range(size)]
+        started = time.perf_counter()
+        calculate_batch(grosses, RULES)
+        elapsed = time.perf_counter() - started
+        print(f'employees={size} elapsed={elapsed * 1000:.1f}ms')
+        if size == 50000:
+            assert elapsed < 1.0
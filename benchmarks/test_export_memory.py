@@ -0,0 +1,50 @@
+"""Memory benchmark for the streaming payslip exports."""
+import tempfile
+import time
+import tracemalloc
+
+import pytest
+
+from payroll.exports import iter_csv, iter_export_rows, write_xlsx
+from payroll.factories import seed_payslips
+from payroll.models import Payslip
+
+from .conftest import BENCH_SIZES
+
+FIELDS = ['status', 'net_salary', 'deductions', 'gross_salary', 'employee_id', 'employee_name']
+
+
+def _measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def _export_csv(qs):
+    for _chunk in iter_csv(iter_export_rows(qs, FIELDS), FIELDS):
+        pass
+
+
+def _export_xlsx(qs):
+    with tempfile.TemporaryFile() as fileobj:
+        write_xlsx(iter_export_rows(qs, FIELDS), FIELDS, fileobj)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('export', [_export_csv, _export_xlsx], ids=['csv', 'xlsx'])
+def test_export_memory_is_flat(hub_id, export):
+    """Peak memory must not grow with the number of exported rows."""
+    peaks, seeded = [], 0
+    for size in sorted(BENCH_SIZES):
+        seed_payslips(hub_id, payslips=size - seeded, seed=seeded, with_users=False)
+        seeded = size
+        qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False).order_by('status')
+        peak, elapsed = _measure(lambda: export(qs))
+        peaks.append(peak)
+        print(f'{export.__name__} rows={size} peak={peak / 1024:.0f}KiB elapsed={elapsed:.2f}s')
+    # Allow a fixed slack for interpreter caches; growth must not track row count.
+    assert peaks[-1] <= peaks[0] * 1.5 + 1024 * 1024
@@ -0,0 +1,48 @@
+"""Memory benchmark for the streaming bank payment files."""
+import time
+import tracemalloc
+import uuid
+from datetime import date
+
+import pytest
+
+from payroll.factories import seed_payslips
+from payroll.models import BankAccount, Payslip
+from payroll.payments import PaymentFile
+
+from .conftest import BENCH_SIZES
+
+# seed_payslips leaves the last month draft and the one before confirmed
+MONTH = date(2025, 1, 1)
+
+
+def _seed_accounts(hub_id):
+    employee_ids = Payslip.objects.filter(hub_id=hub_id).order_by().values_list('employee_id', flat=True).distinct()
+    accounts = [BankAccount(hub_id=hub_id, holder_name='Payroll Hub', iban='ES9121000418450200051332', bic='CAIXESBBXXX')]
+    accounts += [
+        BankAccount(hub_id=hub_id, employee_id=employee_id, holder_name='Employee', iban='DE89370400440532013000')
+        for employee_id in employee_ids.iterator()
+    ]
+    BankAccount.objects.bulk_create(accounts, batch_size=5000)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('fmt', ['sepa', 'fixed'])
+def test_payment_file_memory_is_flat(fmt):
+    """Peak memory of writing a payment file must not grow with the number of transfers."""
+    peaks = []
+    for size in sorted(BENCH_SIZES):
+        hub_id = uuid.uuid4()
+        seed_payslips(hub_id, employees=size, periods=2, start=MONTH, with_users=False)
+        _seed_accounts(hub_id)
+        tracemalloc.start()
+        started = time.perf_counter()
+        payment_file = PaymentFile(hub_id, MONTH, fmt)
+        written = sum(len(chunk) for chunk in payment_file.iter_file())
+        elapsed = time.perf_counter() - started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        print(f'{fmt} transfers={payment_file.count} bytes={written} peak={peak / 1024:.0f}KiB elapsed={elapsed:.2f}s')
+    # Allow a fixed slack for interpreter caches; growth must not track transfer count.
+    assert peaks[-1] <= peaks[0] * 1.5 + 1024 * 1024
@@ -0,0 +1,52 @@
+"""Latency benchmark: indexed search vs the original icontains filter."""
+import time
+
+import pytest
+from django.db.models import Q
+
+from payroll.factories import seed_payslips
+from payroll.models import Payslip
+from payroll.search import filter_search, search_backend, search_payslips
+
+from .conftest import BENCH_SIZES
+
+QUERY = 'Navarro'
+REPEAT = 5
+
+
+def _icontains_page(qs):
+    qs = qs.filter(Q(employee_name__icontains=QUERY) | Q(status__icontains=QUERY) | Q(notes__icontains=QUERY))
+    return qs.count(), list(qs.order_by('status', 'id')[:12])
+
+
+def _indexed_page(qs):
+    qs = filter_search(qs, QUERY)
+    return qs.count(), list(qs.order_by('status', 'id')[:12])
+
+
+def _best_of(fn):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_latency(hub_id):
+    """Compare count + first page for the list view filter, and the ranked search API (e.g. sizes 100000,1000000)."""
+    seeded = 0
+    for size in sorted(BENCH_SIZES):
+        seed_payslips(hub_id, payslips=size - seeded, seed=seeded, with_users=False)
+        seeded = size
+        qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False)
+        like_time, (like_total, _rows) = _best_of(lambda: _icontains_page(qs))
+        indexed_time, (indexed_total, _rows) = _best_of(lambda: _indexed_page(qs))
+        ranked_time, ranked = _best_of(lambda: search_payslips(hub_id, QUERY, limit=12))
+        print(
+            f'rows={size} backend={search_backend()} matches={indexed_total} '
+            f'icontains={like_time * 1000:.1f}ms indexed={indexed_time * 1000:.1f}ms '
+            f'ranked={ranked_time * 1000:.1f}ms'
+        )
+        assert indexed_total == like_total == ranked['total']
@@ -0,0 +1,129 @@
+"""
+End-to-end benchmark suite: list, search, exports, summaries, bulk actions
+and monthly generation at each ``PAYROLL_BENCH_SIZES`` size.
+
+Each size gets a fresh hub holding that many payslips next to
+``PAYROLL_BENCH_HUBS`` other hubs (default 3) with a tenth of it each, so
+every query runs against a multi-tenant table. All of them are seeded
+deterministically by ``payroll.factories``. Read-only operations report the
+best of ``PAYROLL_BENCH_REPEAT`` runs (default 3); mutations run once. Results (seconds, queries, DB time) are written to
+``PAYROLL_BENCH_OUTPUT`` by the ``bench_results`` fixture.
+"""
+import os
+import uuid
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.conf import settings
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from payroll.ai_tools import GetPayrollSummary
+from payroll.caching import invalidate_hub
+from payroll.factories import DEFAULT_PERIODS, seed_payslips
+from payroll.instrumentation import measure
+from payroll.models import Payslip
+from payroll.scheduled_tasks import generate_monthly_payslips
+from payroll.views import PAYSLIP_SORT_FIELDS
+
+from .conftest import BENCH_SIZES
+
+REPEAT = int(os.environ.get('PAYROLL_BENCH_REPEAT', 3))
+OTHER_HUBS = int(os.environ.get('PAYROLL_BENCH_HUBS', 3))
+BULK_SIZE = 500
+
+
+def seed_dataset(hub_id, payslips, seed):
+    """``payslips // 12`` active employees with one payslip per month of 2025 (distinct seeds, distinct ids)."""
+    return seed_payslips(hub_id, employees=max(payslips // DEFAULT_PERIODS, 1), seed=seed)
+
+
+class Bench:
+    """Times operations against one seeded hub and records them."""
+
+    def __init__(self, results, hub_id, size):
+        self.results = results
+        self.hub_id = hub_id
+        self.size = size
+        self.client = Client()
+        session = SessionStore()
+        session.update({
+            'local_user_id': str(uuid.uuid4()), 'user_name': 'Bench', 'user_role': 'admin',
+            'hub_id': str(hub_id), 'store_config_checked': True,
+        })
+        session.create()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+
+    def run(self, name, fn, repeat=REPEAT):
+        best = None
+        for _ in range(repeat):
+            with measure(f'bench.{name}') as metrics:
+                fn()
+            if best is None or metrics.total_ms < best.total_ms:
+                best = metrics
+        self.results.append({
+            'name': name, 'size': self.size, 'seconds': round(best.total_ms / 1000, 6),
+            'queries': best.queries, 'db_seconds': round(best.db_ms / 1000, 6),
+        })
+        print(f'size={self.size} {name}: {best.total_ms:.1f}ms queries={best.queries}')
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert response.status_code == 200, response.status_code
+        if response.streaming:
+            for _chunk in response.streaming_content:
+                pass
+        return response
+
+    def post(self, url, data):
+        response = self.client.post(url, data)
+        assert response.status_code == 200, response.status_code
+        return response
+
+    def summary(self, **args):
+        request = RequestFactory().get('/')
+        request.session = {'hub_id': str(self.hub_id)}
+        invalidate_hub(self.hub_id)  # time the query, not the cache
+        return GetPayrollSummary().execute(args, request)
+
+    def ids(self, status):
+        qs = Payslip.objects.filter(hub_id=self.hub_id, is_deleted=False, status=status).order_by('id')
+        return ','.join(str(pk) for pk in qs.values_list('id', flat=True)[:BULK_SIZE])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_suite(bench_results):
+    """Time the module's hot paths at every size and record them in bench_results."""
+    list_url = reverse('payroll:payslips_list')
+    bulk_url = reverse('payroll:payslips_bulk_action')
+    for size in sorted(BENCH_SIZES):
+        hub_id = uuid.uuid4()
+        for n in range(OTHER_HUBS):
+            seed_dataset(uuid.uuid4(), size // 10, seed=size * 100 + n + 1)
+        seeded = seed_dataset(hub_id, size, seed=size * 100)
+        bench = Bench(bench_results, hub_id, seeded['payslips'])
+
+        for sort_field in PAYSLIP_SORT_FIELDS:
+            bench.run(f'list.sort.{sort_field}', lambda: bench.get(list_url, sort=sort_field))
+        bench.run('list.sort.employee_name.desc', lambda: bench.get(list_url, sort='employee_name', dir='desc'))
+        bench.run('list.deep_page', lambda: bench.get(list_url, page=max(seeded['payslips'] // 24, 1)))
+        bench.run('list.cursor', lambda: bench.get(list_url, paging='cursor'))
+        bench.run('list.search', lambda: bench.get(list_url, q='Navarro'))
+
+        bench.run('export.csv', lambda: bench.get(list_url, export='csv'), repeat=1)
+        bench.run('export.excel', lambda: bench.get(list_url, export='excel'), repeat=1)
+
+        bench.run('summary.all', lambda: bench.summary())
+        bench.run('summary.year_by_month', lambda: bench.summary(period_start='2025-01-01', period_end='2025-12-31', group_by='month'))
+        bench.run('summary.partial_range', lambda: bench.summary(period_start='2025-03-15', period_end='2025-09-15'))
+        bench.run('summary.by_employee', lambda: bench.summary(period_start='2025-12-01', period_end='2025-12-31', group_by='employee'))
+
+        drafts = bench.ids('draft')
+        bench.run('bulk.confirm', lambda: bench.post(bulk_url, {'ids': drafts, 'action': 'confirm'}), repeat=1)
+        bench.run('bulk.pay', lambda: bench.post(bulk_url, {'ids': drafts, 'action': 'pay'}), repeat=1)
+        drafts = bench.ids('draft')
+        bench.run('bulk.cancel', lambda: bench.post(bulk_url, {'ids': drafts, 'action': 'cancel'}), repeat=1)
+        bench.run('bulk.delete', lambda: bench.post(bulk_url, {'ids': drafts, 'action': 'delete'}), repeat=1)
+
+        payload = {'period': '2026-01', 'hub_id': str(hub_id), 'workers': 0}
+        bench.run('generate_monthly_payslips', lambda: generate_monthly_payslips(payload), repeat=1)
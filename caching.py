@@ -0,0 +1,117 @@
+"""
+Per-hub cache for dashboard and summary figures.
+
+Entries are keyed by hub_id, a per-hub generation stamp, a name and the
+period they cover. Any payslip change in a hub replaces its generation
+stamp (see ``signals.payslips_changed``), which makes every entry of that
+hub unreachable at once while leaving other hubs' entries untouched.
+Hit/miss counters are kept in the cache so they are shared by all workers.
+``acached`` is the same lookup for async views, on the cache's async API.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+STATS_KEYS = ('hits', 'misses')
+
+
+def _timeout():
+    return getattr(settings, 'PAYROLL_CACHE_TIMEOUT', 300)
+
+
+def _generation_key(hub_id):
+    return f'payroll:gen:{hub_id}'
+
+
+def _generation(hub_id):
+    key = _generation_key(hub_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+async def _ageneration(hub_id):
+    key = _generation_key(hub_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _key(hub_id, generation, name, parts):
+    suffix = ':'.join('' if part is None else str(part) for part in parts)
+    return f'payroll:{hub_id}:{generation}:{name}:{suffix}'
+
+
+def cache_key(hub_id, name, parts=()):
+    return _key(hub_id, _generation(hub_id), name, parts)
+
+
+def _count(stat):
+    key = f'payroll:stats:{stat}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def _acount(stat):
+    key = f'payroll:stats:{stat}'
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def cached(hub_id, name, parts, builder):
+    """Return the cached value for (hub_id, name, parts), building and storing it on a miss."""
+    key = cache_key(hub_id, name, parts)
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+    _count('misses')
+    value = builder()
+    cache.set(key, value, _timeout())
+    return value
+
+
+async def acached(hub_id, name, parts, builder):
+    """Async ``cached``: ``builder`` returns an awaitable, awaited on a miss."""
+    key = _key(hub_id, await _ageneration(hub_id), name, parts)
+    value = await cache.aget(key)
+    if value is not None:
+        await _acount('hits')
+        return value
+    await _acount('misses')
+    value = await builder()
+    await cache.aset(key, value, _timeout())
+    return value
+
+
+def invalidate_hub(hub_id):
+    """Drop every cached entry of a hub, now and again once the current transaction commits."""
+    if not hub_id:
+        return
+    key = _generation_key(hub_id)
+    cache.set(key, time.time_ns(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
+
+
+def cache_stats():
+    values = cache.get_many([f'payroll:stats:{stat}' for stat in STATS_KEYS])
+    hits = values.get('payroll:stats:hits', 0)
+    misses = values.get('payroll:stats:misses', 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 3) if total else None}
+
+
+def reset_cache_stats():
+    cache.delete_many([f'payroll:stats:{stat}' for stat in STATS_KEYS])
@@ -0,0 +1,232 @@
+"""
+Printable payslip documents.
+
+A payslip is rendered from ``payroll/documents/payslip.html`` to HTML, or to
+PDF when WeasyPrint is installed. Rendered documents are cached on disk
+under ``PAYROLL_DOCUMENT_ROOT``, one directory per payslip, named after the
+payslip's ``updated_at``: every write to a payslip bumps ``updated_at``, so
+an unchanged payslip is never rendered twice and a changed one is rendered
+again on its next request.
+
+``render_period`` pre-renders the missing documents of a month in a worker
+pool (the same spawn-based pool as payroll runs). ``iter_period_zip``
+streams a month's documents as a ZIP archive, one document in memory at a
+time.
+"""
+import importlib.util
+import io
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+
+from .models import Payslip
+from .rollups import next_month
+from .run_workers import init_worker, render_documents_task
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = 'payroll/documents/payslip.html'
+# Bump when the template changes so cached documents are rendered again
+DOCUMENT_VERSION = 1
+FORMATS = ('html', 'pdf')
+CONTENT_TYPES = {'html': 'text/html; charset=utf-8', 'pdf': 'application/pdf'}
+RENDER_CHUNK_SIZE = 200
+
+
+def pdf_available():
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def default_format():
+    """``pdf`` when WeasyPrint is installed, ``html`` otherwise."""
+    return 'pdf' if pdf_available() else 'html'
+
+
+def document_root():
+    root = getattr(settings, 'PAYROLL_DOCUMENT_ROOT', None)
+    if root:
+        return str(root)
+    return os.path.join(str(getattr(settings, 'BASE_DIR', os.getcwd())), 'data', 'payroll_documents')
+
+
+def document_path(hub_id, payslip_id, updated_at, fmt):
+    stamp = int(updated_at.timestamp() * 1_000_000)
+    return os.path.join(document_root(), str(hub_id), str(payslip_id), f'{stamp}-v{DOCUMENT_VERSION}.{fmt}')
+
+
+def _document_key(name):
+    """``(stamp, version)`` of a cached document file name; None for other files."""
+    stamp, _sep, version = name.split('.', 1)[0].partition('-v')
+    try:
+        return int(stamp), int(version)
+    except ValueError:
+        return None
+
+
+def document_filename(payslip, fmt):
+    name = slugify(payslip.employee_name) or 'payslip'
+    return f'{name}-{payslip.period_start:%Y-%m}-{str(payslip.pk)[:8]}.{fmt}'
+
+
+def _business_name():
+    from apps.configuration.models import StoreConfig
+    return StoreConfig.get_solo().business_name
+
+
+def render_document(payslip, fmt, business_name=None):
+    """Render one payslip to ``bytes`` (no caching)."""
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown document format: {fmt}')
+    html = render_to_string(TEMPLATE, {
+        'payslip': payslip,
+        'business_name': _business_name() if business_name is None else business_name,
+    })
+    if fmt == 'html':
+        return html.encode('utf-8')
+    import weasyprint
+    return weasyprint.HTML(string=html).write_pdf()
+
+
+def cached_document(payslip, fmt, business_name=None):
+    """
+    Path of the rendered document of ``payslip``, rendering it on a cache miss.
+
+    Renderings of older versions of the payslip are removed when a new one
+    is written; a newer one, written for a fresher instance, is kept.
+    """
+    path = document_path(payslip.hub_id, payslip.pk, payslip.updated_at, fmt)
+    if os.path.exists(path):
+        return path
+    content = render_document(payslip, fmt, business_name)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as fileobj:
+        fileobj.write(content)
+    os.replace(temp_path, path)
+    current = _document_key(os.path.basename(path))
+    for entry in os.scandir(directory):
+        key = _document_key(entry.name) if entry.name.endswith(f'.{fmt}') else None
+        if key is not None and key < current:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def period_queryset(hub_id, period_start):
+    """Non-deleted payslips of the month starting at ``period_start``."""
+    return Payslip.objects.filter(
+        hub_id=hub_id, is_deleted=False, period_start__gte=period_start, period_start__lt=next_month(period_start),
+    )
+
+
+def render_documents(ids, fmt):
+    """Render (or find cached) the documents of the given payslip ids; returns how many were rendered."""
+    business_name = None
+    rendered = 0
+    for payslip in Payslip.objects.filter(pk__in=ids).order_by('pk'):
+        if os.path.exists(document_path(payslip.hub_id, payslip.pk, payslip.updated_at, fmt)):
+            continue
+        if business_name is None:
+            business_name = _business_name()
+        cached_document(payslip, fmt, business_name)
+        rendered += 1
+    return rendered
+
+
+def render_period(hub_id, period_start, fmt=None, workers=0, chunk_size=RENDER_CHUNK_SIZE):
+    """
+    Render every document of a month that is not cached yet.
+
+    Missing documents are split into chunks of ``chunk_size`` payslips and
+    rendered by ``workers`` processes (0 renders in this process).
+    """
+    started = time.monotonic()
+    fmt = fmt or default_format()
+    rows = period_queryset(hub_id, period_start).order_by('pk').values_list('pk', 'updated_at')
+    total, missing = 0, []
+    for total, (pk, updated_at) in enumerate(rows.iterator(chunk_size=2000), 1):
+        if not os.path.exists(document_path(hub_id, pk, updated_at, fmt)):
+            missing.append(pk)
+    chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+    rendered = failed = 0
+    if workers and len(chunks) > 1:
+        context = multiprocessing.get_context('spawn')
+        database_names = {alias: connections[alias].settings_dict['NAME'] for alias in connections}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(database_names,)) as pool:
+            futures = {pool.submit(render_documents_task, {'ids': chunk, 'fmt': fmt}): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    rendered += future.result()
+                except Exception as exc:
+                    logger.error('payslip document chunk failed hub=%s: %s', hub_id, exc)
+                    failed += len(futures[future])
+    else:
+        for chunk in chunks:
+            rendered += render_documents(chunk, fmt)
+    elapsed = time.monotonic() - started
+    return {
+        'period': period_start.strftime('%Y-%m'),
+        'format': fmt,
+        'total': total,
+        'rendered': rendered,
+        'cached': total - len(missing),
+        'failed': failed,
+        'elapsed_seconds': round(elapsed, 3),
+    }
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that hands out what ``zipfile`` wrote since the last ``take()``."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_period_zip(hub_id, period_start, fmt=None, chunk_size=RENDER_CHUNK_SIZE):
+    """
+    Yield a ZIP archive of a month's documents piece by piece.
+
+    Documents come from the render cache (rendering misses on the way), and
+    each one is yielded as soon as it is compressed. PDFs are stored as they
+    are; HTML is deflated.
+    """
+    fmt = fmt or default_format()
+    compression = zipfile.ZIP_STORED if fmt == 'pdf' else zipfile.ZIP_DEFLATED
+    stream = _ZipStream()
+    business_name = None
+    with zipfile.ZipFile(stream, 'w', compression=compression) as archive:
+        for payslip in period_queryset(hub_id, period_start).order_by('employee_name', 'pk').iterator(chunk_size=chunk_size):
+            if business_name is None:
+                business_name = _business_name()
+            try:
+                with open(cached_document(payslip, fmt, business_name), 'rb') as fileobj:
+                    content = fileobj.read()
+            except FileNotFoundError:
+                # Replaced by a rendering of a newer version of the payslip meanwhile
+                content = render_document(payslip, fmt, business_name)
+            archive.writestr(document_filename(payslip, fmt), content)
+            yield stream.take()
+    yield stream.take()
@@ -0,0 +1,71 @@
+"""
+Streaming payslip exports.
+
+Rows are read with ``values_list().iterator()`` so no model instances are
+built and only ``chunk_size`` rows are held at a time. CSV is sent to the
+client while it is being produced; XLSX is written with openpyxl's
+write-only workbook (rows go straight to disk) and then streamed from a
+temporary file.
+"""
+import csv
+import io
+import tempfile
+import uuid
+
+from django.http import FileResponse, StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def iter_export_rows(qs, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield tuples of ``fields`` without hydrating model instances."""
+    return qs.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def iter_csv(rows, headers, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encode rows as CSV, yielding one string per ``chunk_size`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_csv(qs, fields, headers, filename, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSV download that is generated while it is being sent."""
+    response = StreamingHttpResponse(
+        iter_csv(iter_export_rows(qs, fields, chunk_size), headers, chunk_size),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _xlsx_cell(value):
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def write_xlsx(rows, headers, fileobj):
+    """Write rows into ``fileobj`` using a constant-memory workbook."""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_xlsx_cell(value) for value in row])
+    workbook.save(fileobj)
+
+
+def stream_excel(qs, fields, headers, filename, chunk_size=EXPORT_CHUNK_SIZE):
+    """XLSX download built on disk and streamed back in blocks."""
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(iter_export_rows(qs, fields, chunk_size), headers, fileobj)
+    fileobj.seek(0)
+    return FileResponse(fileobj, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
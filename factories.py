@@ -0,0 +1,245 @@
+"""
+Deterministic bulk seeding of payslips for tests, benchmarks and demo hubs.
+
+``seed_payslips`` creates ``employees`` employees with one payslip per month
+for ``periods`` consecutive months. Names, salaries and statuses are drawn
+from ``seed`` alone, so every hub seeded with it looks the same; primary keys
+are drawn from the hub and the seed, so the same arguments always write the
+same rows and different hubs never collide. Seeding one hub twice needs two
+seeds. Older months are paid, the previous month is confirmed and the
+last one is draft; about 3% of payslips are cancelled.
+
+Rows skip the ORM save path: values are adapted once per employee and month,
+then streamed with ``COPY`` on PostgreSQL and inserted with ``executemany``
+elsewhere. Derived data (rollups, year-to-date accumulators, snapshots,
+cached summaries) is refreshed once at the end, in the same transaction.
+"""
+import calendar
+import csv
+import io
+import math
+import random
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .calculation import calculate_batch, from_cents, to_cents
+from .models import Payslip
+from .rulesets import hub_rules
+from .signals import payslips_changed
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_EMPLOYEES = 100
+DEFAULT_PERIODS = 12
+DEFAULT_START = date(2025, 1, 1)
+CANCELLED_RATE = 0.03
+FLAT_DEDUCTION_RATE = Decimal('0.21')
+
+FIRST_NAMES = (
+    'Ana', 'Carlos', 'Elena', 'David', 'Laura', 'Javier', 'Marta', 'Pablo', 'Sara', 'Diego',
+    'Lucia', 'Sergio', 'Paula', 'Alberto', 'Irene', 'Raul', 'Nuria', 'Hugo', 'Clara', 'Ivan',
+)
+LAST_NAMES = (
+    'Garcia', 'Martinez', 'Lopez', 'Sanchez', 'Perez', 'Gomez', 'Martin', 'Jimenez', 'Ruiz', 'Hernandez',
+    'Diaz', 'Moreno', 'Alvarez', 'Romero', 'Navarro', 'Torres', 'Dominguez', 'Gil', 'Vazquez', 'Serrano',
+)
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def seed_months(start=DEFAULT_START, periods=DEFAULT_PERIODS):
+    """``(period_start, period_end)`` of ``periods`` consecutive months from ``start``."""
+    months = []
+    for offset in range(periods):
+        year, month = divmod(start.month - 1 + offset, 12)
+        year, month = start.year + year, month + 1
+        months.append((date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])))
+    return months
+
+
+def _employees(rng, ids, count):
+    employees = []
+    for _ in range(count):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}'
+        gross = Decimal(rng.randint(120000, 600000)).scaleb(-2)
+        employees.append((_uuid(ids), name, gross))
+    return employees
+
+
+def _create_users(hub_id, employees, batch_size):
+    from apps.accounts.models import LocalUser
+    domain = f'{str(hub_id)[:8]}.example'
+    LocalUser.objects.bulk_create(
+        (
+            LocalUser(
+                id=employee_id, hub_id=hub_id, name=name, email=f'employee{i}@{domain}',
+                role='employee', pin_hash='!', is_active=True,
+            )
+            for i, (employee_id, name, _gross) in enumerate(employees)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def _status(month_index, periods, rng):
+    if rng.random() < CANCELLED_RATE:
+        return 'cancelled'
+    if month_index == periods - 1:
+        return 'draft'
+    if month_index == periods - 2:
+        return 'confirmed'
+    return 'paid'
+
+
+def _priced(employees, rules):
+    """``(employee_id, name, gross, deductions, net)`` per employee."""
+    grosses = [gross for _id, _name, gross in employees]
+    if rules:
+        deductions, net = calculate_batch([to_cents(gross) for gross in grosses], rules)
+        deductions = [from_cents(cents) for cents in deductions]
+        net = [from_cents(cents) for cents in net]
+    else:
+        deductions = [(gross * FLAT_DEDUCTION_RATE).quantize(Decimal('0.01')) for gross in grosses]
+        net = [gross - deduction for gross, deduction in zip(grosses, deductions)]
+    return [
+        (employee_id, name, gross, deduction, net_salary)
+        for (employee_id, name, gross), deduction, net_salary in zip(employees, deductions, net)
+    ]
+
+
+def _iter_batches(rng, ids, hub_id, employees, months, limit, batch_size):
+    """
+    Payslip rows as tuples of database values in ``Payslip._meta.concrete_fields`` order.
+
+    Values are adapted with ``get_db_prep_save`` once per employee, month or
+    hub rather than once per row; only the primary key changes every row.
+    Fields not seeded here take their model default (``auto_now`` ones the
+    current time), so new Payslip fields need no change.
+    """
+    fields = {field.attname: field for field in Payslip._meta.concrete_fields}
+
+    def prep(attname, value):
+        return fields[attname].get_db_prep_save(value, connection)
+
+    def default(field):
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            return now
+        return field.get_default()
+
+    now = timezone.now()
+    seeded = {'id', 'employee_id', 'employee_name', 'gross_salary', 'deductions', 'net_salary', 'period_start', 'period_end', 'status', 'paid_date'}
+    constant = {
+        attname: prep(attname, hub_id if attname == 'hub_id' else default(field))
+        for attname, field in fields.items() if attname not in seeded
+    }
+    staff = [
+        {
+            attname: prep(attname, value)
+            for attname, value in zip(('employee_id', 'employee_name', 'gross_salary', 'deductions', 'net_salary'), employee)
+        }
+        for employee in employees
+    ]
+    layout = list(fields)
+    batch, made = [], 0
+    for month_index, (period_start, period_end) in enumerate(months):
+        month = {'period_start': prep('period_start', period_start), 'period_end': prep('period_end', period_end)}
+        paid_date = prep('paid_date', period_end)
+        for employee in staff:
+            if made == limit:
+                break
+            status = _status(month_index, len(months), rng)
+            row = {
+                **constant, **employee, **month, 'id': prep('id', _uuid(ids)),
+                'status': status, 'paid_date': paid_date if status == 'paid' else None,
+            }
+            batch.append(tuple(row[attname] for attname in layout))
+            made += 1
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _columns():
+    return [connection.ops.quote_name(field.column) for field in Payslip._meta.concrete_fields]
+
+
+def _copy_batch(batch):
+    """Stream rows into ``payroll_payslip`` with PostgreSQL ``COPY``."""
+    table = connection.ops.quote_name(Payslip._meta.db_table)
+    sql = f'COPY {table} ({", ".join(_columns())}) FROM STDIN'
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy'):  # psycopg 3 adapts the Python values itself
+            with raw.copy(sql) as copy:
+                for row in batch:
+                    copy.write_row(row)
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in batch:
+            writer.writerow(['\\N' if value is None else value for value in row])
+        buffer.seek(0)
+        raw.copy_expert(f"{sql} WITH (FORMAT csv, NULL '\\N')", buffer)
+
+
+def _insert_batch(batch):
+    """Insert rows with one ``executemany``, skipping the ORM's per-field SQL compilation."""
+    columns = _columns()
+    table = connection.ops.quote_name(Payslip._meta.db_table)
+    sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))})'
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, batch)
+
+
+def seed_payslips(hub_id, employees=None, periods=DEFAULT_PERIODS, payslips=None, seed=0, start=DEFAULT_START,
+                  batch_size=DEFAULT_BATCH_SIZE, with_users=True, use_copy=None):
+    """
+    Seed ``employees`` employees of a hub with one payslip per month for ``periods`` months.
+
+    ``payslips`` caps the number of payslips (the last month is then only
+    partly filled); given alone it sizes the hub to ``ceil(payslips /
+    periods)`` employees. ``with_users`` also creates the employees as
+    active ``LocalUser`` rows so payroll runs pick them up. ``use_copy``
+    forces ``COPY`` on or off (default: on for PostgreSQL). Hubs with
+    deduction rules get their payslips priced with them; others use a flat
+    21%.
+    """
+    started = time.monotonic()
+    if employees is None:
+        employees = math.ceil(payslips / periods) if payslips else DEFAULT_EMPLOYEES
+    limit = employees * periods if payslips is None else min(payslips, employees * periods)
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    rng, ids = random.Random(seed), random.Random(f'{hub_id}:{seed}')
+    staff = _employees(rng, ids, employees)
+    months = seed_months(start, periods)
+    priced = _priced(staff, hub_rules(str(hub_id)))
+    write = _copy_batch if use_copy else _insert_batch
+    with transaction.atomic():
+        if with_users:
+            _create_users(hub_id, staff, batch_size)
+        for batch in _iter_batches(rng, ids, hub_id, priced, months, limit, batch_size):
+            write(batch)
+        if limit:
+            payslips_changed(
+                hub_id, [period_start for period_start, _end in months],
+                [employee_id for employee_id, _name, _gross in staff],
+            )
+    elapsed = time.monotonic() - started
+    return {
+        'hub_id': str(hub_id),
+        'employees': employees,
+        'periods': periods,
+        'payslips': limit,
+        'method': 'copy' if use_copy else 'insert',
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(limit / elapsed, 1) if elapsed else float(limit),
+    }
@@ -1,7 +1,22 @@
+from decimal import Decimal, InvalidOperation
+
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
-from .models import Payslip
+from .models import DeductionRuleSet, Payslip
+
+
+def net_salary_error(cleaned_data):
+    """Return an error message when net_salary is not gross_salary - deductions."""
+    gross = cleaned_data.get('gross_salary')
+    deductions = cleaned_data.get('deductions')
+    net = cleaned_data.get('net_salary')
+    if None in (gross, deductions, net):
+        return None
+    if net != gross - deductions:
+        return _('Net salary must equal gross salary minus deductions (%(expected)s).') % {'expected': gross - deductions}
+    return None
+
 
 class PayslipForm(forms.ModelForm):
     class Meta:
@@ -20,3 +35,58 @@ class PayslipForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'class': 'textarea textarea-sm w-full', 'rows': 3}),
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        error = net_salary_error(cleaned_data)
+        if error:
+            self.add_error('net_salary', error)
+        return cleaned_data
+
+
+class DeductionRuleSetForm(forms.ModelForm):
+    brackets = forms.CharField(
+        required=False, label=_('Tax Brackets'),
+        help_text=_('One bracket per line: monthly amount from which it applies, rate % (e.g. "1037.50, 24").'),
+        widget=forms.Textarea(attrs={'class': 'textarea textarea-sm w-full font-mono', 'rows': 5}),
+    )
+
+    class Meta:
+        model = DeductionRuleSet
+        fields = ['social_security_rate', 'social_security_cap', 'fixed_deductions']
+        widgets = {
+            'social_security_rate': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number', 'step': '0.01'}),
+            'social_security_cap': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number', 'step': '0.01'}),
+            'fixed_deductions': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number', 'step': '0.01'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.tax_brackets:
+            self.initial.setdefault('brackets', '\n'.join(f'{start}, {rate}' for start, rate in self.instance.tax_brackets))
+
+    def clean_social_security_rate(self):
+        rate = self.cleaned_data['social_security_rate']
+        if rate is not None and not Decimal(0) <= rate <= Decimal(100):
+            raise forms.ValidationError(_('Enter a rate between 0 and 100.'))
+        return rate
+
+    def clean_brackets(self):
+        """Parse the bracket lines into a sorted [[from, rate], ...] list."""
+        brackets = {}
+        for number, line in enumerate(self.cleaned_data['brackets'].splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                start, rate = (Decimal(part.strip()) for part in line.replace(';', ',').split(','))
+            except (ValueError, InvalidOperation):
+                raise forms.ValidationError(_('Line %(line)s: expected "amount, rate".') % {'line': number})
+            if start < 0 or not Decimal(0) <= rate <= Decimal(100):
+                raise forms.ValidationError(_('Line %(line)s: amount must be positive and rate between 0 and 100.') % {'line': number})
+            if start in brackets:
+                raise forms.ValidationError(_('Line %(line)s: duplicate bracket amount.') % {'line': number})
+            brackets[start] = rate
+        return [[str(start), str(rate)] for start, rate in sorted(brackets.items())]
+
+    def save(self, commit=True):
+        self.instance.tax_brackets = self.cleaned_data['brackets']
+        return super().save(commit)
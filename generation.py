@@ -0,0 +1,140 @@
+"""
+Batch generation of monthly draft payslips.
+
+Employees are walked in keyset order (by id) and each chunk is written with
+a single ``bulk_create`` inside its own transaction, so a run holds locks for
+one chunk at a time and everything committed before an interruption stays
+committed. Re-running a period only inserts payslips that are still missing,
+which makes the generator safe to resume.
+"""
+import calendar
+import time
+from datetime import date
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .calculation import price_payslips
+from .models import Payslip
+from .rulesets import hub_rules
+from .signals import payslips_changed
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def month_bounds(year, month):
+    """Return (first_day, last_day) of the given month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_period(value=None):
+    """Parse a ``YYYY-MM`` string into month bounds (defaults to the current month)."""
+    if not value:
+        today = timezone.now().date()
+        return month_bounds(today.year, today.month)
+    year, month = str(value).split('-')[:2]
+    return month_bounds(int(year), int(month))
+
+
+def active_hub_ids():
+    """Hubs that have at least one active employee."""
+    from apps.accounts.models import LocalUser
+    return list(
+        LocalUser.objects.filter(is_active=True, hub_id__isnull=False)
+        .values_list('hub_id', flat=True).distinct().order_by('hub_id')
+    )
+
+
+def iter_employee_batches(hub_id, batch_size=DEFAULT_BATCH_SIZE, after=None, until=None):
+    """Yield lists of ``(employee_id, name)`` for a hub, ``batch_size`` at a time (ids in ``(after, until]``)."""
+    from apps.accounts.models import LocalUser
+    qs = LocalUser.objects.filter(hub_id=hub_id, is_active=True).order_by('id')
+    if until is not None:
+        qs = qs.filter(id__lte=until)
+    while True:
+        page = qs.filter(id__gt=after) if after else qs
+        rows = list(page.values_list('id', 'name')[:batch_size])
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][0]
+
+
+def _previous_figures(hub_id, employee_ids, period_start):
+    """
+    Latest (gross, deductions, net) before ``period_start`` for each employee.
+
+    Only each employee's latest payslip is read: a correlated subquery per
+    employee, one seek on the (hub_id, employee_id, period_start) index,
+    however long the history.
+    """
+    from apps.accounts.models import LocalUser
+    latest = (
+        Payslip.objects.filter(hub_id=hub_id, employee_id=OuterRef('pk'), period_start__lt=period_start)
+        .order_by('-period_start', '-id').values('pk')[:1]
+    )
+    latest_ids = LocalUser.objects.filter(pk__in=employee_ids).annotate(latest=Subquery(latest)).values('latest')
+    rows = Payslip.objects.filter(pk__in=latest_ids).values_list('employee_id', 'gross_salary', 'deductions', 'net_salary')
+    return {employee_id: (gross, deductions, net) for employee_id, gross, deductions, net in rows}
+
+
+def generate_period(hub_id, period_start, period_end, batch_size=DEFAULT_BATCH_SIZE, after=None, until=None,
+                    run_id=None, on_chunk=None, refresh=True):
+    """
+    Create the draft payslips of one hub for one period.
+
+    Gross is carried forward from each employee's latest previous payslip;
+    deductions and net are priced with the hub's deduction rules when it has
+    any, and carried forward too otherwise.
+    Employees that already have a (non-deleted) payslip for the exact period
+    are skipped, so no (hub_id, employee_id, period) tuple is ever duplicated.
+    ``after``/``until`` restrict the run to an employee id range.
+
+    New payslips are linked to ``run_id``. ``on_chunk(last_employee_id,
+    created, skipped)`` is called inside each chunk's transaction, so a
+    checkpoint written there commits together with the chunk's payslips.
+    The month's derived data is refreshed at the end unless ``refresh`` is
+    False (run tasks leave that to ``run_payroll``, once per hub).
+    """
+    started = time.monotonic()
+    created = skipped = 0
+    rules = hub_rules(hub_id)
+    for employees in iter_employee_batches(hub_id, batch_size, after, until):
+        employee_ids = [employee_id for employee_id, _name in employees]
+        with transaction.atomic():
+            existing = set(
+                Payslip.objects.filter(
+                    hub_id=hub_id, employee_id__in=employee_ids,
+                    period_start=period_start, period_end=period_end,
+                ).values_list('employee_id', flat=True)
+            )
+            figures = _previous_figures(hub_id, employee_ids, period_start)
+            new = []
+            for employee_id, name in employees:
+                if employee_id in existing:
+                    continue
+                gross, deductions, net = figures.get(employee_id, (0, 0, 0))
+                new.append(Payslip(
+                    hub_id=hub_id, employee_id=employee_id, employee_name=name,
+                    period_start=period_start, period_end=period_end,
+                    gross_salary=gross, deductions=deductions, net_salary=net,
+                    status='draft', run_id=run_id,
+                ))
+            if rules:
+                price_payslips(new, rules)
+            Payslip.objects.bulk_create(new, batch_size=batch_size)
+            if on_chunk is not None:
+                on_chunk(employee_ids[-1], len(new), len(existing))
+        created += len(new)
+        skipped += len(existing)
+    if created and refresh:
+        payslips_changed(hub_id, [period_start])
+    elapsed = time.monotonic() - started
+    return {
+        'hub_id': str(hub_id),
+        'created': created,
+        'skipped': skipped,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(created / elapsed, 1) if elapsed else float(created),
+    }
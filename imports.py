@@ -0,0 +1,170 @@
+"""
+Streaming payslip import from CSV or XLSX.
+
+Rows are read one at a time (``csv`` reader / openpyxl read-only
+worksheets), validated with the ``PayslipForm`` field definitions plus its
+net = gross - deductions rule, and inserted with ``bulk_create`` in fixed
+size batches. Each batch refreshes the derived data of its months and
+employees in the transaction of its insert, so a row failing later in the
+file leaves no inserted payslips behind stale rollups. Rejected rows go to
+an optional error writer instead of being collected, so memory stays
+constant regardless of file size.
+"""
+import csv
+import io
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .calculation import price_payslips
+from .forms import PayslipForm, net_salary_error
+from .models import Payslip
+from .rulesets import hub_rules
+from .signals import payslips_changed
+from .year_to_date import counts_towards_ytd
+
+IMPORT_BATCH_SIZE = 1000
+# Errors kept in the returned result for display; the full report goes to ``error_writer``
+MAX_REPORTED_ERRORS = 100
+ROW_DEFAULTS = {'status': 'draft', 'deductions': '0'}
+# Left blank, these are computed instead of validated
+COMPUTED_FIELDS = {'net_salary'}
+# Left blank together (and the hub has deduction rules), these are priced by the calculation engine
+PRICED_FIELDS = ('deductions', 'net_salary')
+
+
+def _normalize_header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def iter_csv_rows(fileobj):
+    """Yield dicts from a CSV file object (binary or text); headers may be field names or labels."""
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    header = [_normalize_header(name) for name in next(reader, [])]
+    for row in reader:
+        yield dict(zip(header, row))
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield dicts from the first sheet of an XLSX file without loading it into memory."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(name) for name in next(rows, ())]
+        for row in rows:
+            if any(value not in (None, '') for value in row):
+                yield dict(zip(header, row))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    if str(filename).lower().endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_rows(fileobj)
+    return iter_csv_rows(fileobj)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+class PayslipRowValidator:
+    """
+    Validate raw rows with the PayslipForm fields, reusing one form's field instances.
+
+    With ``priced=True``, rows that leave both deductions and net blank come
+    back with both set to None, to be priced in batch by the caller.
+    """
+
+    def __init__(self, priced=False):
+        self.fields = PayslipForm().fields
+        self.priced = priced
+
+    def clean(self, row):
+        """Return ``(cleaned_data, errors)`` for one raw row."""
+        cleaned, errors = {}, {}
+        computed = COMPUTED_FIELDS
+        if self.priced and all(_is_blank(row.get(name)) for name in PRICED_FIELDS):
+            computed = COMPUTED_FIELDS | set(PRICED_FIELDS)
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if _is_blank(value):
+                if name in computed:
+                    cleaned[name] = None
+                    continue
+                value = ROW_DEFAULTS.get(name, '')
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+        if not errors and cleaned.get('deductions') is None:
+            return cleaned, errors
+        if not errors:
+            if cleaned.get('net_salary') is None:
+                cleaned['net_salary'] = cleaned['gross_salary'] - cleaned['deductions']
+            error = net_salary_error(cleaned)
+            if error:
+                errors['net_salary'] = [str(error)]
+        return cleaned, errors
+
+
+def import_payslips(rows, hub_id, batch_size=IMPORT_BATCH_SIZE, error_writer=None):
+    """
+    Validate and insert payslip rows for a hub.
+
+    ``error_writer`` (a ``csv.writer``) receives one ``[row, field, message]``
+    line per error. Row numbers are 1-based data rows (the header is row 0).
+    When the hub has deduction rules, rows without deductions and net are
+    priced a batch at a time by the calculation engine.
+    """
+    started = time.monotonic()
+    rules = hub_rules(hub_id)
+    validator = PayslipRowValidator(priced=rules is not None)
+    total = created = failed = 0
+    errors, batch, months, ytd_employees = [], [], set(), set()
+
+    def flush():
+        nonlocal created
+        if rules:
+            price_payslips([payslip for payslip in batch if payslip.deductions is None], rules)
+        with transaction.atomic():
+            Payslip.objects.bulk_create(batch)
+            payslips_changed(hub_id, months, ytd_employees)
+        created += len(batch)
+        batch.clear()
+        months.clear()
+        ytd_employees.clear()
+
+    for total, row in enumerate(rows, 1):
+        cleaned, row_errors = validator.clean(row)
+        if row_errors:
+            failed += 1
+            for field, messages in row_errors.items():
+                for message in messages:
+                    if error_writer is not None:
+                        error_writer.writerow([total, field, message])
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({'row': total, 'field': field, 'message': str(message)})
+            continue
+        batch.append(Payslip(hub_id=hub_id, **cleaned))
+        months.add(cleaned['period_start'].replace(day=1))
+        if counts_towards_ytd(cleaned.get('status')):
+            ytd_employees.add(cleaned['employee_id'])
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.monotonic() - started
+    return {
+        'total': total,
+        'created': created,
+        'failed': failed,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(total / elapsed, 1) if elapsed else float(total),
+    }
@@ -0,0 +1,158 @@
+"""
+Opt-in query and latency instrumentation for payroll views and AI tools.
+
+With ``PAYROLL_INSTRUMENTATION = True`` every ``@instrumented`` view and
+tool call records its SQL query count, database time, total time and the
+rows its queries reported. Views add them to the response as a
+``Server-Timing`` header. Every call is also logged as a
+``payroll.call`` line on the ``payroll.instrumentation`` logger, with the
+metrics attached as ``record.payroll_metrics``, and sent as the
+``call_measured`` signal.
+
+Queries are captured by an execute wrapper installed on every database
+connection. It reports to the calls active in the current context, so
+queries that an async view runs in ``sync_to_async`` threads are counted
+too. Row counts come from ``cursor.rowcount``: rows written everywhere,
+plus rows read on drivers that report them (psycopg does; sqlite3 does
+not for SELECTs).
+"""
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+
+logger = logging.getLogger('payroll.instrumentation')
+
+# Sent with ``name`` and ``metrics`` after every measured call
+call_measured = Signal()
+
+_active = ContextVar('payroll_active_measurements', default=())
+
+
+def enabled():
+    return getattr(settings, 'PAYROLL_INSTRUMENTATION', False)
+
+
+class CallMetrics:
+    """What one call cost: SQL queries, database time, rows and wall time (ms)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.db_ms = 0.0
+        self.rows = 0
+        self.total_ms = 0.0
+
+    def as_dict(self):
+        return {
+            'name': self.name, 'queries': self.queries, 'db_ms': round(self.db_ms, 3),
+            'total_ms': round(self.total_ms, 3), 'rows': self.rows,
+        }
+
+    def server_timing(self):
+        return f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", app;dur={self.total_ms:.1f}'
+
+
+def _record(execute, sql, params, many, context):
+    measurements = _active.get()
+    if not measurements:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        rowcount = getattr(context['cursor'], 'rowcount', -1) or 0
+        for metrics in measurements:
+            metrics.queries += 1
+            metrics.db_ms += elapsed
+            metrics.rows += max(rowcount, 0)
+
+
+def _install(connection):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+@receiver(connection_created, dispatch_uid='payroll_instrumentation_connection')
+def _connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+@contextmanager
+def measure(name):
+    """Collect the metrics of the enclosed block; nested measurements each see their queries."""
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+    metrics = CallMetrics(name)
+    token = _active.set(_active.get() + (metrics,))
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        _active.reset(token)
+        _report(metrics)
+
+
+def _report(metrics):
+    data = metrics.as_dict()
+    logger.info(
+        'payroll.call name=%s queries=%d db_ms=%.1f total_ms=%.1f rows=%d',
+        metrics.name, metrics.queries, metrics.db_ms, metrics.total_ms, metrics.rows,
+        extra={'payroll_metrics': data},
+    )
+    call_measured.send(sender=CallMetrics, name=metrics.name, metrics=data)
+
+
+def _add_server_timing(response, metrics):
+    if response is not None and hasattr(response, 'headers'):
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f'{existing}, {metrics.server_timing()}' if existing else metrics.server_timing()
+    return response
+
+
+def instrumented(view):
+    """Measure a (sync or async) view when instrumentation is on; adds ``Server-Timing``."""
+    name = f'payroll.{view.__name__}'
+
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not enabled():
+                return await view(request, *args, **kwargs)
+            with measure(name) as metrics:
+                response = await view(request, *args, **kwargs)
+            return _add_server_timing(response, metrics)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not enabled():
+            return view(request, *args, **kwargs)
+        with measure(name) as metrics:
+            response = view(request, *args, **kwargs)
+        return _add_server_timing(response, metrics)
+    return wrapper
+
+
+def instrument_tool(tool_class):
+    """Class decorator measuring ``AssistantTool.execute`` calls as ``payroll.tool.<name>``."""
+    execute = tool_class.execute
+
+    @functools.wraps(execute)
+    def wrapper(self, args, request):
+        if not enabled():
+            return execute(self, args, request)
+        with measure(f'payroll.tool.{self.name}'):
+            return execute(self, args, request)
+
+    tool_class.execute = wrapper
+    return tool_class
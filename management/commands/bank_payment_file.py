@@ -0,0 +1,57 @@
+"""Write the bank credit-transfer file of a month's confirmed payslips."""
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.generation import parse_period
+from payroll.payments import PAYMENT_FORMATS, PaymentError, PaymentFile
+
+
+class Command(BaseCommand):
+    help = 'Write a SEPA pain.001 or fixed-width transfer file for the confirmed payslips of a month.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write')
+        parser.add_argument('--hub', dest='hub_id', required=True, help='hub_id whose payslips are paid')
+        parser.add_argument('--period', help='Month to pay (YYYY-MM, default: current month)')
+        parser.add_argument('--format', dest='fmt', choices=PAYMENT_FORMATS, default='sepa')
+        parser.add_argument('--execution-date', help='Requested execution date (YYYY-MM-DD, default: today)')
+        parser.add_argument('--mark-paid', action='store_true', help='Mark the included payslips paid once the file is written')
+
+    def handle(self, *args, **options):
+        try:
+            hub_id = uuid.UUID(options['hub_id'])
+            period_start = parse_period(options['period'])[0]
+            execution_date = (
+                datetime.strptime(options['execution_date'], '%Y-%m-%d').date() if options['execution_date'] else None
+            )
+            payment_file = PaymentFile(hub_id, period_start, options['fmt'], execution_date=execution_date)
+            self.write(payment_file, options['output'], options['mark_paid'])
+        except (ValueError, PaymentError) as exc:
+            raise CommandError(str(exc))
+        summary = payment_file.summary()
+        self.stdout.write(
+            f"{summary['period']} ({summary['format']}): {summary['transfers']} transfer(s), total {summary['total']}, "
+            f"{summary['missing_accounts']} payslip(s) without a bank account"
+        )
+        if summary['marked']:
+            self.stdout.write(f"{summary['marked']['moved']} payslip(s) marked paid")
+        self.stdout.write(self.style.SUCCESS(f"Payment file written to {options['output']}."))
+
+    def write(self, payment_file, output, mark_paid):
+        """Write to a temporary file next to ``output`` and rename it only once the file is complete."""
+        directory = os.path.dirname(os.path.abspath(output))
+        fileobj = tempfile.NamedTemporaryFile('wb', dir=directory, prefix='.payroll-', suffix='.tmp', delete=False)
+        try:
+            with fileobj:
+                for chunk in payment_file.iter_file():
+                    fileobj.write(chunk)
+            if mark_paid:
+                payment_file.mark_paid()
+            os.replace(fileobj.name, output)
+        except BaseException:
+            os.remove(fileobj.name)
+            raise
@@ -0,0 +1,36 @@
+"""Import payslips from a CSV or XLSX file."""
+import csv
+import sys
+
+from django.core.management.base import BaseCommand
+
+from payroll.imports import IMPORT_BATCH_SIZE, import_payslips, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV/XLSX file of payslips into a hub, writing rejected rows to an error report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file')
+        parser.add_argument('--hub', dest='hub_id', required=True, help='Hub the payslips belong to')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--errors', dest='errors_path', help='Write the per-row error report (CSV) here instead of stderr')
+
+    def handle(self, *args, **options):
+        errors_file = open(options['errors_path'], 'w', newline='') if options['errors_path'] else sys.stderr
+        try:
+            error_writer = csv.writer(errors_file)
+            error_writer.writerow(['row', 'field', 'message'])
+            with open(options['path'], 'rb') as fileobj:
+                result = import_payslips(
+                    iter_rows(fileobj, options['path']), options['hub_id'],
+                    batch_size=options['batch_size'], error_writer=error_writer,
+                )
+        finally:
+            if errors_file is not sys.stderr:
+                errors_file.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} of {result['total']} rows "
+            f"({result['failed']} rejected) in {result['elapsed_seconds']}s "
+            f"({result['rows_per_second']} rows/s)."
+        ))
@@ -0,0 +1,24 @@
+"""Rebuild the per-month payroll rollups and the year-to-date accumulators from payslips."""
+from django.core.management.base import BaseCommand
+
+from payroll.models import Payslip
+from payroll.rollups import rebuild_rollups
+from payroll.year_to_date import rebuild_year_to_date
+
+
+class Command(BaseCommand):
+    help = 'Recompute payroll period rollups and employee year-to-date figures for one hub or for every hub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', help='Only rebuild this hub_id')
+
+    def handle(self, *args, **options):
+        if options['hub_id']:
+            hub_ids = [options['hub_id']]
+        else:
+            hub_ids = Payslip.all_objects.filter(hub_id__isnull=False).values_list('hub_id', flat=True).distinct().order_by()
+        for hub_id in hub_ids:
+            months = rebuild_rollups(hub_id)
+            years = rebuild_year_to_date(hub_id)
+            self.stdout.write(f'{hub_id}: {months} month(s), {years} employee year(s) rebuilt')
+        self.stdout.write(self.style.SUCCESS('Payroll rollups rebuilt.'))
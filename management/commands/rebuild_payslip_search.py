@@ -0,0 +1,15 @@
+"""Repopulate the SQLite payslip search table."""
+from django.core.management.base import BaseCommand
+
+from payroll.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the payslip FTS5 search table from the payslips (SQLite only).'
+
+    def handle(self, *args, **options):
+        if search_backend() != 'fts5':
+            self.stdout.write('No FTS5 search table on this database; nothing to rebuild.')
+            return
+        rows = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Payslip search index rebuilt ({rows} rows).'))
@@ -0,0 +1,35 @@
+"""Pre-render the payslip documents of a month into the document cache."""
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.documents import FORMATS, RENDER_CHUNK_SIZE, pdf_available, render_period
+from payroll.generation import parse_period
+
+
+class Command(BaseCommand):
+    help = 'Render every payslip document of a month that is not cached yet, optionally in worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', required=True, help='hub_id whose payslips are rendered')
+        parser.add_argument('--period', help='Month to render (YYYY-MM, default: current month)')
+        parser.add_argument('--format', dest='fmt', choices=FORMATS, help='Document format (default: pdf when WeasyPrint is installed, else html)')
+        parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 renders in this process)')
+        parser.add_argument('--chunk-size', type=int, default=RENDER_CHUNK_SIZE, help='Payslips per worker task')
+
+    def handle(self, *args, **options):
+        try:
+            hub_id = uuid.UUID(options['hub_id'])
+            period_start = parse_period(options['period'])[0]
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['fmt'] == 'pdf' and not pdf_available():
+            raise CommandError('PDF documents need WeasyPrint (pip install weasyprint)')
+        result = render_period(
+            hub_id, period_start, fmt=options['fmt'], workers=options['workers'], chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(
+            f"{result['period']} ({result['format']}): {result['rendered']} rendered, {result['cached']} cached, "
+            f"{result['failed']} failed of {result['total']} in {result['elapsed_seconds']}s"
+        )
+        self.stdout.write(self.style.SUCCESS('Payslip documents rendered.'))
@@ -0,0 +1,33 @@
+"""Generate a payroll period for every hub with a process pool."""
+from django.core.management.base import BaseCommand
+
+from payroll.generation import DEFAULT_BATCH_SIZE, parse_period
+from payroll.runs import DEFAULT_RANGE_SIZE, run_payroll
+
+
+class Command(BaseCommand):
+    help = 'Generate draft payslips for a period across hubs, in parallel worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Month to generate (YYYY-MM, default: current month)')
+        parser.add_argument('--hub', dest='hub_ids', action='append', help='Only this hub_id (repeatable)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: PAYROLL_RUN_WORKERS, 0 = in process)')
+        parser.add_argument('--range-size', type=int, default=DEFAULT_RANGE_SIZE, help='Split hubs with more employees than this')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        period_start, period_end = parse_period(options['period'])
+        result = run_payroll(
+            period_start, period_end, hub_ids=options['hub_ids'], workers=options['workers'],
+            range_size=options['range_size'], batch_size=options['batch_size'],
+        )
+        for hub_id in result['locked']:
+            self.stderr.write(f'{hub_id}: skipped, another run holds its lock')
+        for run_id in result['resumed']:
+            self.stdout.write(f'Resumed interrupted run {run_id}')
+        self.stdout.write(
+            f"{result['period']}: {result['hubs']} hub(s), {result['tasks']} task(s), {result['created']} created, "
+            f"{result['skipped']} skipped, {result['failed']} failed in {result['elapsed_seconds']}s"
+        )
+        style = self.style.ERROR if result['failed'] else self.style.SUCCESS
+        self.stdout.write(style('Payroll run finished.'))
@@ -0,0 +1,40 @@
+"""Seed a hub with deterministic demo or load-test payslips."""
+import uuid
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.factories import DEFAULT_BATCH_SIZE, DEFAULT_PERIODS, DEFAULT_START, seed_payslips
+
+
+class Command(BaseCommand):
+    help = 'Create employees with one payslip per month, drawn deterministically from a seed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', help='hub_id to seed (default: a new random hub)')
+        parser.add_argument('--employees', type=int, help='Employees to create (default: payslips / periods, or 100)')
+        parser.add_argument('--periods', type=int, default=DEFAULT_PERIODS, help='Consecutive months per employee')
+        parser.add_argument('--payslips', type=int, help='Stop after this many payslips')
+        parser.add_argument('--start', default=DEFAULT_START.strftime('%Y-%m'), help='First month (YYYY-MM)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--no-users', action='store_true', help='Only create payslips, not LocalUser employees')
+        parser.add_argument('--no-copy', action='store_true', help='Insert with executemany instead of COPY on PostgreSQL')
+
+    def handle(self, *args, **options):
+        try:
+            hub_id = uuid.UUID(options['hub_id']) if options['hub_id'] else uuid.uuid4()
+            start = datetime.strptime(options['start'], '%Y-%m').date()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        result = seed_payslips(
+            hub_id, employees=options['employees'], periods=options['periods'], payslips=options['payslips'],
+            seed=options['seed'], start=start, batch_size=options['batch_size'],
+            with_users=not options['no_users'], use_copy=False if options['no_copy'] else None,
+        )
+        self.stdout.write(
+            f"{result['hub_id']}: {result['employees']} employee(s), {result['payslips']} payslip(s) "
+            f"over {result['periods']} month(s) with {result['method']} in {result['elapsed_seconds']}s "
+            f"({result['rows_per_second']} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS('Seeding finished.'))
@@ -0,0 +1,22 @@
+"""Freeze a closed payroll month into a columnar snapshot file."""
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.generation import parse_period
+from payroll.snapshots import SnapshotError, write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the columnar analytics snapshot of a closed payroll month.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', dest='hub_id', required=True, help='hub_id to snapshot')
+        parser.add_argument('--period', help='Month to snapshot (YYYY-MM, default: current month)')
+        parser.add_argument('--force', action='store_true', help='Snapshot even if draft/confirmed payslips remain')
+
+    def handle(self, *args, **options):
+        try:
+            period_start, _period_end = parse_period(options['period'])
+            path = write_snapshot(options['hub_id'], period_start, force=options['force'])
+        except (ValueError, SnapshotError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Snapshot written to {path}'))
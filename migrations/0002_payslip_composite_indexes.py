@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'status'], name='payroll_ps_hub_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'period_start', 'period_end'], name='payroll_ps_hub_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'employee_id', 'period_start'], name='payroll_ps_hub_emp_idx'),
+        ),
+    ]
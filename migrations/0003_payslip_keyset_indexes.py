@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0002_payslip_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payslip',
+            name='payroll_ps_hub_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'status', 'id'], name='payroll_ps_hub_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'net_salary', 'id'], name='payroll_ps_hub_net_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'deductions', 'id'], name='payroll_ps_hub_ded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'gross_salary', 'id'], name='payroll_ps_hub_gross_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'employee_name', 'id'], name='payroll_ps_hub_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='payroll_ps_hub_created_idx'),
+        ),
+    ]
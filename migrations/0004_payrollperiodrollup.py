@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_rollups(apps, schema_editor):
+    Payslip = apps.get_model('payroll', 'Payslip')
+    PayrollPeriodRollup = apps.get_model('payroll', 'PayrollPeriodRollup')
+    rows = (
+        Payslip.objects.filter(is_deleted=False, hub_id__isnull=False)
+        .order_by().annotate(month=TruncMonth('period_start'))
+        .values('hub_id', 'month', 'status')
+        .annotate(count=Count('id'), gross=Sum('gross_salary'), deductions=Sum('deductions'), net=Sum('net_salary'))
+    )
+    PayrollPeriodRollup.objects.bulk_create(
+        (
+            PayrollPeriodRollup(
+                hub_id=row['hub_id'], period=row['month'], status=row['status'],
+                payslip_count=row['count'], gross_total=row['gross'] or 0,
+                deductions_total=row['deductions'] or 0, net_total=row['net'] or 0,
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0003_payslip_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(verbose_name='Hub Id')),
+                ('period', models.DateField(help_text='First day of the month', verbose_name='Period')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('confirmed', 'Confirmed'), ('paid', 'Paid'), ('cancelled', 'Cancelled')], max_length=20, verbose_name='Status')),
+                ('payslip_count', models.PositiveIntegerField(default=0, verbose_name='Payslips')),
+                ('gross_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Gross Total')),
+                ('deductions_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Deductions Total')),
+                ('net_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Net Total')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'payroll_period_rollup',
+                'constraints': [models.UniqueConstraint(fields=('hub_id', 'period', 'status'), name='payroll_rollup_hub_period_status_uniq')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
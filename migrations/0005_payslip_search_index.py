@@ -0,0 +1,70 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE payroll_payslip_fts USING fts5("
+    "payslip_id UNINDEXED, employee_name, status, notes, tokenize='trigram')",
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    "SELECT rowid, id, employee_name, status, notes FROM payroll_payslip",
+    "CREATE TRIGGER payroll_payslip_fts_ai AFTER INSERT ON payroll_payslip BEGIN "
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    "VALUES (new.rowid, new.id, new.employee_name, new.status, new.notes); END",
+    "CREATE TRIGGER payroll_payslip_fts_ad AFTER DELETE ON payroll_payslip BEGIN "
+    "DELETE FROM payroll_payslip_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER payroll_payslip_fts_au AFTER UPDATE OF employee_name, status, notes ON payroll_payslip BEGIN "
+    "UPDATE payroll_payslip_fts SET employee_name = new.employee_name, status = new.status, notes = new.notes "
+    "WHERE rowid = new.rowid; END",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_ai",
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_ad",
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_au",
+    "DROP TABLE IF EXISTS payroll_payslip_fts",
+]
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS payroll_ps_search_trgm_idx ON payroll_payslip "
+    "USING gin ((employee_name || ' ' || status || ' ' || notes) gin_trgm_ops) WHERE NOT is_deleted",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS payroll_ps_search_trgm_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            _run(schema_editor, SQLITE_FORWARD[:1])
+        except OperationalError:
+            # SQLite built without FTS5 or the trigram tokenizer (< 3.34): keep the icontains search
+            return
+        _run(schema_editor, SQLITE_FORWARD[1:])
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0004_payrollperiodrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
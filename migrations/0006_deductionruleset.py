@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0005_payslip_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeductionRuleSet',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('tax_brackets', models.JSONField(blank=True, default=list, help_text='List of [monthly amount from which the bracket applies, rate %]', verbose_name='Tax Brackets')),
+                ('social_security_rate', models.DecimalField(decimal_places=2, default='0', max_digits=5, verbose_name='Social Security Rate (%)')),
+                ('social_security_cap', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Social Security Cap')),
+                ('fixed_deductions', models.DecimalField(decimal_places=2, default='0', max_digits=12, verbose_name='Fixed Deductions')),
+            ],
+            options={
+                'db_table': 'payroll_deduction_rule_set',
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('hub_id',), name='payroll_ruleset_hub_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:20
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0006_deductionruleset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('period_start', models.DateField(verbose_name='Period Start')),
+                ('period_end', models.DateField(verbose_name='Period End')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('tasks_total', models.PositiveIntegerField(default=0, verbose_name='Tasks')),
+                ('tasks_done', models.PositiveIntegerField(default=0, verbose_name='Tasks Done')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Payslips Created')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Payslips Skipped')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+            options={
+                'db_table': 'payroll_run',
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('hub_id', 'period_start'), name='payroll_run_hub_period_uniq')],
+            },
+        ),
+    ]
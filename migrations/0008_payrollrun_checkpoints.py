@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0007_payrollrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollrun',
+            name='employees_total',
+            field=models.PositiveIntegerField(default=0, verbose_name='Employees'),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payslips', to='payroll.payrollrun', verbose_name='Payroll Run'),
+        ),
+        migrations.CreateModel(
+            name='PayrollRunTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('after', models.UUIDField(blank=True, null=True, verbose_name='After Employee')),
+                ('until', models.UUIDField(blank=True, null=True, verbose_name='Until Employee')),
+                ('checkpoint_employee_id', models.UUIDField(blank=True, help_text='Last employee whose payslip chunk was committed', null=True, verbose_name='Checkpoint')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Payslips Created')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Payslips Skipped')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='payroll.payrollrun', verbose_name='Payroll Run')),
+            ],
+            options={
+                'db_table': 'payroll_run_task',
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import ExtractYear
+
+
+def build_year_to_date(apps, schema_editor):
+    Payslip = apps.get_model('payroll', 'Payslip')
+    EmployeeYearToDate = apps.get_model('payroll', 'EmployeeYearToDate')
+    rows = (
+        Payslip.objects.filter(is_deleted=False, hub_id__isnull=False, status__in=['confirmed', 'paid'])
+        .order_by().annotate(year=ExtractYear('period_start'))
+        .values('hub_id', 'employee_id', 'year')
+        .annotate(
+            count=Count('id'), gross=Sum('gross_salary'), deductions=Sum('deductions'), net=Sum('net_salary'),
+            paid=Sum('net_salary', filter=Q(status='paid')), last_period=Max('period_start'),
+        )
+    )
+    EmployeeYearToDate.objects.bulk_create(
+        (
+            EmployeeYearToDate(
+                hub_id=row['hub_id'], employee_id=row['employee_id'], tax_year=row['year'],
+                payslip_count=row['count'], gross_total=row['gross'] or 0, deductions_total=row['deductions'] or 0,
+                net_total=row['net'] or 0, paid_total=row['paid'] or 0, last_period=row['last_period'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0008_payrollrun_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeYearToDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(verbose_name='Hub Id')),
+                ('employee_id', models.UUIDField(verbose_name='Employee Id')),
+                ('tax_year', models.PositiveSmallIntegerField(verbose_name='Tax Year')),
+                ('payslip_count', models.PositiveIntegerField(default=0, verbose_name='Payslips')),
+                ('gross_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Gross Total')),
+                ('deductions_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Deductions Total')),
+                ('net_total', models.DecimalField(decimal_places=2, default='0', max_digits=16, verbose_name='Net Total')),
+                ('paid_total', models.DecimalField(decimal_places=2, default='0', help_text='Net salary of the paid payslips', max_digits=16, verbose_name='Paid Total')),
+                ('last_period', models.DateField(blank=True, null=True, verbose_name='Last Period')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'payroll_employee_ytd',
+                'indexes': [models.Index(fields=['hub_id', 'tax_year'], name='payroll_ytd_hub_year_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hub_id', 'employee_id', 'tax_year'), name='payroll_ytd_hub_emp_year_uniq')],
+            },
+        ),
+        migrations.RunPython(build_year_to_date, migrations.RunPython.noop),
+    ]
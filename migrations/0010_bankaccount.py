@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:20
+
+import payroll.models
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0009_employeeyeartodate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankAccount',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('employee_id', models.UUIDField(blank=True, help_text='Leave empty for the account salaries are paid from', null=True, verbose_name='Employee Id')),
+                ('holder_name', models.CharField(max_length=70, verbose_name='Account Holder')),
+                ('iban', models.CharField(max_length=34, validators=[payroll.models.validate_iban], verbose_name='IBAN')),
+                ('bic', models.CharField(blank=True, max_length=11, verbose_name='BIC')),
+            ],
+            options={
+                'db_table': 'payroll_bank_account',
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(condition=models.Q(('employee_id__isnull', False), ('is_deleted', False)), fields=('hub_id', 'employee_id'), name='payroll_bank_hub_emp_uniq'), models.UniqueConstraint(condition=models.Q(('employee_id__isnull', True), ('is_deleted', False)), fields=('hub_id',), name='payroll_bank_hub_debtor_uniq')],
+            },
+        ),
+    ]
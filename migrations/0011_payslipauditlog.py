@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0010_bankaccount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayslipAuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(verbose_name='Hub Id')),
+                ('payslip_id', models.UUIDField(verbose_name='Payslip Id')),
+                ('action', models.CharField(choices=[('update', 'Update'), ('confirm', 'Confirm'), ('pay', 'Pay'), ('cancel', 'Cancel'), ('delete', 'Delete')], max_length=20, verbose_name='Action')),
+                ('changes', models.JSONField(default=dict, verbose_name='Changes')),
+                ('actor_id', models.UUIDField(blank=True, null=True, verbose_name='User Id')),
+                ('actor_name', models.CharField(blank=True, max_length=255, verbose_name='User')),
+                ('source', models.CharField(blank=True, help_text='View, AI tool or command', max_length=100, verbose_name='Source')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created At')),
+            ],
+            options={
+                'db_table': 'payroll_payslip_audit',
+                'indexes': [models.Index(fields=['hub_id', 'created_at'], name='payroll_audit_hub_time_idx'), models.Index(fields=['payslip_id', 'created_at'], name='payroll_audit_payslip_idx')],
+            },
+        ),
+    ]
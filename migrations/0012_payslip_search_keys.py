@@ -0,0 +1,77 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:10
+
+from django.db import migrations
+
+# SQLite only: FTS rows were keyed by the rowid of payroll_payslip, which a
+# VACUUM renumbers. They now get their rowid from a key table whose INTEGER
+# PRIMARY KEY survives VACUUM, and the triggers find them by payslip id.
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_ai",
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_ad",
+    "DROP TRIGGER IF EXISTS payroll_payslip_fts_au",
+]
+FTS_KEY = "(SELECT id FROM payroll_payslip_fts_keys WHERE payslip_id = {}.id)"
+FORWARD = DROP_TRIGGERS + [
+    "CREATE TABLE payroll_payslip_fts_keys (id INTEGER PRIMARY KEY, payslip_id char(32) NOT NULL UNIQUE)",
+    "INSERT INTO payroll_payslip_fts_keys (payslip_id) SELECT id FROM payroll_payslip",
+    "DELETE FROM payroll_payslip_fts",
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    "SELECT k.id, p.id, p.employee_name, p.status, p.notes "
+    "FROM payroll_payslip p JOIN payroll_payslip_fts_keys k ON k.payslip_id = p.id",
+    "CREATE TRIGGER payroll_payslip_fts_ai AFTER INSERT ON payroll_payslip BEGIN "
+    "INSERT INTO payroll_payslip_fts_keys (payslip_id) VALUES (new.id); "
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    f"VALUES ({FTS_KEY.format('new')}, new.id, new.employee_name, new.status, new.notes); END",
+    "CREATE TRIGGER payroll_payslip_fts_ad AFTER DELETE ON payroll_payslip BEGIN "
+    f"DELETE FROM payroll_payslip_fts WHERE rowid = {FTS_KEY.format('old')}; "
+    "DELETE FROM payroll_payslip_fts_keys WHERE payslip_id = old.id; END",
+    "CREATE TRIGGER payroll_payslip_fts_au AFTER UPDATE OF employee_name, status, notes ON payroll_payslip BEGIN "
+    "UPDATE payroll_payslip_fts SET employee_name = new.employee_name, status = new.status, notes = new.notes "
+    f"WHERE rowid = {FTS_KEY.format('new')}; END",
+]
+BACKWARD = DROP_TRIGGERS + [
+    "DROP TABLE IF EXISTS payroll_payslip_fts_keys",
+    "DELETE FROM payroll_payslip_fts",
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    "SELECT rowid, id, employee_name, status, notes FROM payroll_payslip",
+    "CREATE TRIGGER payroll_payslip_fts_ai AFTER INSERT ON payroll_payslip BEGIN "
+    "INSERT INTO payroll_payslip_fts (rowid, payslip_id, employee_name, status, notes) "
+    "VALUES (new.rowid, new.id, new.employee_name, new.status, new.notes); END",
+    "CREATE TRIGGER payroll_payslip_fts_ad AFTER DELETE ON payroll_payslip BEGIN "
+    "DELETE FROM payroll_payslip_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER payroll_payslip_fts_au AFTER UPDATE OF employee_name, status, notes ON payroll_payslip BEGIN "
+    "UPDATE payroll_payslip_fts SET employee_name = new.employee_name, status = new.status, notes = new.notes "
+    "WHERE rowid = new.rowid; END",
+]
+
+
+def _has_fts_table(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payroll_payslip_fts'")
+        return cursor.fetchone() is not None
+
+
+def _run(schema_editor, statements):
+    if schema_editor.connection.vendor != 'sqlite' or not _has_fts_table(schema_editor):
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def key_search_rows(apps, schema_editor):
+    _run(schema_editor, FORWARD)
+
+
+def unkey_search_rows(apps, schema_editor):
+    _run(schema_editor, BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0011_payslipauditlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_rows, unkey_search_rows),
+    ]
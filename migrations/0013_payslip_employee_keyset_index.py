@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0012_payslip_search_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'employee_id', 'id'], name='payroll_ps_hub_empid_idx'),
+        ),
+    ]
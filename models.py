@@ -1,4 +1,7 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from apps.core.models.base import HubBaseModel
@@ -10,6 +13,21 @@ PAYSLIP_STATUS = [
     ('cancelled', _('Cancelled')),
 ]
 
+AUDIT_ACTIONS = [
+    ('update', _('Update')),
+    ('confirm', _('Confirm')),
+    ('pay', _('Pay')),
+    ('cancel', _('Cancel')),
+    ('delete', _('Delete')),
+]
+
+RUN_STATUS = [
+    ('pending', _('Pending')),
+    ('running', _('Running')),
+    ('completed', _('Completed')),
+    ('failed', _('Failed')),
+]
+
 class Payslip(HubBaseModel):
     employee_id = models.UUIDField(db_index=True, verbose_name=_('Employee Id'))
     employee_name = models.CharField(max_length=255, verbose_name=_('Employee Name'))
@@ -21,10 +39,267 @@ class Payslip(HubBaseModel):
     status = models.CharField(max_length=20, default='draft', choices=PAYSLIP_STATUS, verbose_name=_('Status'))
     paid_date = models.DateField(null=True, blank=True, verbose_name=_('Paid Date'))
     notes = models.TextField(blank=True, verbose_name=_('Notes'))
+    run = models.ForeignKey(
+        'PayrollRun', null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='payslips', verbose_name=_('Payroll Run'),
+    )
 
     class Meta(HubBaseModel.Meta):
         db_table = 'payroll_payslip'
+        indexes = [
+            models.Index(fields=['hub_id', 'status', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_status_idx'),
+            models.Index(fields=['hub_id', 'period_start', 'period_end'], condition=Q(is_deleted=False), name='payroll_ps_hub_period_idx'),
+            models.Index(fields=['hub_id', 'employee_id', 'period_start'], condition=Q(is_deleted=False), name='payroll_ps_hub_emp_idx'),
+            # Keyset pagination: one (hub_id, sort field, id) index per sortable column
+            models.Index(fields=['hub_id', 'net_salary', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_net_idx'),
+            models.Index(fields=['hub_id', 'deductions', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_ded_idx'),
+            models.Index(fields=['hub_id', 'gross_salary', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_gross_idx'),
+            models.Index(fields=['hub_id', 'employee_id', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_empid_idx'),
+            models.Index(fields=['hub_id', 'employee_name', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_name_idx'),
+            models.Index(fields=['hub_id', 'created_at', 'id'], condition=Q(is_deleted=False), name='payroll_ps_hub_created_idx'),
+        ]
 
     def __str__(self):
         return str(self.id)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored period so rollups can refresh the month it moved out of
+        instance._loaded_period_start = instance.__dict__.get('period_start')
+        # ... and the employee and status whose year-to-date figures it left
+        instance._loaded_employee_id = instance.__dict__.get('employee_id')
+        instance._loaded_status = instance.__dict__.get('status')
+        # ... and every loaded field, for the audit log's field-level changes
+        instance._loaded_values = {
+            field.attname: instance.__dict__[field.attname]
+            for field in cls._meta.concrete_fields if field.attname in instance.__dict__
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save refreshes the derived rows; commit them together with the payslip
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            return super().delete(*args, **kwargs)
+
+
+class PayrollPeriodRollup(models.Model):
+    """Payslip totals of one hub for one month and status, maintained from Payslip writes."""
+    hub_id = models.UUIDField(verbose_name=_('Hub Id'))
+    period = models.DateField(verbose_name=_('Period'), help_text=_('First day of the month'))
+    status = models.CharField(max_length=20, choices=PAYSLIP_STATUS, verbose_name=_('Status'))
+    payslip_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips'))
+    gross_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Gross Total'))
+    deductions_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Deductions Total'))
+    net_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Net Total'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'payroll_period_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'period', 'status'], name='payroll_rollup_hub_period_status_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.hub_id} {self.period:%Y-%m} {self.status}'
+
+
+class EmployeeYearToDate(models.Model):
+    """Confirmed and paid payslip totals of one employee for one tax year, maintained from Payslip writes."""
+    hub_id = models.UUIDField(verbose_name=_('Hub Id'))
+    employee_id = models.UUIDField(verbose_name=_('Employee Id'))
+    tax_year = models.PositiveSmallIntegerField(verbose_name=_('Tax Year'))
+    payslip_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips'))
+    gross_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Gross Total'))
+    deductions_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Deductions Total'))
+    net_total = models.DecimalField(max_digits=16, decimal_places=2, default='0', verbose_name=_('Net Total'))
+    paid_total = models.DecimalField(
+        max_digits=16, decimal_places=2, default='0', verbose_name=_('Paid Total'),
+        help_text=_('Net salary of the paid payslips'),
+    )
+    last_period = models.DateField(null=True, blank=True, verbose_name=_('Last Period'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'payroll_employee_ytd'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'employee_id', 'tax_year'], name='payroll_ytd_hub_emp_year_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['hub_id', 'tax_year'], name='payroll_ytd_hub_year_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.hub_id} {self.employee_id} {self.tax_year}'
+
+
+class DeductionRuleSet(HubBaseModel):
+    """Deduction rules of a hub, edited in settings and compiled by ``rulesets.hub_rules``."""
+    tax_brackets = models.JSONField(
+        default=list, blank=True, verbose_name=_('Tax Brackets'),
+        help_text=_('List of [monthly amount from which the bracket applies, rate %]'),
+    )
+    social_security_rate = models.DecimalField(max_digits=5, decimal_places=2, default='0', verbose_name=_('Social Security Rate (%)'))
+    social_security_cap = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, verbose_name=_('Social Security Cap'))
+    fixed_deductions = models.DecimalField(max_digits=12, decimal_places=2, default='0', verbose_name=_('Fixed Deductions'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'payroll_deduction_rule_set'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id'], condition=Q(is_deleted=False), name='payroll_ruleset_hub_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.hub_id} deduction rules'
+
+    def as_config(self):
+        """The rules in the ``DeductionRules.from_config`` format."""
+        return {
+            'tax_brackets': self.tax_brackets,
+            'social_security_rate': self.social_security_rate,
+            'social_security_cap': self.social_security_cap,
+            'fixed_deductions': [self.fixed_deductions],
+        }
+
+
+class AuditLogQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError('Payslip audit log entries cannot be changed.')
+
+    def delete(self):
+        raise TypeError('Payslip audit log entries cannot be deleted.')
+
+
+class PayslipAuditLog(models.Model):
+    """
+    Append-only record of one change to one payslip: ``changes`` maps each
+    changed field to ``[old, new]``. Written by ``audit.py`` in the
+    transaction of the change.
+    """
+    hub_id = models.UUIDField(verbose_name=_('Hub Id'))
+    payslip_id = models.UUIDField(verbose_name=_('Payslip Id'))
+    action = models.CharField(max_length=20, choices=AUDIT_ACTIONS, verbose_name=_('Action'))
+    changes = models.JSONField(default=dict, verbose_name=_('Changes'))
+    actor_id = models.UUIDField(null=True, blank=True, verbose_name=_('User Id'))
+    actor_name = models.CharField(max_length=255, blank=True, verbose_name=_('User'))
+    source = models.CharField(max_length=100, blank=True, verbose_name=_('Source'), help_text=_('View, AI tool or command'))
+    created_at = models.DateTimeField(default=timezone.now, verbose_name=_('Created At'))
+
+    objects = AuditLogQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'payroll_payslip_audit'
+        indexes = [
+            models.Index(fields=['hub_id', 'created_at'], name='payroll_audit_hub_time_idx'),
+            models.Index(fields=['payslip_id', 'created_at'], name='payroll_audit_payslip_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.payslip_id} {self.action} {self.created_at:%Y-%m-%d %H:%M:%S}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError('Payslip audit log entries cannot be changed.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('Payslip audit log entries cannot be deleted.')
+
+
+def validate_iban(value):
+    """ISO 13616 check: country code, check digits and the mod-97 checksum."""
+    iban = ''.join(str(value).split()).upper()
+    if not (15 <= len(iban) <= 34 and iban[:2].isalpha() and iban[2:4].isdigit() and iban.isalnum()):
+        raise ValidationError(_('Enter a valid IBAN.'), code='invalid')
+    if int(''.join(str(int(char, 36)) for char in iban[4:] + iban[:4])) % 97 != 1:
+        raise ValidationError(_('The IBAN check digits are wrong.'), code='invalid')
+
+
+class BankAccount(HubBaseModel):
+    """
+    Bank account that payroll transfers are paid to (an employee's) or from
+    (the hub's own, ``employee_id`` left empty).
+    """
+    employee_id = models.UUIDField(
+        null=True, blank=True, verbose_name=_('Employee Id'),
+        help_text=_('Leave empty for the account salaries are paid from'),
+    )
+    holder_name = models.CharField(max_length=70, verbose_name=_('Account Holder'))
+    iban = models.CharField(max_length=34, validators=[validate_iban], verbose_name=_('IBAN'))
+    bic = models.CharField(max_length=11, blank=True, verbose_name=_('BIC'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'payroll_bank_account'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hub_id', 'employee_id'], condition=Q(is_deleted=False, employee_id__isnull=False),
+                name='payroll_bank_hub_emp_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['hub_id'], condition=Q(is_deleted=False, employee_id__isnull=True),
+                name='payroll_bank_hub_debtor_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.holder_name} {self.iban}'
+
+    def save(self, *args, **kwargs):
+        self.iban = ''.join(self.iban.split()).upper()
+        self.bic = self.bic.strip().upper()
+        super().save(*args, **kwargs)
+
+
+class PayrollRun(HubBaseModel):
+    """
+    Generation of one hub's payslips for one period.
+
+    The work is split into ``PayrollRunTask`` employee ranges; each keeps its
+    own checkpoint and counts, which the run aggregates when it finishes.
+    """
+    period_start = models.DateField(verbose_name=_('Period Start'))
+    period_end = models.DateField(verbose_name=_('Period End'))
+    status = models.CharField(max_length=20, default='pending', choices=RUN_STATUS, verbose_name=_('Status'))
+    tasks_total = models.PositiveIntegerField(default=0, verbose_name=_('Tasks'))
+    tasks_done = models.PositiveIntegerField(default=0, verbose_name=_('Tasks Done'))
+    employees_total = models.PositiveIntegerField(default=0, verbose_name=_('Employees'))
+    created_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips Created'))
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips Skipped'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'payroll_run'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'period_start'], condition=Q(is_deleted=False), name='payroll_run_hub_period_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.hub_id} {self.period_start:%Y-%m} {self.status}'
+
+
+class PayrollRunTask(models.Model):
+    """One employee id range ``(after, until]`` of a run, with its resume checkpoint."""
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='tasks', verbose_name=_('Payroll Run'))
+    after = models.UUIDField(null=True, blank=True, verbose_name=_('After Employee'))
+    until = models.UUIDField(null=True, blank=True, verbose_name=_('Until Employee'))
+    checkpoint_employee_id = models.UUIDField(
+        null=True, blank=True, verbose_name=_('Checkpoint'),
+        help_text=_('Last employee whose payslip chunk was committed'),
+    )
+    status = models.CharField(max_length=20, default='pending', choices=RUN_STATUS, verbose_name=_('Status'))
+    created_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips Created'))
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name=_('Payslips Skipped'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'payroll_run_task'
+
+    def __str__(self):
+        return f'{self.run_id} ({self.after}, {self.until}]'
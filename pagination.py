@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination for payslip lists.
+
+Pages are addressed by the (sort value, id) of the row next to them rather
+than by an OFFSET, so fetching a deep page costs the same as the first one
+and no COUNT(*) is needed. Cursors are signed, opaque tokens.
+"""
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = 'payroll.pagination.cursor'
+
+
+def encode_cursor(sort_field, descending, value, pk, direction='next'):
+    """Build an opaque token pointing before/after the row ``(value, pk)``."""
+    return signing.dumps(
+        [sort_field, bool(descending), str(value), str(pk), direction],
+        salt=CURSOR_SALT, compress=True,
+    )
+
+
+def decode_cursor(token):
+    """Return ``(sort_field, descending, value, pk, direction)`` or None if invalid."""
+    if not token:
+        return None
+    try:
+        sort_field, descending, value, pk, direction = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    return sort_field, descending, value, pk, direction
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours."""
+
+    def __init__(self, rows, next_cursor=None, prev_cursor=None):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def keyset_page(qs, sort_field, descending=False, per_page=12, token=None):
+    """
+    Fetch one page of ``qs`` ordered by ``(sort_field, id)``.
+
+    A token issued for a different sort field or direction is ignored and
+    the first page is returned instead.
+    """
+    cursor = decode_cursor(token)
+    if cursor and (cursor[0] != sort_field or cursor[1] != bool(descending)):
+        cursor = None
+
+    backwards = bool(cursor) and cursor[4] == 'prev'
+    scan_desc = bool(descending) != backwards
+    if cursor:
+        _field, _desc, value, pk, _direction = cursor
+        op = 'lt' if scan_desc else 'gt'
+        qs = qs.filter(Q(**{f'{sort_field}__{op}': value}) | Q(**{sort_field: value, f'id__{op}': pk}))
+    order = [f'-{sort_field}', '-id'] if scan_desc else [sort_field, 'id']
+
+    rows = list(qs.order_by(*order)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows)
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else cursor is not None
+    first, last = rows[0], rows[-1]
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(sort_field, descending, getattr(last, sort_field), last.pk) if has_next else None,
+        prev_cursor=encode_cursor(sort_field, descending, getattr(first, sort_field), first.pk, 'prev') if has_prev else None,
+    )
+
+
+def keyset_values(qs, fields, sort_field, descending=False, limit=50, token=None):
+    """
+    Forward-only ``keyset_page`` over ``values_list(*fields)`` tuples.
+
+    ``fields`` must include ``sort_field`` and ``'id'``. Returns ``(rows,
+    next_cursor)``; no model instances are built.
+    """
+    cursor = decode_cursor(token)
+    if cursor and cursor[0] == sort_field and cursor[1] == bool(descending) and cursor[4] == 'next':
+        _field, _desc, value, pk, _direction = cursor
+        op = 'lt' if descending else 'gt'
+        qs = qs.filter(Q(**{f'{sort_field}__{op}': value}) | Q(**{sort_field: value, f'id__{op}': pk}))
+    order = [f'-{sort_field}', '-id'] if descending else [sort_field, 'id']
+    rows = list(qs.order_by(*order).values_list(*fields)[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort_field, descending, last[fields.index(sort_field)], last[fields.index('id')])
@@ -0,0 +1,321 @@
+"""
+Bank credit-transfer files for payroll payments.
+
+``PaymentFile`` turns the confirmed payslips of a month into one transfer
+per payslip, paid from the hub's own ``BankAccount`` to the employee's.
+Two formats are written:
+
+- ``sepa``: ISO 20022 ``pain.001.001.03`` XML (SEPA credit transfer,
+  category purpose ``SALA``);
+- ``fixed``: 200-character records, a header ``H``, one ``D`` per transfer
+  and a trailer ``T``, in the layout documented at ``iter_fixed``.
+
+Files are generated while they are read: payslips come from a server-side
+cursor and the XML is written incrementally, so memory does not grow with
+the number of transfers. The payslips are selected as of the moment the
+``PaymentFile`` is created (``updated_at <= cutoff``). The ids written to
+the file are kept (16 bytes each), and ``mark_paid`` moves exactly those
+payslips to paid, in one transaction that fails unless all of them move.
+"""
+import io
+import logging
+import unicodedata
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .audit import audit_context, current_audit_context
+from .calculation import CENT
+from .models import BankAccount, Payslip
+from .rollups import next_month
+from .transitions import bulk_transition
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_FORMATS = ('sepa', 'fixed')
+CONTENT_TYPES = {'sepa': 'application/xml', 'fixed': 'text/plain; charset=ascii'}
+EXTENSIONS = {'sepa': 'xml', 'fixed': 'txt'}
+SEPA_NAMESPACE = 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
+FIXED_RECORD_LENGTH = 200
+# Transfers written between two yielded chunks
+PAYMENT_CHUNK_SIZE = 500
+# Payslip ids per UPDATE when a file is marked paid (below SQLite's variable limit)
+MARK_PAID_CHUNK_SIZE = 10000
+# Characters of the SEPA (Latin) character set; anything else becomes a space
+SEPA_CHARACTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789/-?:().,'+ ")
+
+
+class PaymentError(Exception):
+    """The payment file cannot be produced (e.g. the hub has no bank account)."""
+
+
+def bank_text(value, length):
+    """``value`` transliterated to the SEPA character set and cut to ``length``."""
+    ascii_text = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    return ''.join(char if char in SEPA_CHARACTERS else ' ' for char in ascii_text).strip()[:length]
+
+
+def _account(field):
+    return Subquery(
+        BankAccount.objects.filter(
+            hub_id=OuterRef('hub_id'), employee_id=OuterRef('employee_id'), is_deleted=False,
+        ).values(field)[:1]
+    )
+
+
+@contextmanager
+def _element(xml, name, attrs=None):
+    xml.startElement(name, attrs or {})
+    yield
+    xml.endElement(name)
+
+
+def _leaf(xml, name, text, attrs=None):
+    xml.startElement(name, attrs or {})
+    xml.characters(str(text))
+    xml.endElement(name)
+
+
+def _agent(xml, name, bic):
+    with _element(xml, name), _element(xml, 'FinInstnId'):
+        if bic:
+            _leaf(xml, 'BIC', bic)
+        else:
+            with _element(xml, 'Othr'):
+                _leaf(xml, 'Id', 'NOTPROVIDED')
+
+
+class PaymentFile:
+    """
+    Transfers for the confirmed payslips of one hub and month.
+
+    Payslips whose employee has no bank account (or whose net salary is not
+    positive) are left out and counted in ``missing_accounts``.
+    """
+
+    def __init__(self, hub_id, period_start, fmt='sepa', execution_date=None, chunk_size=PAYMENT_CHUNK_SIZE):
+        if fmt not in PAYMENT_FORMATS:
+            raise ValueError(f'Unknown payment file format: {fmt}')
+        self.hub_id = hub_id
+        self.period_start = period_start
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.currency = getattr(settings, 'PAYROLL_CURRENCY', 'EUR')
+        if fmt == 'sepa' and self.currency != 'EUR':
+            raise PaymentError(f'SEPA transfers are in EUR; PAYROLL_CURRENCY is {self.currency}.')
+        self.cutoff = timezone.now()
+        self.execution_date = execution_date or self.cutoff.date()
+        self.message_id = f'PAYROLL-{period_start:%Y%m}-{self.cutoff:%Y%m%d%H%M%S}'
+        self.debtor = BankAccount.objects.filter(hub_id=hub_id, employee_id__isnull=True, is_deleted=False).first()
+        if self.debtor is None:
+            raise PaymentError('The hub has no bank account to pay salaries from.')
+        confirmed = Payslip.objects.filter(
+            hub_id=hub_id, is_deleted=False, status='confirmed', updated_at__lte=self.cutoff,
+            period_start__gte=period_start, period_start__lt=next_month(period_start),
+        )
+        has_account = Exists(BankAccount.objects.filter(hub_id=hub_id, employee_id=OuterRef('employee_id'), is_deleted=False))
+        self.payslips = confirmed.filter(has_account, net_salary__gt=0)
+        totals = self.payslips.order_by().aggregate(count=Count('id'), total=Sum('net_salary'))
+        self.count = totals['count']
+        # SQLite sums decimals as floats
+        self.total = Decimal(totals['total'] or 0).quantize(CENT)
+        self.missing_accounts = confirmed.count() - self.count
+        self.marked = None
+        # Packed ids of the payslips written so far
+        self._written = bytearray()
+        # The file may be marked paid after the request that created it returned
+        self.audit_context = current_audit_context()
+
+    @property
+    def filename(self):
+        return f'payroll-{self.period_start:%Y-%m}-{self.fmt}.{EXTENSIONS[self.fmt]}'
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.fmt]
+
+    def transfers(self):
+        """``(payslip_id, employee_name, net_salary, iban, bic, holder_name)`` rows, read in chunks."""
+        self._written.clear()
+        rows = (
+            self.payslips.annotate(iban=_account('iban'), bic=_account('bic'), holder=_account('holder_name'))
+            .order_by('employee_name', 'id')
+            .values_list('id', 'employee_name', 'net_salary', 'iban', 'bic', 'holder')
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for row in rows:
+            self._written += row[0].bytes
+            yield row
+
+    def written_ids(self):
+        """Ids of the payslips written to the file, in file order."""
+        data = bytes(self._written)
+        return [uuid.UUID(bytes=data[offset:offset + 16]) for offset in range(0, len(data), 16)]
+
+    def iter_file(self, mark_paid=False):
+        """
+        Yield the file as ``bytes`` chunks.
+
+        The last chunk (trailer and closing tags) is held back until the
+        control totals are checked, so a file that fails the check never
+        reaches the client complete. With ``mark_paid`` the payslips are also
+        marked paid before that chunk is released (``self.marked`` holds the
+        result); a download interrupted earlier leaves them confirmed.
+        """
+        count = 0
+        total = Decimal('0.00')
+        pending = None
+        writer = self.iter_sepa if self.fmt == 'sepa' else self.iter_fixed
+        for chunk, count, total in writer():
+            if pending is not None:
+                yield pending
+            pending = chunk
+        if (count, total) != (self.count, self.total):
+            logger.error(
+                'payment file %s changed while written: %s transfers / %s, header %s / %s',
+                self.message_id, count, total, self.count, self.total,
+            )
+            raise PaymentError('Payslips changed while the payment file was written; generate it again.')
+        if mark_paid:
+            self.mark_paid()
+        yield pending
+
+    def mark_paid(self):
+        """
+        Move exactly the payslips written to the file to paid.
+
+        Raises ``PaymentError`` (and marks none) unless every one of them is
+        still confirmed, so a transferred payslip never stays payable.
+        """
+        ids = self.written_ids()
+        if len(ids) != self.count:
+            raise PaymentError('The payment file has not been written completely.')
+        moved = 0
+        with audit_context(*self.audit_context), transaction.atomic():
+            for offset in range(0, len(ids), MARK_PAID_CHUNK_SIZE):
+                chunk = Payslip.objects.filter(hub_id=self.hub_id, is_deleted=False, pk__in=ids[offset:offset + MARK_PAID_CHUNK_SIZE])
+                moved += bulk_transition(chunk, 'pay', self.hub_id, requested=0)['moved']
+            if moved != self.count:
+                logger.error('payment file %s: %s of %s payslips could be marked paid', self.message_id, moved, self.count)
+                raise PaymentError(
+                    f'Only {moved} of the {self.count} payslips in the file are still confirmed; none were marked paid.'
+                )
+        self.marked = {'action': 'pay', 'moved': moved, 'rejected': 0}
+        return self.marked
+
+    def iter_sepa(self):
+        """``pain.001.001.03`` XML, one payment information block for the whole month."""
+        buffer = io.StringIO()
+        xml = XMLGenerator(buffer, encoding='utf-8', short_empty_elements=True)
+        xml.startDocument()
+        xml.startElement('Document', {'xmlns': SEPA_NAMESPACE})
+        xml.startElement('CstmrCdtTrfInitn', {})
+        with _element(xml, 'GrpHdr'):
+            _leaf(xml, 'MsgId', self.message_id)
+            _leaf(xml, 'CreDtTm', self.cutoff.replace(microsecond=0).isoformat())
+            _leaf(xml, 'NbOfTxs', self.count)
+            _leaf(xml, 'CtrlSum', self.total)
+            with _element(xml, 'InitgPty'):
+                _leaf(xml, 'Nm', bank_text(self.debtor.holder_name, 70))
+        xml.startElement('PmtInf', {})
+        _leaf(xml, 'PmtInfId', self.message_id)
+        _leaf(xml, 'PmtMtd', 'TRF')
+        _leaf(xml, 'BtchBookg', 'true')
+        _leaf(xml, 'NbOfTxs', self.count)
+        _leaf(xml, 'CtrlSum', self.total)
+        with _element(xml, 'PmtTpInf'):
+            with _element(xml, 'SvcLvl'):
+                _leaf(xml, 'Cd', 'SEPA')
+            with _element(xml, 'CtgyPurp'):
+                _leaf(xml, 'Cd', 'SALA')
+        _leaf(xml, 'ReqdExctnDt', self.execution_date.isoformat())
+        with _element(xml, 'Dbtr'):
+            _leaf(xml, 'Nm', bank_text(self.debtor.holder_name, 70))
+        with _element(xml, 'DbtrAcct'), _element(xml, 'Id'):
+            _leaf(xml, 'IBAN', self.debtor.iban)
+        _agent(xml, 'DbtrAgt', self.debtor.bic)
+        _leaf(xml, 'ChrgBr', 'SLEV')
+        remittance = bank_text(f'Salary {self.period_start:%Y-%m}', 140)
+        count = 0
+        total = Decimal('0.00')
+        for payslip_id, employee_name, amount, iban, bic, holder in self.transfers():
+            with _element(xml, 'CdtTrfTxInf'):
+                with _element(xml, 'PmtId'):
+                    _leaf(xml, 'EndToEndId', payslip_id.hex)
+                with _element(xml, 'Amt'):
+                    _leaf(xml, 'InstdAmt', amount, {'Ccy': self.currency})
+                if bic:
+                    _agent(xml, 'CdtrAgt', bic)
+                with _element(xml, 'Cdtr'):
+                    _leaf(xml, 'Nm', bank_text(holder or employee_name, 70))
+                with _element(xml, 'CdtrAcct'), _element(xml, 'Id'):
+                    _leaf(xml, 'IBAN', iban)
+                with _element(xml, 'Purp'):
+                    _leaf(xml, 'Cd', 'SALA')
+                with _element(xml, 'RmtInf'):
+                    _leaf(xml, 'Ustrd', remittance)
+            count += 1
+            total += amount
+            if count % self.chunk_size == 0:
+                yield buffer.getvalue().encode('utf-8'), count, total
+                buffer.seek(0)
+                buffer.truncate()
+        xml.endElement('PmtInf')
+        xml.endElement('CstmrCdtTrfInitn')
+        xml.endElement('Document')
+        xml.endDocument()
+        yield buffer.getvalue().encode('utf-8'), count, total
+
+    def iter_fixed(self):
+        """
+        Fixed-width ASCII records of ``FIXED_RECORD_LENGTH`` characters, CRLF-terminated.
+
+        ``H`` message id (35), creation date (8, YYYYMMDD), execution date (8),
+        debtor IBAN (34), debtor BIC (11), debtor name (70), transfers (9),
+        total in cents (18).
+        ``D`` sequence (9), IBAN (34), BIC (11), amount in cents (15),
+        currency (3), beneficiary name (70), reference (35, the payslip id).
+        ``T`` transfers (9), total in cents (18).
+
+        Text is left-aligned and space-padded, numbers zero-padded.
+        """
+
+        def record(*fields):
+            return ''.join(fields).ljust(FIXED_RECORD_LENGTH)[:FIXED_RECORD_LENGTH] + '\r\n'
+
+        lines = [record(
+            'H', self.message_id.ljust(35), f'{self.cutoff:%Y%m%d}', f'{self.execution_date:%Y%m%d}',
+            self.debtor.iban.ljust(34), self.debtor.bic.ljust(11), bank_text(self.debtor.holder_name, 70).ljust(70),
+            f'{self.count:09d}', f'{int(self.total * 100):018d}',
+        )]
+        count = 0
+        total = Decimal('0.00')
+        for payslip_id, employee_name, amount, iban, bic, holder in self.transfers():
+            count += 1
+            total += amount
+            lines.append(record(
+                'D', f'{count:09d}', iban.ljust(34), (bic or '').ljust(11), f'{int(amount * 100):015d}',
+                self.currency[:3].ljust(3), bank_text(holder or employee_name, 70).ljust(70), payslip_id.hex.ljust(35),
+            ))
+            if count % self.chunk_size == 0:
+                yield ''.join(lines).encode('ascii'), count, total
+                lines.clear()
+        lines.append(record('T', f'{count:09d}', f'{int(total * 100):018d}'))
+        yield ''.join(lines).encode('ascii'), count, total
+
+    def summary(self):
+        return {
+            'message_id': self.message_id,
+            'period': self.period_start.strftime('%Y-%m'),
+            'format': self.fmt,
+            'transfers': self.count,
+            'total': str(self.total),
+            'missing_accounts': self.missing_accounts,
+            'marked': self.marked,
+        }
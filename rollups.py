@@ -0,0 +1,176 @@
+"""
+Per-month payroll rollups.
+
+``PayrollPeriodRollup`` keeps one row per (hub_id, month, status) with the
+payslip count and gross/deductions/net sums. Payslips are attributed to the
+month of their ``period_start``. Writes refresh only the months they touch,
+so reads (dashboard, summaries) cost O(months) instead of O(payslips). The
+rollup rows are locked before they are recomputed, so concurrent writers to
+one month take turns and the last one sees the others' payslips.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import PAYSLIP_STATUS, Payslip, PayrollPeriodRollup
+
+STATUSES = [code for code, _label in PAYSLIP_STATUS]
+ROLLUP_AMOUNTS = (('gross', 'gross_total'), ('deductions', 'deductions_total'), ('net', 'net_total'))
+# Payslip fields summed into the rollup fields of ROLLUP_AMOUNTS, in the same order
+PAYSLIP_AMOUNTS = ('gross_salary', 'deductions', 'net_salary')
+# Field values a payslip's rollup contribution is worked out from
+ROLLUP_SOURCE_FIELDS = ('period_start', 'status', 'is_deleted', *PAYSLIP_AMOUNTS)
+
+
+def month_start(value):
+    """First day of the month of a date (or ISO date string); None passes through."""
+    if not value:
+        return None
+    value = Payslip._meta.get_field('period_start').to_python(value)
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def refresh_rollups(hub_id, dates):
+    """Recompute the rollup rows of the months containing ``dates`` for one hub."""
+    months = sorted({month for month in map(month_start, dates) if month})
+    if not hub_id or not months:
+        return
+    with transaction.atomic(savepoint=False):
+        _lock_rollups(hub_id, months)
+        _recompute_rollups(hub_id, months)
+
+
+def _lock_rollups(hub_id, months):
+    """Create the months' missing rollup rows and lock them all, in key order (no lock on SQLite)."""
+    PayrollPeriodRollup.objects.bulk_create(
+        [PayrollPeriodRollup(hub_id=hub_id, period=month, status=status) for month in months for status in STATUSES],
+        ignore_conflicts=True,
+    )
+    list(
+        PayrollPeriodRollup.objects.select_for_update()
+        .filter(hub_id=hub_id, period__in=months).order_by('period', 'status').values_list('pk', flat=True)
+    )
+
+
+def _contribution(values):
+    """``((month, status), amounts)`` a payslip with these field values adds to the rollups, or None."""
+    if not values or values['is_deleted'] or not values['period_start']:
+        return None
+    amounts = [Payslip._meta.get_field(name).to_python(values[name]) or 0 for name in PAYSLIP_AMOUNTS]
+    return (month_start(values['period_start']), values['status']), amounts
+
+
+def apply_payslip_change(hub_id, old, new):
+    """
+    Move one payslip's count and amounts from the rollup row of its ``old``
+    field values to the row of its ``new`` ones.
+
+    ``old``/``new`` map ``ROLLUP_SOURCE_FIELDS`` to values; pass None for a
+    created (``old``) or deleted (``new``) payslip. Costs O(1) per write
+    instead of re-aggregating the month.
+    """
+    deltas = {}
+    for values, sign in ((old, -1), (new, 1)):
+        contribution = _contribution(values)
+        if contribution is None:
+            continue
+        key, amounts = contribution
+        delta = deltas.setdefault(key, [0] * (len(amounts) + 1))
+        for index, amount in enumerate([1, *amounts]):
+            delta[index] += sign * amount
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not hub_id or not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        _lock_rollups(hub_id, sorted({month for month, _status in deltas}))
+        now = timezone.now()
+        for (month, status), (count, *amounts) in sorted(deltas.items()):
+            PayrollPeriodRollup.objects.filter(hub_id=hub_id, period=month, status=status).update(
+                payslip_count=F('payslip_count') + count,
+                **{field: F(field) + amount for (_key, field), amount in zip(ROLLUP_AMOUNTS, amounts)},
+                updated_at=now,
+            )
+
+
+def _recompute_rollups(hub_id, months):
+    rows = (
+        Payslip.objects.filter(
+            hub_id=hub_id, is_deleted=False,
+            period_start__gte=months[0], period_start__lt=next_month(months[-1]),
+        )
+        .order_by().annotate(month=TruncMonth('period_start')).values('month', 'status')
+        .annotate(count=Count('id'), gross=Sum('gross_salary'), deductions=Sum('deductions'), net=Sum('net_salary'))
+    )
+    found = {(row['month'], row['status']): row for row in rows}
+    rollups = []
+    for month in months:
+        for status in STATUSES:
+            row = found.get((month, status), {})
+            rollups.append(PayrollPeriodRollup(
+                hub_id=hub_id, period=month, status=status,
+                payslip_count=row.get('count') or 0,
+                gross_total=row.get('gross') or 0,
+                deductions_total=row.get('deductions') or 0,
+                net_total=row.get('net') or 0,
+            ))
+    PayrollPeriodRollup.objects.bulk_create(
+        rollups, update_conflicts=True,
+        unique_fields=['hub_id', 'period', 'status'],
+        update_fields=['payslip_count', 'gross_total', 'deductions_total', 'net_total', 'updated_at'],
+    )
+
+
+def rebuild_rollups(hub_id):
+    """Recompute every month of a hub (including stale months that no longer have payslips)."""
+    months = set(Payslip.objects.filter(hub_id=hub_id, is_deleted=False).dates('period_start', 'month'))
+    months.update(PayrollPeriodRollup.objects.filter(hub_id=hub_id).values_list('period', flat=True))
+    refresh_rollups(hub_id, months)
+    return len(months)
+
+
+def _rollup_queryset(hub_id, period_start=None, period_end=None):
+    qs = PayrollPeriodRollup.objects.filter(hub_id=hub_id)
+    if period_start:
+        qs = qs.filter(period__gte=month_start(period_start))
+    if period_end:
+        qs = qs.filter(period__lte=month_start(period_end))
+    return qs.order_by('period')
+
+
+def _rows_from_rollups(rollups):
+    months = {}
+    for rollup in rollups:
+        row = months.setdefault(rollup.period, {
+            'month': rollup.period, 'count': 0,
+            **{f'total_{key}': 0 for key, _field in ROLLUP_AMOUNTS},
+            **{f'{status}__count': 0 for status in STATUSES},
+            **{f'{status}__{key}': 0 for status in STATUSES for key, _field in ROLLUP_AMOUNTS},
+        })
+        row[f'{rollup.status}__count'] = rollup.payslip_count
+        row['count'] += rollup.payslip_count
+        for key, field in ROLLUP_AMOUNTS:
+            amount = getattr(rollup, field)
+            row[f'{rollup.status}__{key}'] = amount
+            row[f'total_{key}'] += amount
+    return [row for row in months.values() if row['count']]
+
+
+def rollup_rows(hub_id, period_start=None, period_end=None):
+    """
+    Monthly rows shaped like ``summary._aggregates()`` results, read from the rollup table.
+
+    Months without payslips are left out.
+    """
+    return _rows_from_rollups(_rollup_queryset(hub_id, period_start, period_end))
+
+
+async def arollup_rows(hub_id, period_start=None, period_end=None):
+    """Async ``rollup_rows``."""
+    return _rows_from_rollups([rollup async for rollup in _rollup_queryset(hub_id, period_start, period_end)])
@@ -0,0 +1,66 @@
+"""
+Compiled, cached deduction rules per hub.
+
+A hub's ``DeductionRuleSet`` is compiled once into ``DeductionRules`` and
+kept in process memory together with the hub's rules version stamp. The
+stamp lives in the shared cache, so every worker sees a settings change:
+saving or deleting a rule set replaces the stamp (see ``signals``) and each
+process recompiles on its next lookup. The calculation hot path only reads
+the stamp from the cache and never queries the database for rules.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .calculation import DeductionRules
+from .models import DeductionRuleSet
+
+# hub_id -> (version stamp, compiled rules or None)
+_compiled = {}
+
+
+def _version_key(hub_id):
+    return f'payroll:rules:{hub_id}'
+
+
+def rules_version(hub_id):
+    key = _version_key(hub_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def compile_rules(hub_id):
+    """Load and compile the rules of a hub (falls back to ``PAYROLL_DEDUCTION_RULES``)."""
+    rule_set = DeductionRuleSet.objects.filter(hub_id=hub_id).first() if hub_id else None
+    if rule_set is not None:
+        return DeductionRules.from_config(rule_set.as_config())
+    config = getattr(settings, 'PAYROLL_DEDUCTION_RULES', None)
+    return DeductionRules.from_config(config) if config else None
+
+
+def hub_rules(hub_id):
+    """Compiled deduction rules of a hub, or None when none are configured."""
+    version = rules_version(hub_id)
+    entry = _compiled.get(hub_id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    rules = compile_rules(hub_id)
+    _compiled[hub_id] = (version, rules)
+    return rules
+
+
+def invalidate_rules(hub_id):
+    """Make every process recompile the rules of a hub, now and once the transaction commits."""
+    key = _version_key(hub_id)
+    cache.set(key, time.time_ns(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
+
+
+def forget_compiled_rules():
+    """Drop this process's compiled rules (e.g. after ``PAYROLL_DEDUCTION_RULES`` changed)."""
+    _compiled.clear()
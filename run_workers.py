@@ -0,0 +1,51 @@
+"""
+Entry points of payroll run worker processes.
+
+Kept free of module-level model imports: spawned workers unpickle these
+functions before Django is set up, and ``init_worker`` is what sets it up.
+"""
+
+
+def init_worker(database_names):
+    """Set Django up in a fresh worker and point it at the parent's databases."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from django.db import connections
+    for alias, name in database_names.items():
+        connections[alias].settings_dict['NAME'] = name
+
+
+def run_task(task):
+    """Generate one ``PayrollRunTask``, checkpointing after every committed chunk."""
+    from django.db.models import F
+    from django.utils import timezone
+
+    from payroll.generation import generate_period
+    from payroll.models import PayrollRunTask
+
+    rows = PayrollRunTask.objects.filter(pk=task['task_id'])
+    rows.update(status='running', updated_at=timezone.now())
+
+    def checkpoint(last_employee_id, created, skipped):
+        rows.update(
+            checkpoint_employee_id=last_employee_id,
+            created_count=F('created_count') + created,
+            skipped_count=F('skipped_count') + skipped,
+            updated_at=timezone.now(),
+        )
+
+    result = generate_period(
+        task['hub_id'], task['period_start'], task['period_end'],
+        batch_size=task['batch_size'], after=task['after'], until=task['until'],
+        run_id=task['run_id'], on_chunk=checkpoint, refresh=False,
+    )
+    rows.update(status='completed', updated_at=timezone.now())
+    return result
+
+
+def render_documents_task(task):
+    """Render one chunk of payslip documents into the document cache."""
+    from payroll.documents import render_documents
+    return render_documents(task['ids'], task['fmt'])
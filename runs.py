@@ -0,0 +1,288 @@
+"""
+Month-end payroll run orchestration.
+
+``run_payroll`` fans the generation of a period out over a process pool:
+one task per hub, or one per employee id range for hubs larger than
+``range_size``. Workers are started with the ``spawn`` method, so each one
+sets Django up and opens its own database connections instead of sharing
+the parent's. The parent holds a per-hub lock while the hub's tasks run (a
+PostgreSQL advisory lock, or an ``fcntl`` file lock elsewhere) so a hub is
+never generated by two runs at once, and locks at most ``max_locked_hubs``
+hubs at a time. Workers only insert payslips; the parent refreshes each
+hub's rollups once, after its last task, so concurrent tasks of one hub
+never recompute the same month. Each task is a ``PayrollRunTask`` row
+that its worker checkpoints after every committed chunk, so an interrupted
+run resumes where it stopped; the parent aggregates the task rows into the
+hub's ``PayrollRun`` when the run ends.
+
+Locally this works on SQLite with a file database; set
+``OPTIONS={'transaction_mode': 'IMMEDIATE'}`` so concurrent workers wait for
+the write lock instead of failing with "database is locked".
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .generation import DEFAULT_BATCH_SIZE, active_hub_ids
+from .models import PayrollRun, PayrollRunTask
+from .run_workers import init_worker, run_task
+from .signals import payslips_changed
+
+logger = logging.getLogger(__name__)
+
+# Hubs with more active employees than this are split into id ranges
+DEFAULT_RANGE_SIZE = 20000
+# Hubs locked and in progress at once (each lock is a connection-level lock or an open file)
+MAX_LOCKED_HUBS = 32
+
+
+def default_workers():
+    """``PAYROLL_RUN_WORKERS`` (0 runs every task in this process)."""
+    return int(getattr(settings, 'PAYROLL_RUN_WORKERS', 0))
+
+
+def _lock_dir():
+    return str(getattr(settings, 'PAYROLL_LOCK_DIR', None) or os.path.join(tempfile.gettempdir(), 'payroll-locks'))
+
+
+def _advisory_key(hub_id):
+    return int.from_bytes(uuid.UUID(str(hub_id)).bytes[:8], 'big', signed=True)
+
+
+@contextmanager
+def hub_lock(hub_id):
+    """Try to take the run lock of a hub without waiting; yields whether it was acquired."""
+    if connection.vendor == 'postgresql':
+        key = _advisory_key(hub_id)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+            acquired = cursor.fetchone()[0]
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+        return
+
+    import fcntl
+    os.makedirs(_lock_dir(), exist_ok=True)
+    with open(os.path.join(_lock_dir(), f'{hub_id}.lock'), 'w') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def plan_tasks(hub_id, range_size=DEFAULT_RANGE_SIZE):
+    """``(after, until)`` employee id ranges covering a hub; ``(None, None)`` for the whole hub."""
+    from apps.accounts.models import LocalUser
+    if not range_size:
+        return [(None, None)]
+    ids = LocalUser.objects.filter(hub_id=hub_id, is_active=True).order_by('id').values_list('id', flat=True)
+    ranges, after, count = [], None, 0
+    for count, employee_id in enumerate(ids.iterator(chunk_size=range_size), 1):
+        if count % range_size == 0:
+            ranges.append((after, employee_id))
+            after = employee_id
+    if not ranges:
+        return [(None, None)]
+    if count % range_size:
+        ranges.append((after, None))
+    else:
+        ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def _prepare_run(hub_id, period_start, period_end, range_size):
+    """
+    The run of a hub and period plus the tasks still to do.
+
+    A run left ``running`` or ``failed`` with unfinished tasks is resumed:
+    its unfinished tasks continue after their checkpoint. Otherwise the run
+    is (re)planned from scratch.
+    """
+    from apps.accounts.models import LocalUser
+    now = timezone.now()
+    run = PayrollRun.objects.filter(hub_id=hub_id, period_start=period_start).first()
+    if run is not None and run.status in ('running', 'failed'):
+        pending = list(run.tasks.exclude(status='completed').order_by('id'))
+        if pending:
+            PayrollRunTask.objects.filter(pk__in=[task.pk for task in pending]).update(status='pending', error='')
+            run.status, run.error, run.finished_at = 'running', '', None
+            run.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+            return run, pending, True
+
+    ranges = plan_tasks(hub_id, range_size)
+    values = {
+        'period_end': period_end, 'status': 'running', 'tasks_total': len(ranges), 'tasks_done': 0,
+        'employees_total': LocalUser.objects.filter(hub_id=hub_id, is_active=True).count(),
+        'created_count': 0, 'skipped_count': 0, 'started_at': now, 'finished_at': None, 'error': '',
+    }
+    if run is None:
+        run = PayrollRun.objects.create(hub_id=hub_id, period_start=period_start, **values)
+    else:
+        for field, value in values.items():
+            setattr(run, field, value)
+        run.save()
+        run.tasks.all().delete()
+    pending = PayrollRunTask.objects.bulk_create(
+        PayrollRunTask(run=run, after=after, until=until) for after, until in ranges
+    )
+    return run, pending, False
+
+
+def _task_payload(run, task, batch_size):
+    return {
+        'task_id': task.pk, 'run_id': run.pk, 'hub_id': run.hub_id,
+        'period_start': run.period_start, 'period_end': run.period_end,
+        'after': task.checkpoint_employee_id or task.after, 'until': task.until,
+        'batch_size': batch_size,
+    }
+
+
+def _finish_run(run_id):
+    """Aggregate the task rows of a run into its counts and final status."""
+    tasks = PayrollRunTask.objects.filter(run_id=run_id)
+    totals = tasks.aggregate(
+        created=Coalesce(Sum('created_count'), 0), skipped=Coalesce(Sum('skipped_count'), 0),
+        done=Count('id', filter=Q(status='completed')), failed=Count('id', filter=Q(status='failed')),
+    )
+    errors = tasks.filter(status='failed').exclude(error='').values_list('error', flat=True)
+    now = timezone.now()
+    PayrollRun.objects.filter(pk=run_id).update(
+        status='failed' if totals['failed'] else 'completed',
+        created_count=totals['created'], skipped_count=totals['skipped'], tasks_done=totals['done'],
+        error='\n'.join(errors), finished_at=now, updated_at=now,
+    )
+
+
+def _run_inline(fn, arg):
+    """``Executor.submit`` for running a task in this process."""
+    future = Future()
+    try:
+        future.set_result(fn(arg))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+@contextmanager
+def _task_executor(workers):
+    """``submit(fn, arg)`` of a spawn-based process pool, or of this process when ``workers`` is 0."""
+    if not workers:
+        yield _run_inline
+        return
+    context = multiprocessing.get_context('spawn')
+    database_names = {alias: connections[alias].settings_dict['NAME'] for alias in connections}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(database_names,)) as pool:
+        yield pool.submit
+
+
+def run_payroll(period_start, period_end, hub_ids=None, workers=None, range_size=DEFAULT_RANGE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                max_locked_hubs=MAX_LOCKED_HUBS):
+    """
+    Generate a period for many hubs in parallel.
+
+    Hubs whose lock is held by another run are reported as ``locked`` and
+    left alone; interrupted runs are reported as ``resumed``. ``created`` and
+    ``skipped`` count this call's work only; each ``PayrollRun`` holds the
+    totals of the whole run.
+
+    At most ``max_locked_hubs`` hubs are locked and in progress at a time.
+    When the last task of a hub finishes, the hub's rollups and other
+    derived data are refreshed once, its run is finished and its lock is
+    released.
+    """
+    started = time.monotonic()
+    hub_ids = iter(list(hub_ids) if hub_ids is not None else active_hub_ids())
+    workers = default_workers() if workers is None else workers
+    run_ids, locked, resumed = [], [], []
+    # run id: [hub lock, tasks left]
+    open_runs = {}
+    futures = {}
+    tasks = created = skipped = 0
+
+    def handle(task, outcome):
+        nonlocal created, skipped
+        if isinstance(outcome, Exception):
+            logger.error('payroll run task failed hub=%s task=%s: %s', task['hub_id'], task['task_id'], outcome)
+            PayrollRunTask.objects.filter(pk=task['task_id']).update(
+                status='failed', error=f'{type(outcome).__name__}: {outcome}', updated_at=timezone.now(),
+            )
+        else:
+            created += outcome['created']
+            skipped += outcome['skipped']
+            PayrollRun.objects.filter(pk=task['run_id']).update(tasks_done=F('tasks_done') + 1, updated_at=timezone.now())
+
+    def close_run(run_id, hub_id):
+        lock, _left = open_runs.pop(run_id)
+        with lock:
+            payslips_changed(hub_id, [period_start])
+            _finish_run(run_id)
+
+    with ExitStack() as locks, _task_executor(workers) as submit:
+        while True:
+            while len(open_runs) < max_locked_hubs and (hub_id := next(hub_ids, None)) is not None:
+                lock = ExitStack()
+                if not lock.enter_context(hub_lock(hub_id)):
+                    lock.close()
+                    locked.append(str(hub_id))
+                    continue
+                locks.callback(lock.close)
+                run, pending, was_resumed = _prepare_run(hub_id, period_start, period_end, range_size)
+                run_ids.append(run.pk)
+                if was_resumed:
+                    resumed.append(str(run.pk))
+                open_runs[run.pk] = [lock, len(pending)]
+                tasks += len(pending)
+                for task in pending:
+                    payload = _task_payload(run, task, batch_size)
+                    futures[submit(run_task, payload)] = payload
+                if not pending:
+                    close_run(run.pk, hub_id)
+            if not futures:
+                break
+            done, _pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = futures.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as exc:
+                    outcome = exc
+                handle(task, outcome)
+                open_runs[task['run_id']][1] -= 1
+                if not open_runs[task['run_id']][1]:
+                    close_run(task['run_id'], task['hub_id'])
+
+    elapsed = time.monotonic() - started
+    return {
+        'period': period_start.strftime('%Y-%m'),
+        'hubs': len(run_ids),
+        'tasks': tasks,
+        'workers': workers,
+        'created': created,
+        'skipped': skipped,
+        'failed': PayrollRun.objects.filter(pk__in=run_ids, status='failed').count(),
+        'locked': locked,
+        'resumed': resumed,
+        'runs': [str(run_id) for run_id in run_ids],
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(created / elapsed, 1) if elapsed else float(created),
+    }
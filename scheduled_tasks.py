@@ -3,6 +3,26 @@ import logging
 logger = logging.getLogger(__name__)
 
 def generate_monthly_payslips(payload):
-    """Generate monthly payslips for all active employees."""
-    logger.info('payroll.generate_monthly_payslips called')
-    return {'status': 'not_implemented'}
+    """
+    Generate monthly payslips for all active employees.
+
+    Optional payload keys: ``period`` (``YYYY-MM``, defaults to the current
+    month), ``hub_id`` (restrict to one hub), ``batch_size`` and ``workers``
+    (process pool size, defaults to ``PAYROLL_RUN_WORKERS``).
+    """
+    from payroll.generation import DEFAULT_BATCH_SIZE, parse_period
+    from payroll.runs import run_payroll
+    payload = payload or {}
+    period_start, period_end = parse_period(payload.get('period'))
+    result = run_payroll(
+        period_start, period_end,
+        hub_ids=[payload['hub_id']] if payload.get('hub_id') else None,
+        workers=int(payload['workers']) if payload.get('workers') is not None else None,
+        batch_size=int(payload.get('batch_size') or DEFAULT_BATCH_SIZE),
+    )
+    logger.info(
+        'payroll.generate_monthly_payslips period=%s hubs=%d tasks=%d workers=%d created=%d skipped=%d failed=%d locked=%d elapsed=%.3fs',
+        result['period'], result['hubs'], result['tasks'], result['workers'], result['created'],
+        result['skipped'], result['failed'], len(result['locked']), result['elapsed_seconds'],
+    )
+    return {'status': 'error' if result['failed'] else 'ok', **result}
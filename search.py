@@ -0,0 +1,148 @@
+"""
+Indexed payslip search.
+
+Matches the substring semantics of the original ``icontains`` filter over
+``employee_name``, ``status`` and ``notes``, but served by an index:
+
+* PostgreSQL: a ``pg_trgm`` GIN index over the concatenated search document,
+  queried with ``ILIKE`` and ranked by ``similarity()``.
+* SQLite: an FTS5 shadow table (``trigram`` tokenizer) kept in sync with
+  ``payroll_payslip`` by triggers, ranked by ``bm25()``.
+
+Both are created by migration 0005. Queries shorter than a trigram, or
+databases without either index, fall back to the ``icontains`` filter.
+FTS rows are joined to payslips on their ``payslip_id``; their rowid comes
+from ``payroll_payslip_fts_keys`` (migration 0012), whose INTEGER PRIMARY
+KEY a ``VACUUM`` leaves alone, so the triggers find a payslip's row through
+an index.
+"""
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Payslip
+
+FTS_TABLE = 'payroll_payslip_fts'
+FTS_KEYS_TABLE = 'payroll_payslip_fts_keys'
+SEARCH_DOCUMENT = "(employee_name || ' ' || status || ' ' || notes)"
+MIN_INDEXED_LENGTH = 3
+DEFAULT_SEARCH_LIMIT = 50
+
+_fts_available = {}
+
+
+def search_backend():
+    """'trigram', 'fts5' or 'like' for the current database."""
+    if connection.vendor == 'postgresql':
+        return 'trigram'
+    if connection.vendor == 'sqlite':
+        key = connection.settings_dict['NAME']
+        if key not in _fts_available:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_available[key] = cursor.fetchone() is not None
+        if _fts_available[key]:
+            return 'fts5'
+    return 'like'
+
+
+def _like_pattern(query):
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _backend_for(query):
+    return search_backend() if len(query) >= MIN_INDEXED_LENGTH else 'like'
+
+
+def _icontains(query):
+    return Q(employee_name__icontains=query) | Q(status__icontains=query) | Q(notes__icontains=query)
+
+
+def filter_search(qs, query):
+    """Restrict a Payslip queryset to rows matching ``query`` (ordering is left to the caller)."""
+    query = (query or '').strip()
+    if not query:
+        return qs
+    table = Payslip._meta.db_table
+    backend = _backend_for(query)
+    if backend == 'fts5':
+        return qs.filter(RawSQL(
+            f'"{table}".id IN (SELECT payslip_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            [_fts_phrase(query)], output_field=BooleanField(),
+        ))
+    if backend == 'trigram':
+        return qs.filter(RawSQL(
+            f"{SEARCH_DOCUMENT} ILIKE %s", [_like_pattern(query)], output_field=BooleanField(),
+        ))
+    return qs.filter(_icontains(query))
+
+
+def search_payslips(hub_id, query, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    """
+    Ranked search within a hub.
+
+    Returns ``{'ids', 'total', 'backend'}`` with ``ids`` best match first.
+    """
+    query = (query or '').strip()
+    backend = _backend_for(query)
+    base = Payslip.objects.filter(hub_id=hub_id, is_deleted=False)
+    if not query:
+        return {'ids': [], 'total': 0, 'backend': backend}
+    if backend == 'like':
+        qs = base.filter(_icontains(query))
+        ids = list(qs.order_by('employee_name', 'id').values_list('id', flat=True)[offset:offset + limit])
+        return {'ids': ids, 'total': qs.count(), 'backend': backend}
+
+    table = Payslip._meta.db_table
+    if backend == 'fts5':
+        matches = (
+            f'SELECT p.id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} '
+            f'JOIN "{table}" p ON p.id = {FTS_TABLE}.payslip_id '
+            f'WHERE {FTS_TABLE} MATCH %s AND p.hub_id = %s AND NOT p.is_deleted'
+        )
+        params = [_fts_phrase(query), hub_id.hex if hasattr(hub_id, 'hex') else str(hub_id).replace('-', '')]
+        order = 'rank, id'
+    else:
+        matches = (
+            f'SELECT id, similarity({SEARCH_DOCUMENT}, %s) AS rank FROM "{table}" '
+            f'WHERE {SEARCH_DOCUMENT} ILIKE %s AND hub_id = %s AND NOT is_deleted'
+        )
+        params = [query, _like_pattern(query), str(hub_id)]
+        order = 'rank DESC, id'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT id, COUNT(*) OVER () FROM ({matches}) AS matches ORDER BY {order} LIMIT %s OFFSET %s',
+            params + [limit, offset],
+        )
+        rows = cursor.fetchall()
+    id_field = Payslip._meta.pk
+    ids = [id_field.to_python(row[0]) for row in rows]
+    if rows:
+        total = rows[0][1]
+    elif offset:
+        total = base.filter(id__in=RawSQL(f'SELECT id FROM ({matches}) AS matches', params)).count()
+    else:
+        total = 0
+    return {'ids': ids, 'total': total, 'backend': backend}
+
+
+def rebuild_search_index():
+    """Repopulate the SQLite FTS table and its keys from the payslips; no-op elsewhere."""
+    if search_backend() != 'fts5':
+        return 0
+    table = Payslip._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'DELETE FROM {FTS_KEYS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_KEYS_TABLE} (payslip_id) SELECT id FROM "{table}"')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, payslip_id, employee_name, status, notes) '
+            f'SELECT k.id, p.id, p.employee_name, p.status, p.notes '
+            f'FROM "{table}" p JOIN {FTS_KEYS_TABLE} k ON k.payslip_id = p.id'
+        )
+        return cursor.rowcount
@@ -0,0 +1,106 @@
+"""
+Signal handlers keeping payroll derived data in sync with Payslip writes
+(and the compiled deduction rules in sync with DeductionRuleSet writes).
+
+Queryset ``update()``/``bulk_create()`` paths send no signals; they call
+``payslips_changed`` themselves with the hub and the periods they touched,
+plus the employees when year-to-date figures may have changed, and
+``audit.record_bulk`` when they change existing payslips. Single-payslip
+saves and deletes move that payslip's figures between rollup rows instead
+of recomputing its months.
+"""
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .audit import record_delete, record_save
+from .caching import invalidate_hub
+from .models import DeductionRuleSet, Payslip
+from .rollups import ROLLUP_SOURCE_FIELDS, apply_payslip_change, refresh_rollups
+from .rulesets import forget_compiled_rules, invalidate_rules
+from .snapshots import discard_snapshots
+from .year_to_date import counts_towards_ytd, refresh_year_to_date
+
+
+def payslips_changed(hub_id, dates, employee_ids=()):
+    """
+    Refresh derived data of ``hub_id`` for the months containing ``dates``.
+
+    Pass the ``employee_ids`` of the payslips written when confirmed, paid
+    or cancelled payslips may be among them, to refresh their year-to-date
+    accumulators for the years of ``dates`` too.
+    """
+    dates = list(dates)
+    refresh_rollups(hub_id, dates)
+    _refresh_derived(hub_id, dates, employee_ids)
+
+
+def _refresh_derived(hub_id, dates, employee_ids):
+    """Everything ``payslips_changed`` refreshes besides the rollups."""
+    if employee_ids:
+        refresh_year_to_date(hub_id, employee_ids, dates)
+    discard_snapshots(hub_id, dates)
+    invalidate_hub(hub_id)
+
+
+def _rollup_values(values):
+    """The ``ROLLUP_SOURCE_FIELDS`` of ``values``, or None when any of them was not loaded."""
+    if not all(name in values for name in ROLLUP_SOURCE_FIELDS):
+        return None
+    return {name: values[name] for name in ROLLUP_SOURCE_FIELDS}
+
+
+def _update_rollups(instance, created, deleted):
+    """Move the payslip's figures between rollup rows; recompute its months when the stored values are unknown."""
+    loaded = getattr(instance, '_loaded_values', {})
+    old = None if created else _rollup_values(loaded)
+    new = None if deleted else _rollup_values(instance.__dict__)
+    if (old is None and not created) or (new is None and not deleted):
+        refresh_rollups(instance.hub_id, [instance.period_start, getattr(instance, '_loaded_period_start', None)])
+        return
+    loaded_hub_id = loaded.get('hub_id', instance.hub_id)
+    if loaded_hub_id != instance.hub_id:
+        apply_payslip_change(loaded_hub_id, old, None)
+        old = None
+    apply_payslip_change(instance.hub_id, old, new)
+
+
+def _instance_changed(instance, created=False, deleted=False):
+    dates = [instance.period_start, getattr(instance, '_loaded_period_start', None)]
+    employee_ids = ()
+    if counts_towards_ytd(instance.status) or counts_towards_ytd(getattr(instance, '_loaded_status', None)):
+        employee_ids = [instance.employee_id, getattr(instance, '_loaded_employee_id', None)]
+    _update_rollups(instance, created, deleted)
+    _refresh_derived(instance.hub_id, dates, employee_ids)
+
+
+@receiver(post_save, sender=Payslip, dispatch_uid='payroll_payslip_saved')
+def payslip_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created:
+        record_save(instance, update_fields)
+    _instance_changed(instance, created=created)
+    instance._loaded_period_start = instance.period_start
+    instance._loaded_employee_id = instance.employee_id
+    instance._loaded_status = instance.status
+    instance._loaded_values = {
+        field.attname: getattr(instance, field.attname)
+        for field in sender._meta.concrete_fields if field.attname in instance.__dict__
+    }
+
+
+@receiver(post_delete, sender=Payslip, dispatch_uid='payroll_payslip_deleted')
+def payslip_deleted(sender, instance, **kwargs):
+    record_delete(instance)
+    _instance_changed(instance, deleted=True)
+
+
+@receiver(post_save, sender=DeductionRuleSet, dispatch_uid='payroll_ruleset_saved')
+@receiver(post_delete, sender=DeductionRuleSet, dispatch_uid='payroll_ruleset_deleted')
+def ruleset_changed(sender, instance, **kwargs):
+    invalidate_rules(instance.hub_id)
+
+
+@receiver(setting_changed, dispatch_uid='payroll_rules_setting_changed')
+def rules_setting_changed(sender, setting, **kwargs):
+    if setting == 'PAYROLL_DEDUCTION_RULES':
+        forget_compiled_rules()
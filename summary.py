@@ -0,0 +1,174 @@
+"""
+Payroll summary aggregation.
+
+Whole-month ranges count the payslips whose ``period_start`` falls in one
+of the months, the attribution of the per-month rollup table they are
+answered from. Other ranges count the payslips whose period lies within the
+range and fall back to a single SELECT over payslips using conditional
+aggregation; breakdowns (per employee or per month) are one GROUP BY query
+whose rows are also summed for the grand total. ``apayroll_summary`` runs
+the same queries through the async ORM.
+"""
+import calendar
+from decimal import Decimal
+
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .caching import acached, cached
+from .models import PAYSLIP_STATUS, Payslip
+from .rollups import arollup_rows, next_month, rollup_rows
+
+STATUSES = [code for code, _label in PAYSLIP_STATUS]
+AMOUNT_FIELDS = (('gross', 'gross_salary'), ('deductions', 'deductions'), ('net', 'net_salary'))
+GROUP_BY_CHOICES = ('employee', 'month')
+
+
+def summary_queryset(hub_id, period_start=None, period_end=None, by_month=False):
+    """
+    Payslips of a hub whose period lies within the given range.
+
+    With ``by_month`` (whole-month ranges) a payslip counts in the month of
+    its ``period_start``, as in the rollups, even if it ends after the range.
+    """
+    qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False)
+    if period_start:
+        qs = qs.filter(period_start__gte=period_start)
+    if period_end and by_month:
+        qs = qs.filter(period_start__lt=next_month(period_end))
+    elif period_end:
+        qs = qs.filter(period_end__lte=period_end)
+    return qs
+
+
+def _aggregates():
+    aggregates = {'count': Count('id')}
+    for key, field in AMOUNT_FIELDS:
+        aggregates[f'total_{key}'] = Sum(field)
+    for status in STATUSES:
+        in_status = Q(status=status)
+        aggregates[f'{status}__count'] = Count('id', filter=in_status)
+        for key, field in AMOUNT_FIELDS:
+            aggregates[f'{status}__{key}'] = Sum(field, filter=in_status)
+    return aggregates
+
+
+CENT = Decimal('0.01')
+
+
+def money(value):
+    """Render an amount as a string with two decimals (None counts as zero)."""
+    return str(Decimal(value or 0).quantize(CENT))
+
+
+def _format(row):
+    return {
+        'total_gross': money(row['total_gross']),
+        'total_deductions': money(row['total_deductions']),
+        'total_net': money(row['total_net']),
+        'count': row['count'],
+        'by_status': {status: row[f'{status}__count'] for status in STATUSES},
+        'amounts_by_status': {
+            status: {key: money(row[f'{status}__{key}']) for key, _field in AMOUNT_FIELDS}
+            for status in STATUSES
+        },
+    }
+
+
+def _sum_rows(rows):
+    total = dict.fromkeys(_aggregates(), 0)
+    for row in rows:
+        for key in total:
+            total[key] += row[key] or 0
+    return total
+
+
+def _as_date(value):
+    return Payslip._meta.get_field('period_start').to_python(value) if value else None
+
+
+def is_month_aligned(period_start=None, period_end=None):
+    """True when the range starts on a 1st and ends on a month's last day (open ends allowed)."""
+    if period_start and period_start.day != 1:
+        return False
+    if period_end and period_end.day != calendar.monthrange(period_end.year, period_end.month)[1]:
+        return False
+    return True
+
+
+def _summary_plan(hub_id, period_start, period_end, group_by, use_rollups):
+    """``(period_start, period_end, group_by, use rollups?, queryset)`` of a summary request."""
+    period_start, period_end = _as_date(period_start), _as_date(period_end)
+    if group_by not in GROUP_BY_CHOICES:
+        group_by = None
+    by_month = is_month_aligned(period_start, period_end)
+    from_rollups = use_rollups and group_by != 'employee' and by_month
+    qs = summary_queryset(hub_id, period_start, period_end, by_month=by_month)
+    if group_by == 'employee':
+        qs = (
+            qs.order_by().values('employee_id')
+            .annotate(employee_name=Max('employee_name'), **_aggregates())
+            .order_by('employee_name', 'employee_id')
+        )
+    elif group_by == 'month':
+        qs = qs.order_by().annotate(month=TruncMonth('period_start')).values('month').annotate(**_aggregates()).order_by('month')
+    return period_start, period_end, group_by, from_rollups, qs
+
+
+def payroll_summary(hub_id, period_start=None, period_end=None, group_by=None, use_rollups=True):
+    """
+    Summarize payslips of a hub for a period range in one query.
+
+    ``group_by`` may be ``'employee'`` or ``'month'`` (month of
+    ``period_start``) to add a ``breakdown`` list to the result. Whole-month
+    ranges count payslips by the month of ``period_start``; without an
+    employee breakdown they are read from the rollup table.
+    """
+    period_start, period_end, group_by, from_rollups, qs = _summary_plan(hub_id, period_start, period_end, group_by, use_rollups)
+    if from_rollups:
+        return _summarize_rows(rollup_rows(hub_id, period_start, period_end), group_by)
+    if group_by is None:
+        return _format(qs.aggregate(**_aggregates()))
+    return _summarize_rows(list(qs), group_by)
+
+
+async def apayroll_summary(hub_id, period_start=None, period_end=None, group_by=None, use_rollups=True):
+    """``payroll_summary`` on the async ORM (``aaggregate`` / async iteration)."""
+    period_start, period_end, group_by, from_rollups, qs = _summary_plan(hub_id, period_start, period_end, group_by, use_rollups)
+    if from_rollups:
+        return _summarize_rows(await arollup_rows(hub_id, period_start, period_end), group_by)
+    if group_by is None:
+        return _format(await qs.aaggregate(**_aggregates()))
+    return _summarize_rows([row async for row in qs], group_by)
+
+
+def _summarize_rows(rows, group_by):
+    result = _format(_sum_rows(rows))
+    if group_by is None:
+        return result
+    breakdown = []
+    for row in rows:
+        entry = _format(row)
+        if group_by == 'employee':
+            entry = {'employee_id': str(row['employee_id']), 'employee_name': row['employee_name'], **entry}
+        else:
+            entry = {'month': row['month'].strftime('%Y-%m'), **entry}
+        breakdown.append(entry)
+    result['breakdown'] = breakdown
+    return result
+
+
+def cached_payroll_summary(hub_id, period_start=None, period_end=None, group_by=None):
+    """``payroll_summary`` served from the per-hub cache."""
+    return cached(
+        hub_id, 'summary', (period_start, period_end, group_by),
+        lambda: payroll_summary(hub_id, period_start, period_end, group_by),
+    )
+
+
+async def acached_payroll_summary(hub_id, period_start=None, period_end=None, group_by=None):
+    """``apayroll_summary`` served from the per-hub cache."""
+    return await acached(
+        hub_id, 'summary', (period_start, period_end, group_by),
+        lambda: apayroll_summary(hub_id, period_start, period_end, group_by),
+    )
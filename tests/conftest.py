@@ -1,12 +1,15 @@
 """Pytest fixtures for payroll module tests."""
 import uuid
 import pytest
+from contextlib import contextmanager
 from decimal import Decimal
 from django.utils import timezone
 from django.contrib.auth.hashers import make_password
 
 from apps.accounts.models import LocalUser
 from apps.configuration.models import HubConfig, StoreConfig
+from payroll.factories import seed_payslips
+from payroll.instrumentation import call_measured
 from payroll.models import Payslip
 
 
@@ -70,6 +73,7 @@ def payslip(db, hub_id):
     """Create a test Payslip."""
     return Payslip.objects.create(
         hub_id=hub_id,
+        employee_id=uuid.uuid4(),
         employee_name='Test Employee Name',
         period_start=timezone.now().date(),
         period_end=timezone.now().date(),
@@ -77,3 +81,43 @@ def payslip(db, hub_id):
         deductions=Decimal('0.00'),
     )
 
+
+@pytest.fixture
+def payslip_factory(db, hub_id):
+    """Bulk-seed the test hub: ``payslip_factory(employees=50, periods=12, seed=0)``."""
+    def seed(**kwargs):
+        return seed_payslips(hub_id, **kwargs)
+    return seed
+
+
+@pytest.fixture
+def query_budget(settings):
+    """
+    Assert every call of an instrumented view or tool stays within a query budget::
+
+        with query_budget('payslips_list', 2):
+            auth_client.get(url)
+
+    Yields the list of recorded metrics dicts.
+    """
+    settings.PAYROLL_INSTRUMENTATION = True
+
+    @contextmanager
+    def budget(name, max_queries):
+        calls = []
+
+        def collect(sender, name, metrics, **kwargs):
+            if name == f'payroll.{budget_name}':
+                calls.append(metrics)
+
+        budget_name = name
+        call_measured.connect(collect, weak=False)
+        try:
+            yield calls
+        finally:
+            call_measured.disconnect(collect)
+        assert calls, f'{name} was not called'
+        over = [metrics for metrics in calls if metrics['queries'] > max_queries]
+        assert not over, f'{name} exceeded its budget of {max_queries} queries: {over}'
+
+    return budget
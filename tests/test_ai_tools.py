@@ -0,0 +1,119 @@
+"""Tests for the payroll AI tools."""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.test import RequestFactory
+
+from payroll.ai_tools import BulkUpdatePayslipStatus, GetPayrollSummary, ListPayslips
+from payroll.models import Payslip
+
+
+def _request(hub_id):
+    request = RequestFactory().get('/')
+    request.session = {'hub_id': str(hub_id)}
+    return request
+
+
+@pytest.fixture
+def payslips(db, hub_id):
+    """Six months of payslips for two employees, plus another hub's and a deleted one."""
+    employees = [uuid.uuid4(), uuid.uuid4()]
+    created = [
+        Payslip(
+            hub_id=hub_id, employee_id=employees[i % 2], employee_name=f'Employee {i % 2}',
+            period_start=date(2025, 1 + i // 2, 1), period_end=date(2025, 1 + i // 2, 28),
+            gross_salary=Decimal('1000.00'), deductions=Decimal('200.00'), net_salary=Decimal('800.00'),
+            status=('draft', 'confirmed', 'paid')[i % 3],
+        )
+        for i in range(12)
+    ]
+    created.append(Payslip(hub_id=uuid.uuid4(), employee_id=employees[0], employee_name='Other hub',
+                           period_start=date(2025, 1, 1), period_end=date(2025, 1, 28)))
+    created.append(Payslip(hub_id=hub_id, employee_id=employees[0], employee_name='Deleted',
+                           period_start=date(2025, 1, 1), period_end=date(2025, 1, 28), is_deleted=True))
+    Payslip.objects.bulk_create(created)
+    return employees
+
+
+@pytest.mark.django_db
+class TestListPayslips:
+    """list_payslips tool tests."""
+
+    def test_hub_scoped(self, hub_id, payslips):
+        """Test other hubs and deleted payslips are left out."""
+        result = ListPayslips().execute({'limit': 100}, _request(hub_id))
+        assert len(result['payslips']) == 12
+        assert result['next_cursor'] is None
+        assert {row['employee_name'] for row in result['payslips']} == {'Employee 0', 'Employee 1'}
+
+    def test_serialized_fields(self, hub_id, payslips):
+        """Test rows carry the same string fields as before, newest period first."""
+        row = ListPayslips().execute({'limit': 1}, _request(hub_id))['payslips'][0]
+        assert set(row) == {'id', 'employee_name', 'period_start', 'period_end', 'gross_salary', 'deductions', 'net_salary', 'status'}
+        assert row['period_start'] == '2025-06-01'
+        assert row['net_salary'] == '800.00'
+
+    def test_cursor_walk(self, hub_id, payslips):
+        """Test cursors continue where the previous page stopped."""
+        seen, cursor = [], None
+        while True:
+            result = ListPayslips().execute({'limit': 5, **({'cursor': cursor} if cursor else {})}, _request(hub_id))
+            seen.extend(row['id'] for row in result['payslips'])
+            cursor = result['next_cursor']
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == 12
+
+    def test_filters(self, hub_id, payslips):
+        """Test status sets, employee and period range filters."""
+        result = ListPayslips().execute({
+            'statuses': ['confirmed', 'paid'], 'employee_id': str(payslips[0]),
+            'period_start': '2025-02-01', 'period_end': '2025-05-31',
+        }, _request(hub_id))
+        rows = result['payslips']
+        assert rows and all(row['status'] in ('confirmed', 'paid') for row in rows)
+        assert all('2025-02-01' <= row['period_start'] <= '2025-05-01' for row in rows)
+        assert all(row['employee_name'] == 'Employee 0' for row in rows)
+
+    def test_limit_capped(self, hub_id, payslips, django_assert_num_queries):
+        """Test the limit is capped and a page is one query."""
+        with django_assert_num_queries(1) as ctx:
+            ListPayslips().execute({'limit': 100000}, _request(hub_id))
+        assert 'LIMIT 201' in ctx.captured_queries[0]['sql']
+
+    def test_malformed_period(self, hub_id, payslips):
+        """Test an invalid period filter returns a tool error instead of raising."""
+        result = ListPayslips().execute({'period_end': '2025-02-30'}, _request(hub_id))
+        assert set(result) == {'error'}
+
+
+@pytest.mark.django_db
+class TestBulkUpdatePayslipStatus:
+    """Bulk status tool."""
+
+    def test_malformed_ids_rejected(self, hub_id, payslips):
+        """Test ids that are not UUIDs count as rejected instead of failing the tool."""
+        draft = Payslip.objects.filter(hub_id=hub_id, status='draft').first()
+        args = {'action': 'confirm', 'payslip_ids': [str(draft.pk), 'not-a-uuid', '42']}
+        result = BulkUpdatePayslipStatus().execute(args, _request(hub_id))
+        assert result == {'action': 'confirm', 'moved': 1, 'rejected': 2}
+        draft.refresh_from_db()
+        assert draft.status == 'confirmed'
+
+
+@pytest.mark.django_db
+class TestGetPayrollSummary:
+    """Summary tool."""
+
+    def test_period_dates(self, hub_id, payslips):
+        """Test the period bounds are parsed before the summary is read."""
+        result = GetPayrollSummary().execute({'period_start': '2025-01-01', 'period_end': '2025-01-28'}, _request(hub_id))
+        assert result['count'] == 2
+
+    @pytest.mark.parametrize('args', [{'period_start': '2025-13-01'}, {'period_end': 'last month'}])
+    def test_malformed_dates(self, hub_id, args):
+        """Test a malformed period returns a tool error instead of raising."""
+        result = GetPayrollSummary().execute(args, _request(hub_id))
+        assert set(result) == {'error'}
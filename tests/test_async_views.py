@@ -0,0 +1,96 @@
+"""Tests for the async (ASGI) payslip list and dashboard views."""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+
+from payroll.models import Payslip
+from payroll.rollups import rebuild_rollups
+from payroll.summary import apayroll_summary, payroll_summary
+from payroll.views import apaginate
+
+
+@pytest.fixture
+def payslips(db, hub_id):
+    created = Payslip.objects.bulk_create(
+        Payslip(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name=f'Employee {i:02d}',
+            period_start=date(2025, 1 + i % 3, 1), period_end=date(2025, 1 + i % 3, 28),
+            gross_salary=Decimal('1000.00') + i, deductions=Decimal('100.00'), net_salary=Decimal('900.00') + i,
+            status=('draft', 'confirmed', 'paid')[i % 3],
+        )
+        for i in range(30)
+    )
+    rebuild_rollups(hub_id)
+    return created
+
+
+@pytest.mark.django_db
+class TestAsyncSummary:
+    """apayroll_summary returns exactly what payroll_summary does."""
+
+    @pytest.mark.parametrize('group_by', [None, 'employee', 'month'])
+    def test_matches_sync(self, hub_id, payslips, group_by):
+        """Test every summary shape on the async ORM."""
+        for period in [(None, None), (date(2025, 2, 1), date(2025, 3, 31)), (date(2025, 1, 10), None)]:
+            expected = payroll_summary(hub_id, *period, group_by=group_by)
+            assert async_to_sync(apayroll_summary)(hub_id, *period, group_by=group_by) == expected
+
+
+@pytest.mark.django_db
+class TestAsyncPagination:
+    """apaginate mirrors Paginator.get_page."""
+
+    def test_page_and_count(self, hub_id, payslips):
+        """Test the page rows and the count."""
+        qs = Payslip.objects.filter(hub_id=hub_id).order_by('employee_name', 'id')
+        page = async_to_sync(apaginate)(qs, 12, '2')
+        assert page.paginator.count == 30
+        assert [p.employee_name for p in page] == [f'Employee {i:02d}' for i in range(12, 24)]
+        assert page.has_next() and page.has_previous()
+
+    @pytest.mark.parametrize('number, expected', [('99', 3), ('abc', 1), ('0', 1)])
+    def test_out_of_range(self, hub_id, payslips, number, expected, django_assert_num_queries):
+        """Test invalid and out-of-range pages fall back like get_page, with one COUNT and one page SELECT."""
+        qs = Payslip.objects.filter(hub_id=hub_id).order_by('id')
+        with django_assert_num_queries(2):
+            page = async_to_sync(apaginate)(qs, 12, number)
+        assert page.number == expected
+        assert len(page) == (6 if expected == 3 else 12)
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """The async routes render the same pages as the sync ones."""
+
+    def test_list_matches_sync(self, auth_client, payslips):
+        """Test the async list shows the same page as the sync list."""
+        params = {'sort': 'employee_name', 'dir': 'desc', 'page': 2}
+        sync_response = auth_client.get(reverse('payroll:payslips_list'), params)
+        async_response = auth_client.get(reverse('payroll:payslips_list_async'), params)
+        assert async_response.status_code == 200
+        assert [p.pk for p in async_response.context['payslips']] == [p.pk for p in sync_response.context['payslips']]
+        assert async_response.context['page_obj'].paginator.count == 30
+
+    def test_list_partial(self, auth_client, payslips):
+        """Test HTMX table refreshes render only the list partial."""
+        response = auth_client.get(
+            reverse('payroll:payslips_list_async'), {'q': 'Employee 07'},
+            HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body',
+        )
+        assert response.status_code == 200
+        assert [p.employee_name for p in response.context['payslips']] == ['Employee 07']
+
+    def test_dashboard(self, auth_client, payslips):
+        """Test the async dashboard counts every payslip."""
+        response = auth_client.get(reverse('payroll:dashboard_async'))
+        assert response.status_code == 200
+        assert response.context['total_payslips'] == 30
+
+    def test_requires_auth(self, client):
+        """Test the async views redirect anonymous users."""
+        assert client.get(reverse('payroll:payslips_list_async')).status_code == 302
+        assert client.get(reverse('payroll:dashboard_async')).status_code == 302
@@ -0,0 +1,160 @@
+"""Tests for the payslip audit log."""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from payroll.ai_tools import ListPayslipAuditLog, UpdatePayslipStatus
+from payroll.audit import audit_context, audit_trail
+from payroll.models import Payslip, PayslipAuditLog
+from payroll.transitions import bulk_transition
+
+
+def _payslip(hub_id, status='draft', **kwargs):
+    return Payslip.objects.create(
+        hub_id=hub_id, employee_id=uuid.uuid4(), employee_name='Employee', status=status,
+        period_start=date(2025, 1, 1), period_end=date(2025, 1, 31),
+        gross_salary=Decimal('1000.00'), deductions=Decimal('200.00'), net_salary=Decimal('800.00'), **kwargs,
+    )
+
+
+def _request(user):
+    request = RequestFactory().post('/')
+    request.session = {'hub_id': str(user.hub_id), 'local_user_id': str(user.id), 'user_name': user.name}
+    return request
+
+
+@pytest.mark.django_db
+class TestAuditLog:
+    """Audit entries written by single and bulk payslip changes."""
+
+    def test_creation_not_logged(self, hub_id):
+        """Test creating a payslip writes no audit entry."""
+        _payslip(hub_id)
+        assert not PayslipAuditLog.objects.exists()
+
+    def test_edit_logs_changed_fields(self, hub_id):
+        """Test an edit records only the fields that changed, as stored values."""
+        payslip = Payslip.objects.get(pk=_payslip(hub_id).pk)
+        payslip.gross_salary = '1000'
+        payslip.deductions = '250.5'
+        payslip.notes = 'Bonus'
+        with audit_context(actor_name='Admin', source='test'):
+            payslip.save()
+        entry = audit_trail(payslip.pk).get()
+        assert entry.action == 'update'
+        assert entry.changes == {'deductions': ['200.00', '250.50'], 'notes': ['', 'Bonus']}
+        assert (entry.actor_name, entry.source, entry.hub_id) == ('Admin', 'test', hub_id)
+
+    def test_unchanged_save_not_logged(self, hub_id):
+        """Test saving without changes writes nothing."""
+        Payslip.objects.get(pk=_payslip(hub_id).pk).save()
+        assert not PayslipAuditLog.objects.exists()
+
+    def test_consecutive_saves_diff_against_last_save(self, hub_id):
+        """Test a second save of the same instance only records the second change."""
+        payslip = Payslip.objects.get(pk=_payslip(hub_id).pk)
+        payslip.status = 'confirmed'
+        payslip.save(update_fields=['status', 'updated_at'])
+        payslip.notes = 'Checked'
+        payslip.save()
+        assert [(e.action, e.changes) for e in audit_trail(payslip.pk)] == [
+            ('confirm', {'status': ['draft', 'confirmed']}),
+            ('update', {'notes': ['', 'Checked']}),
+        ]
+
+    def test_hard_delete_logs_last_values(self, hub_id):
+        """Test a hard delete keeps the payslip's last values in the log."""
+        payslip = Payslip.objects.get(pk=_payslip(hub_id).pk)
+        pk = payslip.pk
+        payslip.delete()
+        entry = audit_trail(pk).get()
+        assert entry.action == 'delete'
+        assert entry.changes['net_salary'] == ['800.00', None]
+
+    def test_bulk_transition_one_insert(self, hub_id):
+        """Test a bulk transition logs every moved payslip with one INSERT in its transaction."""
+        payslips = [_payslip(hub_id), _payslip(hub_id, status='confirmed'), _payslip(hub_id, status='paid')]
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        with CaptureQueriesContext(connection) as ctx:
+            bulk_transition(qs, 'cancel', hub_id)
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "payroll_payslip_audit"')]
+        assert len(inserts) == 1
+        logged = {e.payslip_id: e.changes['status'] for e in PayslipAuditLog.objects.filter(action='cancel')}
+        assert logged == {payslips[0].pk: ['draft', 'cancelled'], payslips[1].pk: ['confirmed', 'cancelled']}
+
+    def test_pay_logs_paid_date(self, hub_id):
+        """Test paying records the paid date next to the status."""
+        payslip = _payslip(hub_id, status='confirmed')
+        bulk_transition(Payslip.objects.filter(pk=payslip.pk), 'pay', hub_id)
+        changes = audit_trail(payslip.pk).get().changes
+        assert changes['status'] == ['confirmed', 'paid']
+        assert changes['paid_date'][0] is None and changes['paid_date'][1]
+
+    def test_append_only(self, hub_id):
+        """Test audit entries cannot be changed or deleted."""
+        payslip = _payslip(hub_id, status='confirmed')
+        bulk_transition(Payslip.objects.filter(pk=payslip.pk), 'pay', hub_id)
+        entry = PayslipAuditLog.objects.get()
+        with pytest.raises(TypeError):
+            PayslipAuditLog.objects.update(action='update')
+        with pytest.raises(TypeError):
+            PayslipAuditLog.objects.all().delete()
+        with pytest.raises(TypeError):
+            entry.save()
+        with pytest.raises(TypeError):
+            entry.delete()
+
+
+@pytest.mark.django_db
+class TestAuditAttribution:
+    """Views and AI tools attribute their changes to the session's user."""
+
+    def test_delete_view(self, auth_client, admin_user, hub_id):
+        """Test a soft delete from the table is logged as the signed-in user."""
+        payslip = _payslip(hub_id)
+        auth_client.post(reverse('payroll:payslip_delete', args=[payslip.pk]))
+        entry = audit_trail(payslip.pk).get()
+        assert entry.action == 'delete' and entry.changes == {'is_deleted': [False, True]}
+        assert (entry.actor_id, entry.actor_name, entry.source) == (admin_user.id, admin_user.name, 'view:payslip_delete')
+
+    def test_bulk_delete_view(self, auth_client, admin_user, hub_id):
+        """Test a bulk delete logs every removed payslip."""
+        payslips = [_payslip(hub_id), _payslip(hub_id)]
+        auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': ','.join(str(p.pk) for p in payslips), 'action': 'delete'})
+        entries = PayslipAuditLog.objects.filter(action='delete')
+        assert {e.payslip_id for e in entries} == {p.pk for p in payslips}
+        assert {e.actor_id for e in entries} == {admin_user.id}
+
+    def test_tool(self, admin_user, hub_id):
+        """Test an AI tool status change is logged with the tool as source."""
+        payslip = _payslip(hub_id)
+        UpdatePayslipStatus().execute({'payslip_id': str(payslip.pk), 'action': 'confirm'}, _request(admin_user))
+        entry = audit_trail(payslip.pk).get()
+        assert (entry.action, entry.actor_id, entry.source) == ('confirm', admin_user.id, 'tool:update_payslip_status')
+
+    def test_list_tool(self, admin_user, hub_id):
+        """Test the audit log tool pages through the hub's entries, newest first."""
+        payslips = [_payslip(hub_id) for _ in range(3)]
+        bulk_transition(Payslip.objects.filter(hub_id=hub_id), 'confirm', hub_id)
+        bulk_transition(Payslip.objects.filter(pk=payslips[0].pk), 'cancel', hub_id)
+        other_hub = uuid.uuid4()
+        bulk_transition(Payslip.objects.filter(pk=_payslip(other_hub).pk), 'confirm', other_hub)
+        tool = ListPayslipAuditLog()
+        first = tool.execute({'limit': 2}, _request(admin_user))
+        assert first['entries'][0]['action'] == 'cancel'
+        second = tool.execute({'limit': 2, 'cursor': first['next_cursor']}, _request(admin_user))
+        assert len(first['entries']) + len(second['entries']) == 4
+        assert second['next_cursor'] is None
+        only = tool.execute({'payslip_id': str(payslips[0].pk)}, _request(admin_user))
+        assert [e['action'] for e in only['entries']] == ['cancel', 'confirm']
+
+    def test_list_tool_malformed_bounds(self, admin_user, hub_id):
+        """Test an invalid since/until returns a tool error instead of raising."""
+        tool = ListPayslipAuditLog()
+        assert set(tool.execute({'since': 'yesterday'}, _request(admin_user))) == {'error'}
+        assert set(tool.execute({'until': '2025-01-01T25:00'}, _request(admin_user))) == {'error'}
@@ -0,0 +1,53 @@
+"""Tests for the per-hub summary cache."""
+import uuid
+import pytest
+from django.urls import reverse
+
+from payroll.caching import cache_stats, cached, invalidate_hub, reset_cache_stats
+from payroll.summary import cached_payroll_summary
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    """Start every test with an empty cache."""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestCaching:
+    """Cache layer tests."""
+
+    def test_hit_and_miss_counters(self, hub_id):
+        """Test the second lookup is a hit."""
+        reset_cache_stats()
+        calls = []
+        for _ in range(2):
+            cached(hub_id, 'x', (), lambda: calls.append(1) or 'value')
+        assert len(calls) == 1
+        assert cache_stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    def test_invalidate_is_per_hub(self, hub_id):
+        """Test invalidating one hub keeps other hubs cached."""
+        other_hub = uuid.uuid4()
+        cached(hub_id, 'x', (), lambda: 'a')
+        cached(other_hub, 'x', (), lambda: 'b')
+        invalidate_hub(hub_id)
+        assert cached(hub_id, 'x', (), lambda: 'fresh') == 'fresh'
+        assert cached(other_hub, 'x', (), lambda: 'fresh') == 'b'
+
+    def test_payslip_save_invalidates_summary(self, hub_id, payslip):
+        """Test post_save invalidates cached summaries."""
+        assert cached_payroll_summary(hub_id)['count'] == 1
+        payslip.is_deleted = True
+        payslip.save()
+        assert cached_payroll_summary(hub_id)['count'] == 0
+
+    def test_bulk_action_invalidates_dashboard(self, auth_client, hub_id, payslip):
+        """Test the bulk update() path invalidates the dashboard."""
+        url = reverse('payroll:dashboard')
+        assert auth_client.get(url).context['total_payslips'] == 1
+        auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': str(payslip.pk), 'action': 'delete'})
+        assert auth_client.get(url).context['total_payslips'] == 0
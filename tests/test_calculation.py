@@ -0,0 +1,105 @@
+"""Tests for the payroll calculation engine."""
+import io
+import random
+import uuid
+import pytest
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from payroll import calculation
+from payroll.calculation import DeductionRules, calculate_batch, from_cents, to_cents
+from payroll.generation import generate_period
+from payroll.imports import import_payslips, iter_csv_rows
+from payroll.models import Payslip
+
+RULES = {
+    'tax_brackets': [['0', '19'], ['1037.50', '24'], ['1683.33', '30'], ['5000', '37']],
+    'social_security_rate': '6.35',
+    'social_security_cap': '4720.50',
+    'fixed_deductions': ['12.05', '3.10'],
+}
+
+
+def _decimal_reference(gross, config):
+    """The same rules evaluated with Decimal arithmetic."""
+    cent = Decimal('0.01')
+    base = min(gross, Decimal(config['social_security_cap']))
+    social = (base * Decimal(config['social_security_rate']) / 100).quantize(cent, ROUND_HALF_UP)
+    taxable = gross - social
+    brackets = [(Decimal(start), Decimal(rate)) for start, rate in config['tax_brackets']]
+    ends = [start for start, _rate in brackets[1:]] + [None]
+    tax = Decimal(0)
+    for (start, rate), end in zip(brackets, ends):
+        if taxable > start:
+            tax += ((min(taxable, end) if end is not None else taxable) - start) * rate / 100
+    tax = tax.quantize(cent, ROUND_HALF_UP)
+    fixed = sum(Decimal(amount) for amount in config['fixed_deductions'])
+    deductions = min(social + tax + fixed, gross)
+    return deductions, gross - deductions
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def backend(request, monkeypatch):
+    """Run each test with and without NumPy."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(calculation, 'numpy', None)
+    return request.param
+
+
+class TestCalculation:
+    """Calculation engine tests."""
+
+    def test_matches_decimal(self, backend):
+        """Test batch results equal the Decimal reference, cent for cent."""
+        rng = random.Random(7)
+        grosses = [Decimal(rng.randint(0, 1500000)).scaleb(-2) for _ in range(2000)]
+        grosses += [Decimal('0.00'), Decimal('0.01'), Decimal('1037.50'), Decimal('4720.50'), Decimal('10.00')]
+        rules = DeductionRules.from_config(RULES)
+        deductions, net = calculate_batch([to_cents(g) for g in grosses], rules)
+        for gross, d, n in zip(grosses, deductions, net):
+            assert (from_cents(d), from_cents(n)) == _decimal_reference(gross, RULES)
+
+    def test_single_matches_batch(self, backend):
+        """Test the scalar reference agrees with the batch path."""
+        rules = DeductionRules.from_config(RULES)
+        deductions, net = calculate_batch([250000], rules)
+        assert rules.calculate(250000) == (int(deductions[0]), int(net[0]))
+
+    def test_deductions_never_exceed_gross(self, backend):
+        """Test fixed deductions cannot make net negative."""
+        rules = DeductionRules.from_config({'fixed_deductions': ['50.00']})
+        deductions, net = calculate_batch([1000], rules)
+        assert (int(deductions[0]), int(net[0])) == (1000, 0)
+
+
+@pytest.mark.django_db
+class TestPricing:
+    """Engine integration tests."""
+
+    def test_generation_prices_drafts(self, settings, hub_id, admin_user):
+        """Test generated drafts are priced from the carried-forward gross."""
+        settings.PAYROLL_DEDUCTION_RULES = RULES
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=admin_user.id, employee_name=admin_user.name,
+            period_start=date(2025, 2, 1), period_end=date(2025, 2, 28),
+            gross_salary=Decimal('2000.00'), deductions=Decimal('0.00'), net_salary=Decimal('2000.00'),
+        )
+        generate_period(hub_id, date(2025, 3, 1), date(2025, 3, 31))
+        payslip = Payslip.objects.get(hub_id=hub_id, period_start=date(2025, 3, 1))
+        assert (payslip.deductions, payslip.net_salary) == _decimal_reference(Decimal('2000.00'), RULES)
+
+    def test_import_prices_blank_rows(self, settings, hub_id):
+        """Test imported rows without deductions and net are priced; explicit figures are kept."""
+        settings.PAYROLL_DEDUCTION_RULES = RULES
+        data = (
+            'employee_id,employee_name,period_start,period_end,gross_salary,deductions,net_salary\n'
+            f'{uuid.uuid4()},Priced,2025-01-01,2025-01-31,3000.00,,\n'
+            f'{uuid.uuid4()},Explicit,2025-01-01,2025-01-31,3000.00,100.00,2900.00\n'
+        ).encode()
+        result = import_payslips(iter_csv_rows(io.BytesIO(data)), hub_id)
+        assert result['created'] == 2
+        priced = Payslip.objects.get(hub_id=hub_id, employee_name='Priced')
+        assert (priced.deductions, priced.net_salary) == _decimal_reference(Decimal('3000.00'), RULES)
+        assert Payslip.objects.get(hub_id=hub_id, employee_name='Explicit').net_salary == Decimal('2900.00')
@@ -0,0 +1,127 @@
+"""Tests for payslip document rendering and the render cache."""
+import io
+import os
+import zipfile
+import pytest
+from datetime import date
+from django.core.management import call_command
+from django.urls import reverse
+
+from payroll import documents
+from payroll.documents import cached_document, iter_period_zip, render_document, render_period
+from payroll.models import Payslip
+
+MONTH = date(2025, 1, 1)
+
+
+@pytest.fixture
+def document_root(settings, tmp_path):
+    settings.PAYROLL_DOCUMENT_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def month(payslip_factory, store_config, hub_id):
+    payslip_factory(employees=6, periods=1, start=MONTH, with_users=False)
+    return hub_id
+
+
+@pytest.mark.django_db
+class TestDocuments:
+    """Rendering, caching and ZIP streaming tests."""
+
+    def test_render_html(self, payslip, store_config):
+        """Test the HTML document shows the employee, amounts and business."""
+        html = render_document(payslip, 'html').decode()
+        assert payslip.employee_name in html
+        assert str(payslip.net_salary) in html
+        assert 'Test Store' in html
+
+    def test_unknown_format(self, payslip, store_config):
+        """Test unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            render_document(payslip, 'docx')
+
+    def test_cache_hit_until_updated(self, payslip, store_config, document_root, monkeypatch):
+        """Test an unchanged payslip is rendered once and an edited one again."""
+        calls = []
+        original = documents.render_document
+        monkeypatch.setattr(documents, 'render_document', lambda *args: calls.append(1) or original(*args))
+        first = cached_document(payslip, 'html')
+        assert cached_document(Payslip.objects.get(pk=payslip.pk), 'html') == first
+        assert len(calls) == 1
+        payslip.employee_name = 'Renamed Employee'
+        payslip.save()
+        second = cached_document(payslip, 'html')
+        assert second != first and len(calls) == 2
+        assert not os.path.exists(first)
+        with open(second, 'rb') as fileobj:
+            assert b'Renamed Employee' in fileobj.read()
+
+    def test_newer_rendering_is_kept(self, payslip, store_config, document_root):
+        """Test a stale instance neither removes nor replaces the rendering of a newer version."""
+        stale = Payslip.objects.get(pk=payslip.pk)
+        payslip.notes = 'edited'
+        payslip.save()
+        newer = cached_document(payslip, 'html')
+        older = cached_document(stale, 'html')
+        assert os.path.exists(newer) and os.path.exists(older)
+        cached_document(payslip, 'html')
+        assert os.path.exists(older)
+        payslip.notes = 'edited again'
+        payslip.save()
+        cached_document(payslip, 'html')
+        assert not os.path.exists(newer) and not os.path.exists(older)
+
+    def test_render_period(self, month, document_root):
+        """Test a period render skips cached documents on the second pass."""
+        first = render_period(month, MONTH, fmt='html')
+        assert (first['total'], first['rendered'], first['cached']) == (6, 6, 0)
+        second = render_period(month, MONTH, fmt='html')
+        assert (second['rendered'], second['cached']) == (0, 6)
+
+    def test_period_zip(self, month, document_root):
+        """Test the streamed ZIP holds one document per payslip of the month."""
+        chunks = list(iter_period_zip(month, MONTH, fmt='html'))
+        assert len(chunks) > 6
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            names = archive.namelist()
+            assert len(names) == 6
+            assert all('-2025-01-' in name and name.endswith('.html') for name in names)
+            assert b'<html' in archive.read(names[0])
+
+    def test_command(self, month, document_root):
+        """Test the render command reports rendered documents."""
+        out = io.StringIO()
+        call_command('render_payslip_documents', hub_id=str(month), period='2025-01', fmt='html', stdout=out)
+        assert '6 rendered' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestDocumentViews:
+    """Document download views."""
+
+    def test_document_view(self, auth_client, payslip, document_root):
+        """Test a payslip document is served from the cache."""
+        response = auth_client.get(reverse('payroll:payslip_document', args=[payslip.pk]) + '?format=html')
+        assert response.status_code == 200
+        assert payslip.employee_name.encode() in b''.join(response.streaming_content)
+
+    def test_document_replaced_meanwhile(self, auth_client, payslip, document_root, monkeypatch):
+        """Test a rendering removed before it was opened is rendered again instead of failing."""
+        original = documents.cached_document
+        paths = iter([str(document_root / 'removed.html')])
+        monkeypatch.setattr(documents, 'cached_document', lambda *args: next(paths, None) or original(*args))
+        response = auth_client.get(reverse('payroll:payslip_document', args=[payslip.pk]) + '?format=html')
+        assert response.status_code == 200
+        assert payslip.employee_name.encode() in b''.join(response.streaming_content)
+
+    def test_zip_view(self, auth_client, hub_id, payslip_factory, document_root):
+        """Test the period ZIP is streamed as an attachment."""
+        payslip_factory(employees=3, periods=1, start=MONTH, with_users=False)
+        response = auth_client.get(reverse('payroll:payslip_documents_zip') + '?period=2025-01&format=html')
+        assert response.status_code == 200
+        assert response.streaming
+        assert 'payslips-2025-01-html.zip' in response['Content-Disposition']
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            assert len(archive.namelist()) == 3
@@ -0,0 +1,100 @@
+"""Tests for the deterministic payslip factory."""
+import io
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from apps.accounts.models import LocalUser
+from payroll.calculation import to_cents
+from payroll.factories import seed_months, seed_payslips
+from payroll.models import DeductionRuleSet, Payslip
+from payroll.rulesets import hub_rules
+from payroll.summary import payroll_summary
+
+FIELDS = ('id', 'employee_id', 'employee_name', 'period_start', 'gross_salary', 'net_salary', 'status', 'paid_date')
+
+
+def _rows(hub_id):
+    return list(Payslip.objects.filter(hub_id=hub_id).order_by('id').values_list(*FIELDS))
+
+
+@pytest.mark.django_db
+class TestSeedPayslips:
+    """Factory tests."""
+
+    def test_shape(self, hub_id, payslip_factory):
+        """Test one payslip per employee and month, statuses by month."""
+        result = payslip_factory(employees=20, periods=3)
+        assert result['payslips'] == 60
+        assert LocalUser.objects.filter(hub_id=hub_id, is_active=True).count() == 20
+        payslips = Payslip.objects.filter(hub_id=hub_id)
+        assert payslips.count() == 60
+        assert set(payslips.values_list('period_start', flat=True)) == {date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)}
+        expected = {date(2025, 1, 1): 'paid', date(2025, 2, 1): 'confirmed', date(2025, 3, 1): 'draft'}
+        for payslip in payslips.exclude(status='cancelled'):
+            assert payslip.status == expected[payslip.period_start]
+            assert payslip.net_salary == payslip.gross_salary - payslip.deductions
+            assert (payslip.paid_date is not None) == (payslip.status == 'paid')
+
+    def test_deterministic(self, hub_id, payslip_factory):
+        """Test the same seed writes the same rows, ids included."""
+        payslip_factory(employees=10, periods=2, seed=7)
+        first = _rows(hub_id)
+        Payslip.all_objects.filter(hub_id=hub_id).delete()
+        LocalUser.objects.filter(hub_id=hub_id).delete()
+        payslip_factory(employees=10, periods=2, seed=7)
+        assert _rows(hub_id) == first
+        other_hub = uuid.uuid4()
+        seed_payslips(other_hub, employees=10, periods=2, seed=8)
+        assert not {row[0] for row in first} & {row[0] for row in _rows(other_hub)}
+
+    def test_payslips_cap(self, hub_id, payslip_factory):
+        """Test ``payslips`` alone sizes the hub and caps the rows."""
+        result = payslip_factory(payslips=7, periods=3, with_users=False)
+        assert result['employees'] == 3
+        assert Payslip.objects.filter(hub_id=hub_id).count() == 7
+        assert not LocalUser.objects.filter(hub_id=hub_id).exists()
+
+    def test_unseeded_fields_take_defaults(self, hub_id, payslip_factory, monkeypatch):
+        """Test fields the seeder does not set are written with their model defaults."""
+        monkeypatch.setattr(Payslip._meta.get_field('notes'), '_get_default', lambda: 'Seeded')
+        payslip_factory(employees=2, periods=1, with_users=False)
+        payslip = Payslip.objects.filter(hub_id=hub_id).first()
+        assert payslip.notes == 'Seeded'
+        assert (payslip.created_by, payslip.run_id, payslip.is_deleted) == (None, None, False)
+        assert payslip.created_at == payslip.updated_at
+
+    def test_rollups_refreshed(self, hub_id, payslip_factory):
+        """Test the rollup-backed summary matches the seeded rows."""
+        payslip_factory(employees=15, periods=2)
+        from_rollups = payroll_summary(hub_id, date(2025, 1, 1), date(2025, 2, 28))
+        from_rows = payroll_summary(hub_id, date(2025, 1, 1), date(2025, 2, 28), use_rollups=False)
+        assert from_rollups == from_rows
+        assert from_rollups['count'] == 30
+
+    def test_priced_with_hub_rules(self, hub_id, payslip_factory):
+        """Test a hub's deduction rules price the seeded payslips."""
+        DeductionRuleSet.objects.create(hub_id=hub_id, tax_brackets=[['0', '10']], fixed_deductions=Decimal('5.00'))
+        payslip_factory(employees=5, periods=1, with_users=False)
+        rules = hub_rules(str(hub_id))
+        for payslip in Payslip.objects.filter(hub_id=hub_id):
+            assert (to_cents(payslip.deductions), to_cents(payslip.net_salary)) == rules.calculate(to_cents(payslip.gross_salary))
+
+    def test_seed_months_cross_year(self):
+        """Test months roll over the year end."""
+        months = seed_months(date(2025, 11, 1), 3)
+        assert months == [
+            (date(2025, 11, 1), date(2025, 11, 30)), (date(2025, 12, 1), date(2025, 12, 31)),
+            (date(2026, 1, 1), date(2026, 1, 31)),
+        ]
+
+    def test_command(self, hub_id):
+        """Test the management command seeds the given hub."""
+        out = io.StringIO()
+        call_command('seed_payslips', hub_id=str(hub_id), employees=4, periods=2, seed=3, stdout=out)
+        assert Payslip.objects.filter(hub_id=hub_id).count() == 8
+        assert 'Seeding finished.' in out.getvalue()
+        assert LocalUser.objects.filter(hub_id=hub_id).count() == 4
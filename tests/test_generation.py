@@ -0,0 +1,58 @@
+"""Tests for monthly payslip generation."""
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from payroll.generation import generate_period, parse_period
+from payroll.models import Payslip
+from payroll.scheduled_tasks import generate_monthly_payslips
+
+
+@pytest.mark.django_db
+class TestGeneratePeriod:
+    """Batch generator tests."""
+
+    def test_parse_period(self):
+        """Test month bounds from a YYYY-MM string."""
+        assert parse_period('2024-02') == (date(2024, 2, 1), date(2024, 2, 29))
+
+    def test_creates_drafts(self, hub_id, admin_user):
+        """Test a draft payslip is created per active employee."""
+        result = generate_period(hub_id, date(2025, 3, 1), date(2025, 3, 31))
+        assert result['created'] == 1
+        payslip = Payslip.objects.get(hub_id=hub_id, employee_id=admin_user.id)
+        assert payslip.status == 'draft'
+        assert payslip.employee_name == admin_user.name
+
+    def test_rerun_does_not_duplicate(self, hub_id, admin_user):
+        """Test re-running a period only skips existing payslips."""
+        generate_period(hub_id, date(2025, 3, 1), date(2025, 3, 31), batch_size=1)
+        result = generate_period(hub_id, date(2025, 3, 1), date(2025, 3, 31), batch_size=1)
+        assert result['created'] == 0
+        assert result['skipped'] == 1
+        assert Payslip.objects.filter(hub_id=hub_id, employee_id=admin_user.id).count() == 1
+
+    def test_carries_forward_figures(self, hub_id, admin_user):
+        """Test figures are copied from the latest previous payslip."""
+        for month in (1, 4):
+            Payslip.objects.create(
+                hub_id=hub_id, employee_id=admin_user.id, employee_name=admin_user.name,
+                period_start=date(2025, month, 1), period_end=date(2025, month, 28),
+                gross_salary=Decimal('1000.00'), net_salary=Decimal('1000.00'),
+            )
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=admin_user.id, employee_name=admin_user.name,
+            period_start=date(2025, 2, 1), period_end=date(2025, 2, 28),
+            gross_salary=Decimal('2000.00'), deductions=Decimal('300.00'), net_salary=Decimal('1700.00'),
+        )
+        generate_period(hub_id, date(2025, 3, 1), date(2025, 3, 31))
+        payslip = Payslip.objects.get(hub_id=hub_id, employee_id=admin_user.id, period_start=date(2025, 3, 1))
+        assert payslip.net_salary == Decimal('1700.00')
+
+    def test_scheduled_task_payload(self, hub_id, admin_user):
+        """Test the scheduled task reports throughput."""
+        result = generate_monthly_payslips({'period': '2025-03'})
+        assert result['status'] == 'ok'
+        assert result['created'] == 1
+        assert 'rows_per_second' in result
+        assert 'elapsed_seconds' in result
@@ -0,0 +1,84 @@
+"""Tests for the payslip import pipeline."""
+import csv
+import io
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from payroll.imports import import_payslips, iter_csv_rows
+from payroll.models import EmployeeYearToDate, Payslip, PayrollPeriodRollup
+
+HEADER = 'employee_id,employee_name,period_start,period_end,gross_salary,deductions,net_salary,status\n'
+
+
+def _csv(*lines):
+    return (HEADER + ''.join(line + '\n' for line in lines)).encode()
+
+
+@pytest.mark.django_db
+class TestImportPayslips:
+    """Import pipeline tests."""
+
+    def test_valid_rows(self, hub_id):
+        """Test valid rows are inserted and net is computed when blank."""
+        data = _csv(
+            f'{uuid.uuid4()},Ana,2025-01-01,2025-01-31,2000.00,400.00,1600.00,confirmed',
+            f'{uuid.uuid4()},Luis,2025-01-01,2025-01-31,1000.00,,,',
+        )
+        result = import_payslips(iter_csv_rows(io.BytesIO(data)), hub_id, batch_size=1)
+        assert result['created'] == 2
+        assert result['failed'] == 0
+        luis = Payslip.objects.get(hub_id=hub_id, employee_name='Luis')
+        assert luis.net_salary == Decimal('1000.00')
+        assert luis.status == 'draft'
+
+    def test_rejected_rows_are_reported(self, hub_id):
+        """Test invalid rows produce per-row errors and are not inserted."""
+        data = _csv(
+            f'{uuid.uuid4()},Ana,2025-01-01,2025-01-31,2000.00,400.00,1500.00,draft',
+            'not-a-uuid,Luis,2025-01-01,2025-01-31,1000.00,0,1000.00,draft',
+            f'{uuid.uuid4()},Eva,2025-01-01,2025-01-31,1000.00,0,1000.00,draft',
+        )
+        report = io.StringIO()
+        result = import_payslips(iter_csv_rows(io.BytesIO(data)), hub_id, error_writer=csv.writer(report))
+        assert result['created'] == 1
+        assert result['failed'] == 2
+        assert {(e['row'], e['field']) for e in result['errors']} == {(1, 'net_salary'), (2, 'employee_id')}
+        assert len(report.getvalue().splitlines()) == 2
+
+    def test_batches_before_a_failure_refresh_rollups(self, hub_id):
+        """Test a file failing partway keeps its inserted batches' rollups and year-to-date rows current."""
+        employee_id = uuid.uuid4()
+        data = _csv(
+            f'{employee_id},Ana,2025-01-01,2025-01-31,2000.00,400.00,1600.00,confirmed',
+            f'{uuid.uuid4()},Luis,2025-02-01,2025-02-28,1000.00,0,1000.00,draft',
+        )
+
+        def rows():
+            yield from iter_csv_rows(io.BytesIO(data))
+            raise ValueError('truncated file')
+        with pytest.raises(ValueError):
+            import_payslips(rows(), hub_id, batch_size=1)
+        assert PayrollPeriodRollup.objects.get(hub_id=hub_id, period=date(2025, 1, 1), status='confirmed').payslip_count == 1
+        assert PayrollPeriodRollup.objects.get(hub_id=hub_id, period=date(2025, 2, 1), status='draft').payslip_count == 1
+        assert EmployeeYearToDate.objects.get(hub_id=hub_id, employee_id=employee_id).net_total == Decimal('1600.00')
+
+    def test_import_view(self, auth_client, hub_id):
+        """Test uploading a CSV through the import view."""
+        upload = SimpleUploadedFile('payslips.csv', _csv(f'{uuid.uuid4()},Ana,2025-01-01,2025-01-31,100,0,100,draft'))
+        response = auth_client.post(reverse('payroll:payslip_import'), {'file': upload})
+        assert response.status_code == 200
+        assert response.context['result']['created'] == 1
+
+    def test_import_command(self, hub_id, tmp_path):
+        """Test the management command streams a file and writes the error report."""
+        path = tmp_path / 'payslips.csv'
+        path.write_bytes(_csv(f'{uuid.uuid4()},Ana,2025-01-01,2025-01-31,100,0,100,draft', 'bad,row'))
+        errors = tmp_path / 'errors.csv'
+        call_command('import_payslips', str(path), hub_id=str(hub_id), errors_path=str(errors), stdout=io.StringIO())
+        assert Payslip.objects.filter(hub_id=hub_id).count() == 1
+        assert errors.read_text().startswith('row,field,message')
@@ -0,0 +1,55 @@
+"""Query plan tests for the payslip composite indexes."""
+import pytest
+from datetime import date
+from django.db import connection
+from django.db.models import Q
+
+from payroll.models import Payslip
+
+
+@pytest.fixture
+def planner(db):
+    """Discourage sequential scans so tiny test tables still show index plans."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+    elif connection.vendor != 'sqlite':
+        pytest.skip('EXPLAIN assertions only cover SQLite and PostgreSQL')
+
+
+@pytest.mark.django_db
+class TestPayslipIndexes:
+    """EXPLAIN-based index usage tests."""
+
+    def test_list_by_status(self, planner, hub_id):
+        """Test the default list ordering uses the (hub_id, status) index."""
+        qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False).order_by('status')
+        assert 'payroll_ps_hub_status_idx' in qs.explain()
+
+    def test_status_filter(self, planner, hub_id):
+        """Test status filters use the (hub_id, status) index."""
+        qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False, status='draft')
+        assert 'payroll_ps_hub_status_idx' in qs.explain()
+
+    def test_period_range(self, planner, hub_id):
+        """Test summary period ranges use the (hub_id, period_start, period_end) index."""
+        qs = Payslip.objects.filter(
+            hub_id=hub_id, is_deleted=False,
+            period_start__gte=date(2025, 1, 1), period_end__lte=date(2025, 12, 31),
+        )
+        assert 'payroll_ps_hub_period_idx' in qs.explain()
+
+    def test_employee_history(self, planner, hub_id):
+        """Test per-employee lookups use the (hub_id, employee_id, period_start) index."""
+        qs = Payslip.objects.filter(
+            hub_id=hub_id, is_deleted=False, employee_id=hub_id,
+        ).order_by('-period_start')
+        assert 'payroll_ps_hub_emp_idx' in qs.explain()
+
+    def test_employee_id_keyset_page(self, planner, hub_id):
+        """Test cursor pages sorted by employee_id use the (hub_id, employee_id, id) index."""
+        qs = Payslip.objects.filter(
+            Q(employee_id__gt=hub_id) | Q(employee_id=hub_id, id__gt=hub_id),
+            hub_id=hub_id, is_deleted=False,
+        ).order_by('employee_id', 'id')
+        assert 'payroll_ps_hub_empid_idx' in qs.explain()
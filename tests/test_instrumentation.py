@@ -0,0 +1,73 @@
+"""Tests for the opt-in query and latency instrumentation."""
+import logging
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+
+from payroll.ai_tools import ListPayslips
+from payroll.instrumentation import measure
+from payroll.models import Payslip
+from payroll.search import search_backend
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Query budgets of the hot views and tools."""
+
+    def test_payslips_list(self, auth_client, payslip, query_budget):
+        """Test the list costs a COUNT and a page fetch."""
+        with query_budget('payslips_list', 2) as calls:
+            auth_client.get(reverse('payroll:payslips_list'))
+        assert calls[0]['queries'] == 2
+
+    def test_payslips_list_search(self, auth_client, payslip, query_budget):
+        """Test searching does not add queries (once the backend probe is cached)."""
+        search_backend()
+        with query_budget('payslips_list', 2):
+            auth_client.get(reverse('payroll:payslips_list'), {'q': 'Employee', 'sort': 'net_salary'})
+
+    def test_async_list_counts_thread_queries(self, auth_client, payslip, query_budget):
+        """Test queries the async view runs in worker threads are counted."""
+        with query_budget('apayslips_list', 2) as calls:
+            auth_client.get(reverse('payroll:payslips_list_async'))
+        assert calls[0]['queries'] == 2
+
+    def test_tool(self, payslip, admin_user, query_budget):
+        """Test tool calls are measured as payroll.tool.<name>."""
+        request = RequestFactory().get('/')
+        request.session = {'hub_id': str(payslip.hub_id)}
+        with query_budget('tool.list_payslips', 1):
+            result = ListPayslips().execute({}, request)
+        assert len(result['payslips']) == 1
+
+
+@pytest.mark.django_db
+class TestReporting:
+    """Server-Timing header and structured log line."""
+
+    def test_server_timing(self, auth_client, payslip, settings):
+        """Test views report their cost in a Server-Timing header when enabled."""
+        url = reverse('payroll:payslips_list')
+        assert 'Server-Timing' not in auth_client.get(url)
+        settings.PAYROLL_INSTRUMENTATION = True
+        header = auth_client.get(url)['Server-Timing']
+        assert header.startswith('db;dur=') and 'desc="2 queries"' in header and 'app;dur=' in header
+
+    def test_log_line(self, auth_client, payslip, settings, caplog):
+        """Test each call is logged with its metrics attached."""
+        settings.PAYROLL_INSTRUMENTATION = True
+        with caplog.at_level(logging.INFO, logger='payroll.instrumentation'):
+            auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': str(payslip.pk), 'action': 'confirm'})
+        record = next(r for r in caplog.records if r.payroll_metrics['name'] == 'payroll.payslips_bulk_action')
+        assert 'queries=' in record.getMessage()
+        assert record.payroll_metrics['rows'] >= 1  # the UPDATE reports its row
+
+    def test_nested_measurements(self, payslip):
+        """Test an outer measurement includes the queries of inner ones."""
+        with measure('outer') as outer:
+            Payslip.objects.count()
+            with measure('inner') as inner:
+                Payslip.objects.count()
+        assert (outer.queries, inner.queries) == (2, 1)
+        assert outer.total_ms >= inner.total_ms
@@ -0,0 +1,150 @@
+"""Tests for the out-of-band responses of payslip mutations and their query counts."""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from payroll.models import Payslip
+from payroll.rulesets import hub_rules
+from payroll.signals import payslips_changed
+
+HTMX = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+
+
+@pytest.fixture
+def payslips(db, hub_id):
+    created = Payslip.objects.bulk_create(
+        Payslip(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name=f'Employee {i:02d}',
+            period_start=date(2025, 1, 1), period_end=date(2025, 1, 31),
+            gross_salary=Decimal('1000.00'), deductions=Decimal('100.00'), net_salary=Decimal('900.00'),
+            status='draft',
+        )
+        for i in range(30)
+    )
+    # bulk_create sends no signals; build the month's rollups like the bulk write paths do
+    payslips_changed(hub_id, [date(2025, 1, 1)])
+    return created
+
+
+@pytest.fixture(autouse=True)
+def warm_rules(db, hub_id):
+    """Compile the hub's (empty) deduction rules, keyed like the session hub_id, so edits do not count that query."""
+    hub_rules(str(hub_id))
+
+
+def list_state(**overrides):
+    """What the table posts along with a mutation (page 2 of 12, sorted by name)."""
+    state = {
+        'q': '', 'sort': 'employee_name', 'dir': 'asc', 'per_page': '12',
+        'list_total': '30', 'list_start': '13', 'list_rows': '12', 'list_page': '2',
+    }
+    state.update(overrides)
+    return state
+
+
+def edit_data(payslip, **overrides):
+    data = {
+        'employee_id': str(payslip.employee_id), 'employee_name': payslip.employee_name,
+        'period_start': '2025-01-01', 'period_end': '2025-01-31',
+        'gross_salary': '1000.00', 'deductions': '100.00', 'net_salary': '900.00', 'status': 'draft',
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.django_db
+class TestMutationResponses:
+    """Edits and deletes answer with out-of-band swaps instead of a re-queried table."""
+
+    def test_edit_swaps_row(self, auth_client, payslips, django_assert_num_queries):
+        """Test an edit re-renders only its row: session, get, update, audit entry, reload (notes do not touch the rollups)."""
+        target = payslips[15]
+        url = reverse('payroll:payslip_edit', args=[target.pk])
+        with django_assert_num_queries(5):
+            response = auth_client.post(url, {**edit_data(target, notes='Overtime'), **list_state()}, **HTMX)
+        assert response['HX-Reswap'] == 'none'
+        content = response.content.decode()
+        assert f'id="payslip-row-{target.pk}" class="datatable-tr" data-id="{target.pk}" hx-swap-oob="true"' in content
+        assert content.count('<tr ') == 1
+        assert 'datatable-thead' not in content
+
+    def test_edit_moving_row_rerenders_current_page(self, auth_client, payslips, django_assert_num_queries):
+        """Test an edit that changes the sort value re-renders the page the user is on."""
+        target = payslips[15]
+        url = reverse('payroll:payslip_edit', args=[target.pk])
+        with django_assert_num_queries(7):
+            response = auth_client.post(url, {**edit_data(target, employee_name='Employee 99'), **list_state()}, **HTMX)
+        assert 'HX-Reswap' not in response
+        page = response.context['page_obj']
+        assert page.number == 2 and page.paginator.per_page == 12
+        assert response.context['sort_field'] == 'employee_name'
+        assert [p.employee_name for p in page][0] == 'Employee 12'
+
+    def test_edit_leaving_search_removes_row(self, auth_client, payslips):
+        """Test an edited row that no longer matches the search is removed."""
+        target = payslips[15]
+        url = reverse('payroll:payslip_edit', args=[target.pk])
+        state = list_state(q='Employee 15', list_total='1', list_start='1', list_rows='1', list_page='1')
+        response = auth_client.post(url, {**edit_data(target, employee_name='Renamed'), **state, 'sort': 'status'}, **HTMX)
+        # The page would be empty, so the (now empty) table is re-rendered
+        assert list(response.context['payslips']) == []
+
+    def test_delete_removes_row_and_updates_counter(self, auth_client, payslips, django_assert_num_queries):
+        """Test a delete removes its row and decrements the counter without a COUNT."""
+        target = payslips[16]
+        url = reverse('payroll:payslip_delete', args=[target.pk])
+        # session, get, update, audit entry, rollup lock (2) and decrement
+        with django_assert_num_queries(7):
+            response = auth_client.post(url, list_state(), **HTMX)
+        content = response.content.decode()
+        assert f'<tr id="payslip-row-{target.pk}" hx-swap-oob="delete">' in content
+        assert 'Showing 13-23 of 29' in content
+        assert 'name="list_rows" value="11"' in content
+
+    def test_emptying_page_rerenders(self, auth_client, payslips):
+        """Test removing every row of the page falls back to re-rendering the list."""
+        ids = ','.join(str(p.pk) for p in payslips[24:])
+        url = reverse('payroll:payslips_bulk_action')
+        response = auth_client.post(url, {'ids': ids, 'action': 'delete', **list_state(list_start='25', list_rows='6', list_page='3')}, **HTMX)
+        assert response.context['page_obj'].number == 2
+        assert response.context['page_obj'].paginator.count == 24
+
+    def test_bulk_delete(self, auth_client, payslips, django_assert_num_queries):
+        """Test a bulk delete removes the rows: session, savepoint, locked rows, update, audit entries, rollup lock (2) and refresh (2), release."""
+        ids = [payslips[17].pk, payslips[18].pk]
+        url = reverse('payroll:payslips_bulk_action')
+        with django_assert_num_queries(10):
+            response = auth_client.post(url, {'ids': ','.join(map(str, ids)), 'action': 'delete', **list_state()}, **HTMX)
+        content = response.content.decode()
+        assert all(f'<tr id="payslip-row-{pk}" hx-swap-oob="delete">' in content for pk in ids)
+        assert 'Showing 13-22 of 28' in content
+
+    def test_bulk_transition_swaps_rows(self, auth_client, payslips, django_assert_num_queries):
+        """Test a bulk transition re-renders the moved rows only."""
+        ids = [payslips[19].pk, payslips[20].pk]
+        url = reverse('payroll:payslips_bulk_action')
+        # session, savepoint, eligible rows, update, audit entries, rollup lock (2) and refresh (2), YTD lock (2) and refresh (2), release, moved rows
+        with django_assert_num_queries(15):
+            response = auth_client.post(url, {'ids': ','.join(map(str, ids)), 'action': 'confirm', **list_state()}, **HTMX)
+        content = response.content.decode()
+        assert content.count('hx-swap-oob="true"') == 2
+        assert 'confirmed' in content
+        assert 'payslipsBulkResult' in response['HX-Trigger']
+
+    def test_bulk_transition_sorted_by_status_rerenders(self, auth_client, payslips):
+        """Test a status change re-renders the table when it is sorted by status."""
+        url = reverse('payroll:payslips_bulk_action')
+        response = auth_client.post(url, {'ids': str(payslips[0].pk), 'action': 'confirm', **list_state(sort='status', dir='desc')}, **HTMX)
+        page = response.context['page_obj']
+        assert page.number == 2
+        assert response.context['sort_dir'] == 'desc'
+
+    def test_edit_outside_list_redirects(self, auth_client, payslips):
+        """Test the full-page edit form goes back to the list."""
+        target = payslips[0]
+        response = auth_client.post(reverse('payroll:payslip_edit', args=[target.pk]), edit_data(target))
+        assert response.status_code == 204
+        assert response['HX-Redirect'] == reverse('payroll:payslips_list')
@@ -0,0 +1,73 @@
+"""Tests for keyset pagination."""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from payroll.models import Payslip
+from payroll.pagination import decode_cursor, encode_cursor, keyset_page, keyset_values
+
+
+@pytest.fixture
+def payslips(db, hub_id):
+    """Seven payslips with duplicated sort values."""
+    return [
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name=f'Employee {i}',
+            period_start=date(2025, 1, 1), period_end=date(2025, 1, 31),
+            net_salary=Decimal(100 * (i // 2)),
+        )
+        for i in range(7)
+    ]
+
+
+@pytest.mark.django_db
+class TestKeysetPage:
+    """Keyset pagination tests."""
+
+    def test_cursor_roundtrip(self):
+        """Test tokens decode back to their key."""
+        token = encode_cursor('status', True, 'draft', 'abc')
+        assert decode_cursor(token) == ('status', True, 'draft', 'abc', 'next')
+
+    def test_tampered_cursor(self):
+        """Test an invalid token is rejected."""
+        assert decode_cursor('not-a-token') is None
+
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_walk_forward_and_back(self, hub_id, payslips, descending):
+        """Test walking all pages forward and back visits every row once."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        pages, token = [], None
+        while True:
+            page = keyset_page(qs, 'net_salary', descending, per_page=3, token=token)
+            pages.append([p.pk for p in page])
+            if not page.has_next:
+                break
+            token = page.next_cursor
+        seen = [pk for rows in pages for pk in rows]
+        assert sorted(seen) == sorted(p.pk for p in payslips)
+        assert len(pages) == 3
+
+        back = keyset_page(qs, 'net_salary', descending, per_page=3, token=page.prev_cursor)
+        assert [p.pk for p in back] == pages[-2]
+
+    def test_cursor_for_other_sort_restarts(self, hub_id, payslips):
+        """Test a token for another sort field returns the first page."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        first = keyset_page(qs, 'created_at', per_page=3)
+        restarted = keyset_page(qs, 'created_at', per_page=3, token=encode_cursor('status', False, 'draft', uuid.uuid4()))
+        assert [p.pk for p in restarted] == [p.pk for p in first]
+        assert not restarted.has_previous
+
+    def test_values_walk(self, hub_id, payslips):
+        """Test tuple pages cover every row once and match the instance pages."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        fields = ('id', 'net_salary')
+        seen, token = [], None
+        while True:
+            rows, token = keyset_values(qs, fields, 'net_salary', True, limit=3, token=token)
+            seen.extend(pk for pk, _net in rows)
+            if token is None:
+                break
+        assert seen == [p.pk for p in keyset_page(qs, 'net_salary', True, per_page=7)]
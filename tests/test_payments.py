@@ -0,0 +1,184 @@
+"""Tests for bank payment files."""
+import io
+import pytest
+import xml.etree.ElementTree as ET
+from datetime import date
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from payroll.models import BankAccount, Payslip, PayslipAuditLog, validate_iban
+from payroll.payments import SEPA_NAMESPACE, PaymentError, PaymentFile, bank_text
+
+MONTH = date(2025, 1, 1)
+NS = {'p': SEPA_NAMESPACE}
+
+
+@pytest.fixture
+def confirmed_month(payslip_factory, hub_id):
+    """January confirmed (February draft), every employee but one with a bank account."""
+    payslip_factory(employees=8, periods=2, start=MONTH, with_users=False)
+    BankAccount.objects.create(hub_id=hub_id, holder_name='Test Store SL', iban='ES91 2100 0418 4502 0005 1332', bic='caixesbbxxx')
+    employee_ids = sorted(set(Payslip.objects.filter(hub_id=hub_id).values_list('employee_id', flat=True)))
+    for employee_id in employee_ids[1:]:
+        BankAccount.objects.create(hub_id=hub_id, employee_id=employee_id, holder_name='Empleado Núñez', iban='DE89370400440532013000')
+    return Payslip.objects.filter(
+        hub_id=hub_id, period_start=MONTH, status='confirmed', employee_id__in=employee_ids[1:],
+    )
+
+
+def _read(payment_file, **kwargs):
+    return b''.join(payment_file.iter_file(**kwargs))
+
+
+@pytest.mark.django_db
+class TestPaymentFile:
+    """Payment file generation tests."""
+
+    def test_iban_validation(self):
+        """Test the IBAN checksum is verified."""
+        validate_iban('DE89 3704 0044 0532 0130 00')
+        for value in ('DE88370400440532013000', 'not an iban', 'DE89'):
+            with pytest.raises(ValidationError):
+                validate_iban(value)
+
+    def test_bank_text(self):
+        """Test names are transliterated to the SEPA character set."""
+        assert bank_text('José Núñez & Cía', 70) == 'Jose Nunez   Cia'
+        assert len(bank_text('x' * 100, 70)) == 70
+
+    def test_sepa(self, hub_id, confirmed_month):
+        """Test the XML holds one transfer per payable payslip with matching control totals."""
+        payment_file = PaymentFile(hub_id, MONTH, 'sepa', chunk_size=2)
+        chunks = list(payment_file.iter_file())
+        assert len(chunks) > 2
+        root = ET.fromstring(b''.join(chunks))
+        expected = {p.pk.hex: p.net_salary for p in confirmed_month}
+        transfers = root.findall('.//p:CdtTrfTxInf', NS)
+        assert {t.find('p:PmtId/p:EndToEndId', NS).text: Decimal(t.find('p:Amt/p:InstdAmt', NS).text) for t in transfers} == expected
+        assert root.find('.//p:GrpHdr/p:NbOfTxs', NS).text == str(len(expected))
+        assert Decimal(root.find('.//p:GrpHdr/p:CtrlSum', NS).text) == sum(expected.values())
+        assert root.find('.//p:DbtrAcct/p:Id/p:IBAN', NS).text == 'ES9121000418450200051332'
+        assert transfers[0].find('p:Cdtr/p:Nm', NS).text == 'Empleado Nunez'
+        assert payment_file.missing_accounts == 1
+
+    def test_fixed(self, hub_id, confirmed_month):
+        """Test the fixed-width file has fixed-length records and a matching trailer."""
+        lines = _read(PaymentFile(hub_id, MONTH, 'fixed')).decode('ascii').split('\r\n')[:-1]
+        assert all(len(line) == 200 for line in lines)
+        assert [line[0] for line in lines] == ['H'] + ['D'] * confirmed_month.count() + ['T']
+        total = sum(int(line[55:70]) for line in lines[1:-1])
+        assert total == int(sum(p.net_salary for p in confirmed_month) * 100)
+        assert lines[-1][1:28] == f'{confirmed_month.count():09d}{total:018d}'
+
+    def test_mark_paid(self, hub_id, confirmed_month):
+        """Test only the included payslips are marked paid, after the file is complete."""
+        ids = set(confirmed_month.values_list('pk', flat=True))
+        chunks = PaymentFile(hub_id, MONTH, 'sepa', chunk_size=1).iter_file(mark_paid=True)
+        next(chunks)
+        assert not Payslip.objects.filter(hub_id=hub_id, status='paid', period_start=MONTH).exists()
+        list(chunks)
+        assert set(Payslip.objects.filter(hub_id=hub_id, status='paid', period_start=MONTH).values_list('pk', flat=True)) == ids
+        assert Payslip.objects.filter(hub_id=hub_id, status='confirmed', period_start=MONTH).count() == 1
+
+    def test_changed_while_written(self, hub_id, confirmed_month):
+        """Test a payslip changed after the cutoff aborts the file without marking anything paid."""
+        payment_file = PaymentFile(hub_id, MONTH, 'sepa')
+        changed = confirmed_month.first()
+        changed.notes = 'edited'
+        changed.save()
+        with pytest.raises(PaymentError):
+            _read(payment_file, mark_paid=True)
+        assert not Payslip.objects.filter(hub_id=hub_id, status='paid').exists()
+
+    def test_aborted_file_is_incomplete(self, hub_id, confirmed_month):
+        """Test the closing chunk is not handed out when the control totals do not match."""
+        payment_file = PaymentFile(hub_id, MONTH, 'sepa', chunk_size=1)
+        payment_file.total += Decimal('0.01')
+        received = []
+        with pytest.raises(PaymentError):
+            received.extend(payment_file.iter_file(mark_paid=True))
+        assert received
+        assert b'</Document>' not in b''.join(received)
+        assert not Payslip.objects.filter(hub_id=hub_id, status='paid').exists()
+
+    def test_command(self, hub_id, confirmed_month, tmp_path):
+        """Test the command writes the file and marks the payslips paid."""
+        output = tmp_path / 'payroll.xml'
+        count = confirmed_month.count()
+        call_command('bank_payment_file', str(output), hub_id=str(hub_id), period='2025-01', mark_paid=True, stdout=io.StringIO())
+        assert len(ET.parse(output).getroot().findall('.//p:CdtTrfTxInf', NS)) == count
+        assert Payslip.objects.filter(hub_id=hub_id, status='paid').count() == count
+        assert [path.name for path in tmp_path.iterdir()] == ['payroll.xml']
+
+    def test_command_failure_leaves_no_file(self, hub_id, confirmed_month, tmp_path, monkeypatch):
+        """Test a failed file is not left at the output path."""
+        monkeypatch.setattr(PaymentFile, 'mark_paid', lambda self: (_ for _ in ()).throw(PaymentError('changed')))
+        with pytest.raises(CommandError):
+            call_command('bank_payment_file', str(tmp_path / 'payroll.xml'), hub_id=str(hub_id), period='2025-01', mark_paid=True)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_edited_after_written(self, hub_id, confirmed_month):
+        """Test a payslip edited after it was written to the file is still marked paid."""
+        payment_file = PaymentFile(hub_id, MONTH, 'sepa')
+        _read(payment_file)
+        edited = confirmed_month.first()
+        edited.notes = 'edited'
+        edited.save()
+        assert payment_file.mark_paid()['moved'] == payment_file.count
+        edited.refresh_from_db()
+        assert edited.status == 'paid'
+
+    def test_mark_paid_all_or_nothing(self, hub_id, confirmed_month):
+        """Test nothing is marked paid when a written payslip is no longer confirmed."""
+        payment_file = PaymentFile(hub_id, MONTH, 'sepa')
+        _read(payment_file)
+        cancelled = confirmed_month.first()
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        with pytest.raises(PaymentError):
+            payment_file.mark_paid()
+        assert not Payslip.objects.filter(hub_id=hub_id, status='paid').exists()
+
+    def test_sepa_requires_euro(self, hub_id, confirmed_month, settings):
+        """Test SEPA files are refused for a non-euro currency while fixed-width files use it."""
+        settings.PAYROLL_CURRENCY = 'USD'
+        with pytest.raises(PaymentError):
+            PaymentFile(hub_id, MONTH, 'sepa')
+        lines = _read(PaymentFile(hub_id, MONTH, 'fixed')).decode('ascii').split('\r\n')
+        assert lines[1][70:73] == 'USD'
+
+    def test_no_debtor_account(self, hub_id):
+        """Test a hub without its own bank account cannot produce a file."""
+        with pytest.raises(PaymentError):
+            PaymentFile(hub_id, MONTH)
+
+
+@pytest.mark.django_db
+class TestPaymentFileView:
+    """Payment file download view."""
+
+    def test_download(self, auth_client, hub_id, confirmed_month):
+        """Test a GET streams the file and leaves the payslips confirmed."""
+        response = auth_client.get(reverse('payroll:payslip_payment_file') + '?period=2025-01&format=sepa')
+        assert response.status_code == 200
+        assert response.streaming
+        assert 'payroll-2025-01-sepa.xml' in response['Content-Disposition']
+        ET.fromstring(b''.join(response.streaming_content))
+        assert not Payslip.objects.filter(hub_id=hub_id, status='paid').exists()
+
+    def test_download_and_mark_paid(self, auth_client, hub_id, confirmed_month):
+        """Test a POST with mark_paid marks the included payslips paid."""
+        count = confirmed_month.count()
+        response = auth_client.post(reverse('payroll:payslip_payment_file'), {'period': '2025-01', 'format': 'fixed', 'mark_paid': '1'})
+        b''.join(response.streaming_content)
+        assert Payslip.objects.filter(hub_id=hub_id, status='paid', period_start=MONTH).count() == count
+        # Marked after the view returned, still attributed to the request's user
+        assert set(PayslipAuditLog.objects.filter(action='pay').values_list('source', flat=True)) == {'view:payslip_payment_file'}
+
+    def test_missing_debtor(self, auth_client):
+        """Test the view explains a missing hub bank account."""
+        response = auth_client.get(reverse('payroll:payslip_payment_file') + '?period=2025-01')
+        assert response.status_code == 400
@@ -0,0 +1,87 @@
+"""Tests for the per-month payroll rollups."""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+from django.urls import reverse
+
+from payroll.models import Payslip, PayrollPeriodRollup
+from payroll.summary import payroll_summary
+
+
+def _rollup(hub_id, period, status):
+    return PayrollPeriodRollup.objects.get(hub_id=hub_id, period=period, status=status)
+
+
+@pytest.mark.django_db
+class TestRollups:
+    """Rollup maintenance tests."""
+
+    def test_save_updates_month(self, hub_id, payslip):
+        """Test creating a payslip refreshes its month."""
+        rollup = _rollup(hub_id, payslip.period_start.replace(day=1), 'draft')
+        assert rollup.payslip_count == 1
+        assert rollup.gross_total == Decimal('100.00')
+
+    def test_moving_period_refreshes_both_months(self, hub_id, payslip):
+        """Test changing period_start refreshes the old and new months."""
+        payslip = Payslip.objects.get(pk=payslip.pk)
+        old_month = payslip.period_start.replace(day=1)
+        payslip.period_start = date(2020, 5, 1)
+        payslip.save()
+        assert _rollup(hub_id, old_month, 'draft').payslip_count == 0
+        assert _rollup(hub_id, date(2020, 5, 1), 'draft').payslip_count == 1
+
+    def test_soft_delete(self, hub_id, payslip):
+        """Test soft-deleted payslips leave the rollup."""
+        payslip.is_deleted = True
+        payslip.save()
+        assert _rollup(hub_id, payslip.period_start.replace(day=1), 'draft').payslip_count == 0
+
+    def test_save_moves_figures_without_aggregating(self, hub_id, payslip, django_assert_num_queries):
+        """Test a single save moves its figures between status rows without scanning the month's payslips."""
+        payslip = Payslip.objects.get(pk=payslip.pk)
+        month = payslip.period_start.replace(day=1)
+        payslip.status = 'confirmed'
+        payslip.gross_salary = Decimal('150.00')
+        with django_assert_num_queries(10) as captured:
+            payslip.save()
+        assert not any('DO UPDATE' in q['sql'] for q in captured.captured_queries if 'payroll_payrollperiodrollup' in q['sql'])
+        assert _rollup(hub_id, month, 'draft').payslip_count == 0
+        assert _rollup(hub_id, month, 'draft').gross_total == 0
+        confirmed = _rollup(hub_id, month, 'confirmed')
+        assert (confirmed.payslip_count, confirmed.gross_total) == (1, Decimal('150.00'))
+
+    def test_bulk_delete(self, auth_client, hub_id, payslip):
+        """Test the bulk action refreshes rollups after its update()."""
+        auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': str(payslip.pk), 'action': 'delete'})
+        assert _rollup(hub_id, payslip.period_start.replace(day=1), 'draft').payslip_count == 0
+
+    def test_rebuild_command(self, hub_id, payslip):
+        """Test the management command rebuilds missing rollups."""
+        PayrollPeriodRollup.objects.all().delete()
+        call_command('rebuild_payroll_rollups', hub_id=str(hub_id))
+        assert _rollup(hub_id, payslip.period_start.replace(day=1), 'draft').payslip_count == 1
+
+    def test_summary_matches_live_query(self, hub_id, payslip):
+        """Test the rollup-backed summary equals the payslip scan."""
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name='Other',
+            period_start=date(2024, 3, 1), period_end=date(2024, 3, 31), status='paid',
+            gross_salary=Decimal('50.00'), net_salary=Decimal('50.00'),
+        )
+        assert payroll_summary(hub_id, group_by='month') == payroll_summary(hub_id, group_by='month', use_rollups=False)
+        assert payroll_summary(hub_id) == payroll_summary(hub_id, use_rollups=False)
+
+    def test_summary_with_payslip_spanning_months(self, hub_id):
+        """Test a payslip spanning two months counts in its first month on both paths."""
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name='Spanning',
+            period_start=date(2024, 1, 15), period_end=date(2024, 2, 14), status='confirmed',
+            gross_salary=Decimal('80.00'), net_salary=Decimal('80.00'),
+        )
+        for period_start, period_end in ((date(2024, 1, 1), date(2024, 1, 31)), (date(2024, 2, 1), date(2024, 2, 29))):
+            rollups = payroll_summary(hub_id, period_start, period_end)
+            assert rollups == payroll_summary(hub_id, period_start, period_end, use_rollups=False)
+            assert rollups['count'] == (1 if period_start.month == 1 else 0)
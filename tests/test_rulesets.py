@@ -0,0 +1,70 @@
+"""Tests for per-hub compiled deduction rule sets."""
+import pytest
+from decimal import Decimal
+from django.urls import reverse
+
+from payroll.calculation import to_cents
+from payroll.models import DeductionRuleSet
+from payroll.rulesets import hub_rules
+
+
+@pytest.fixture
+def rule_set(db, hub_id):
+    return DeductionRuleSet.objects.create(
+        hub_id=hub_id,
+        tax_brackets=[['0', '10'], ['1000', '20'], ['3000', '30']],
+        social_security_rate=Decimal('5.00'),
+        social_security_cap=Decimal('4000.00'),
+        fixed_deductions=Decimal('10.00'),
+    )
+
+
+@pytest.mark.django_db
+class TestRuleSets:
+    """Rule set compilation and caching tests."""
+
+    def test_compiled_brackets(self, rule_set, hub_id):
+        """Test brackets compile to sorted thresholds with the tax owed below each one."""
+        rules = hub_rules(hub_id)
+        assert rules.thresholds == [0, 100000, 300000]
+        assert rules.rates == [1000, 2000, 3000]
+        assert rules.base_tax == [0, 100000 * 1000, 100000 * 1000 + 200000 * 2000]
+        # 2000.00 gross: 100.00 social security, 1900.00 taxable → 100.00 + 180.00 tax, + 10.00 fixed
+        assert rules.calculate(to_cents('2000.00')) == (39000, 161000)
+
+    def test_hot_path_skips_database(self, rule_set, hub_id, django_assert_num_queries):
+        """Test compiled rules are served from memory once built."""
+        hub_rules(hub_id)
+        with django_assert_num_queries(0):
+            assert hub_rules(hub_id) is hub_rules(hub_id)
+
+    def test_save_invalidates(self, rule_set, hub_id):
+        """Test editing the rule set recompiles the hub's rules."""
+        assert hub_rules(hub_id).fixed_deductions == 1000
+        rule_set.fixed_deductions = Decimal('25.00')
+        rule_set.save()
+        assert hub_rules(hub_id).fixed_deductions == 2500
+
+    def test_hub_without_rules(self, hub_id):
+        """Test hubs without a rule set or setting have no rules."""
+        assert hub_rules(hub_id) is None
+
+    def test_settings_saves_rules(self, auth_client, hub_id):
+        """Test the settings form creates the hub's rule set."""
+        response = auth_client.post(reverse('payroll:settings'), {
+            'brackets': '1000, 20\n0, 10',
+            'social_security_rate': '6.35', 'social_security_cap': '', 'fixed_deductions': '0',
+        })
+        assert response.status_code == 200
+        rule_set = DeductionRuleSet.objects.get(hub_id=hub_id)
+        assert rule_set.tax_brackets == [['0', '10'], ['1000', '20']]
+        assert hub_rules(hub_id).social_security_rate == 635
+
+    def test_settings_rejects_bad_brackets(self, auth_client, hub_id):
+        """Test malformed bracket lines are reported and nothing is saved."""
+        response = auth_client.post(reverse('payroll:settings'), {
+            'brackets': '1000 twenty', 'social_security_rate': '0', 'fixed_deductions': '0',
+        })
+        assert response.status_code == 200
+        assert b'expected' in response.content
+        assert not DeductionRuleSet.objects.filter(hub_id=hub_id).exists()
@@ -0,0 +1,142 @@
+"""Tests for the month-end payroll run orchestrator."""
+import pytest
+from datetime import date
+from django.db import connection
+
+from apps.accounts.models import LocalUser
+from payroll import generation, runs
+from payroll.models import Payslip, PayrollPeriodRollup, PayrollRun, PayrollRunTask
+from payroll.runs import hub_lock, plan_tasks, run_payroll
+
+PERIOD = (date(2025, 4, 1), date(2025, 4, 30))
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(settings, tmp_path):
+    settings.PAYROLL_LOCK_DIR = str(tmp_path)
+
+
+@pytest.fixture
+def employees(db, hub_id, admin_user):
+    for i in range(4):
+        LocalUser.objects.create(hub_id=hub_id, name=f'Employee {i}', email=f'e{i}@test.com', role='employee', pin_hash='x', is_active=True)
+    return LocalUser.objects.filter(hub_id=hub_id)
+
+
+@pytest.mark.django_db
+class TestPayrollRuns:
+    """Orchestrator tests (in-process executor)."""
+
+    def test_plan_splits_large_hubs(self, hub_id, employees):
+        """Test employee id ranges cover every employee exactly once."""
+        ranges = plan_tasks(hub_id, range_size=2)
+        assert len(ranges) == 3
+        assert ranges[0][0] is None and ranges[-1][1] is None
+        assert plan_tasks(hub_id, range_size=100) == [(None, None)]
+
+    def test_run_aggregates_progress(self, hub_id, employees):
+        """Test every range is generated and counted on the PayrollRun."""
+        result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0, range_size=2)
+        assert result['created'] == 5
+        assert Payslip.objects.filter(hub_id=hub_id, period_start=PERIOD[0]).count() == 5
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        assert run.status == 'completed'
+        assert (run.tasks_done, run.tasks_total, run.created_count) == (3, 3, 5)
+
+    def test_rollups_refreshed_once_per_hub(self, hub_id, employees, monkeypatch):
+        """Test the tasks of a split hub leave the rollups to one refresh after the last of them."""
+        calls = []
+        real = runs.payslips_changed
+        monkeypatch.setattr(runs, 'payslips_changed', lambda *args: calls.append(args) or real(*args))
+        run_payroll(*PERIOD, hub_ids=[hub_id], workers=0, range_size=2)
+        assert calls == [(hub_id, [PERIOD[0]])]
+        assert PayrollPeriodRollup.objects.get(hub_id=hub_id, period=PERIOD[0], status='draft').payslip_count == 5
+        with hub_lock(hub_id) as acquired:
+            assert acquired
+
+    def test_rerun_reuses_run(self, hub_id, employees):
+        """Test re-running a period resets the same PayrollRun and skips existing payslips."""
+        run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        assert result['created'] == 0
+        assert run.skipped_count == 5
+
+    def test_payslips_link_to_run(self, hub_id, employees):
+        """Test generated payslips point at their run and each task is checkpointed."""
+        run_payroll(*PERIOD, hub_ids=[hub_id], workers=0, range_size=2)
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        assert run.payslips.count() == 5
+        assert run.employees_total == 5
+        assert all(task.status == 'completed' and task.checkpoint_employee_id for task in run.tasks.all())
+
+    def test_failed_run_resumes_from_checkpoint(self, hub_id, employees, monkeypatch):
+        """Test a failed run continues its unfinished tasks after their checkpoints."""
+        real = generation.generate_period
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(kwargs.get('after'))
+            if len(calls) == 2:
+                raise RuntimeError('worker crashed')
+            return real(*args, **kwargs)
+        monkeypatch.setattr(generation, 'generate_period', flaky)
+        first = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0, range_size=2)
+        assert first['failed'] == 1
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        assert run.tasks.filter(status='failed').count() == 1
+
+        second = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0, range_size=2)
+        run.refresh_from_db()
+        assert second['resumed'] == [str(run.pk)]
+        assert second['tasks'] == 1
+        assert run.status == 'completed'
+        assert run.created_count == 5
+        assert Payslip.objects.filter(hub_id=hub_id, period_start=PERIOD[0]).count() == 5
+
+    def test_resume_starts_after_checkpoint(self, hub_id, employees):
+        """Test an interrupted task restarts after its checkpointed employee."""
+        run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        ids = list(LocalUser.objects.filter(hub_id=hub_id, is_active=True).order_by('id').values_list('id', flat=True))
+        Payslip.objects.filter(hub_id=hub_id, employee_id__in=ids[2:]).delete()
+        PayrollRun.objects.filter(pk=run.pk).update(status='running')
+        PayrollRunTask.objects.filter(run=run).update(status='running', checkpoint_employee_id=ids[1], created_count=2, skipped_count=0)
+        result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        run.refresh_from_db()
+        assert result['resumed'] == [str(run.pk)]
+        assert (result['created'], result['skipped']) == (3, 0)
+        assert run.created_count == 5
+
+    def test_locked_hub_is_skipped(self, hub_id, employees):
+        """Test a hub locked by another run is not generated."""
+        with hub_lock(hub_id) as acquired:
+            assert acquired
+            with hub_lock(hub_id) as again:
+                assert not again
+            result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        assert result['locked'] == [str(hub_id)]
+        assert not PayrollRun.objects.filter(hub_id=hub_id).exists()
+
+    def test_failed_task_marks_run(self, hub_id, employees, monkeypatch):
+        """Test a failing task marks its run failed with the error."""
+        def boom(*args, **kwargs):
+            raise RuntimeError('database went away')
+        monkeypatch.setattr(generation, 'generate_period', boom)
+        result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=0)
+        run = PayrollRun.objects.get(hub_id=hub_id, period_start=PERIOD[0])
+        assert result['failed'] == 1
+        assert run.status == 'failed'
+        assert 'database went away' in run.error
+
+
+@pytest.mark.django_db(transaction=True)
+def test_process_pool(hub_id, employees):
+    """Test tasks run in worker processes with their own connections (needs a file-backed test DB;
+    on SQLite also OPTIONS transaction_mode IMMEDIATE)."""
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        pytest.skip('worker processes cannot see an in-memory test database')
+    result = run_payroll(*PERIOD, hub_ids=[hub_id], workers=2, range_size=2)
+    assert result['tasks'] == 3
+    assert result['created'] == 5
+    assert PayrollRun.objects.get(hub_id=hub_id).status == 'completed'
@@ -0,0 +1,87 @@
+"""Tests for the indexed payslip search."""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.urls import reverse
+
+from payroll.models import Payslip
+from payroll.search import filter_search, search_backend, search_payslips
+
+
+def _payslip(hub_id, name, notes='', status='draft'):
+    return Payslip.objects.create(
+        hub_id=hub_id, employee_id=uuid.uuid4(), employee_name=name, notes=notes, status=status,
+        period_start=date(2025, 1, 1), period_end=date(2025, 1, 31),
+        gross_salary=Decimal('100.00'), deductions=Decimal('0.00'),
+    )
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """Search index tests."""
+
+    def test_backend_is_indexed(self):
+        """Test the migrated test database has a search index."""
+        assert search_backend() in ('fts5', 'trigram')
+
+    def test_substring_match(self, hub_id):
+        """Test matches keep icontains semantics across name, status and notes."""
+        smith = _payslip(hub_id, 'John Smithson')
+        noted = _payslip(hub_id, 'Ann Lee', notes='Overtime for SMITH project')
+        paid = _payslip(hub_id, 'Bob Ray', status='paid')
+        base = Payslip.objects.filter(hub_id=hub_id)
+        assert set(filter_search(base, 'smith')) == {smith, noted}
+        assert set(filter_search(base, 'pai')) == {paid}
+        assert set(filter_search(base, 'Jo')) == {smith}
+
+    def test_index_follows_updates(self, hub_id):
+        """Test triggers keep the index in sync with save, update() and delete."""
+        payslip = _payslip(hub_id, 'Carla Gómez')
+        base = Payslip.objects.filter(hub_id=hub_id)
+        Payslip.objects.filter(pk=payslip.pk).update(employee_name='Carla Ruiz')
+        assert not filter_search(base, 'gómez').exists()
+        assert filter_search(base, 'ruiz').exists()
+        payslip.delete()
+        assert not filter_search(base, 'ruiz').exists()
+
+    def test_renumbered_rowids(self, hub_id):
+        """Test search and its triggers follow payslip ids when SQLite renumbers rowids (as VACUUM may)."""
+        if search_backend() != 'fts5':
+            pytest.skip('SQLite FTS5 only')
+        first = _payslip(hub_id, 'Elena Vidal')
+        second = _payslip(hub_id, 'Pablo Soler')
+        with connection.cursor() as cursor:
+            cursor.execute(f'UPDATE "{Payslip._meta.db_table}" SET rowid = -rowid')
+        base = Payslip.objects.filter(hub_id=hub_id)
+        assert list(filter_search(base, 'vidal')) == [first]
+        assert search_payslips(hub_id, 'soler')['ids'] == [second.pk]
+        Payslip.objects.filter(pk=second.pk).update(employee_name='Pablo Mas')
+        assert not filter_search(base, 'soler').exists()
+        assert list(filter_search(base, 'vidal')) == [first]
+        first.delete()
+        assert not filter_search(base, 'vidal').exists()
+        assert list(filter_search(base, 'pablo')) == [second]
+
+    def test_ranked_results_and_total(self, hub_id):
+        """Test ranked ids, total count and hub/soft-delete scoping."""
+        _payslip(hub_id, 'Maria Maria Lopez', notes='maria')
+        _payslip(hub_id, 'Maria Perez')
+        deleted = _payslip(hub_id, 'Mariano')
+        deleted.is_deleted = True
+        deleted.save()
+        _payslip(uuid.uuid4(), 'Maria Other Hub')
+        result = search_payslips(hub_id, 'maria', limit=1)
+        assert result['total'] == 2
+        assert len(result['ids']) == 1
+        assert Payslip.objects.get(pk=result['ids'][0]).employee_name == 'Maria Maria Lopez'
+
+    def test_list_view_uses_search(self, auth_client, hub_id):
+        """Test payslips_list filters through the search index."""
+        _payslip(hub_id, 'Zed Searchable')
+        _payslip(hub_id, 'Other Person')
+        response = auth_client.get(reverse('payroll:payslips_list'), {'q': 'searchable'})
+        assert response.status_code == 200
+        assert b'Zed Searchable' in response.content
+        assert b'Other Person' not in response.content
@@ -0,0 +1,107 @@
+"""Tests for the columnar payroll snapshots."""
+import os
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+
+from payroll import snapshots
+from payroll.models import Payslip
+from payroll.snapshots import (
+    PayrollSnapshot, SnapshotError, payroll_analytics, snapshot_path, write_snapshot,
+)
+
+MONTH = date(2024, 3, 1)
+
+
+@pytest.fixture
+def snapshot_root(settings, tmp_path):
+    settings.PAYROLL_SNAPSHOT_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def backend(request, monkeypatch):
+    """Run each test with and without NumPy."""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(snapshots, 'numpy', None)
+    return request.param
+
+
+def _payslip(hub_id, gross, deductions, status='paid', employee_id=None, period_start=MONTH):
+    return Payslip.objects.create(
+        hub_id=hub_id, employee_id=employee_id or uuid.uuid4(), employee_name='Employee',
+        period_start=period_start, period_end=period_start.replace(day=28),
+        gross_salary=Decimal(gross), deductions=Decimal(deductions),
+        net_salary=Decimal(gross) - Decimal(deductions), status=status,
+    )
+
+
+@pytest.fixture
+def closed_month(db, hub_id):
+    employee_id = uuid.uuid4()
+    _payslip(hub_id, '1000.00', '100.00', employee_id=employee_id)
+    _payslip(hub_id, '500.50', '0.25', employee_id=employee_id)
+    _payslip(hub_id, '2000.00', '300.00')
+    _payslip(hub_id, '999.99', '0.00', status='cancelled')
+    return hub_id
+
+
+@pytest.mark.django_db
+class TestSnapshots:
+    """Snapshot writing and analytics tests."""
+
+    def test_round_trip(self, snapshot_root, closed_month, backend):
+        """Test columns read back from the mapped file match the payslips."""
+        write_snapshot(closed_month, MONTH)
+        with PayrollSnapshot.open(closed_month, MONTH) as snapshot:
+            assert snapshot.rows == 4
+            assert sorted(int(v) for v in snapshot.column('gross')) == [50050, 99999, 100000, 200000]
+            assert len(bytes(snapshot.column('employee_id'))) == 4 * 16
+
+    def test_open_month_refused(self, snapshot_root, hub_id):
+        """Test months with draft or confirmed payslips are not snapshotted."""
+        _payslip(hub_id, '100.00', '0.00', status='draft')
+        with pytest.raises(SnapshotError):
+            write_snapshot(hub_id, MONTH)
+        assert write_snapshot(hub_id, MONTH, force=True)
+
+    def test_analytics_from_snapshot(self, snapshot_root, closed_month, backend):
+        """Test snapshot analytics equal the database analytics."""
+        from_db = payroll_analytics(closed_month, MONTH, MONTH)
+        write_snapshot(closed_month, MONTH)
+        from_snapshot = payroll_analytics(closed_month, MONTH, MONTH)
+        assert from_db['source'] == 'database'
+        assert from_snapshot['source'] == 'snapshot'
+        assert from_snapshot['months_from_database'] == []
+        for key in ('count', 'employees', 'total_gross', 'total_net', 'avg_net', 'net_percentiles'):
+            assert from_snapshot[key] == from_db[key]
+        assert from_snapshot['count'] == 3
+        assert from_snapshot['employees'] == 2
+        assert from_snapshot['total_net'] == '3100.25'
+        assert from_snapshot['net_percentiles'] == {'p50': '900.00', 'p90': '1700.00', 'p99': '1700.00'}
+
+    def test_mixed_range(self, snapshot_root, closed_month):
+        """Test months without a snapshot are read from the database."""
+        write_snapshot(closed_month, MONTH)
+        _payslip(closed_month, '10.00', '0.00', period_start=date(2024, 4, 1))
+        result = payroll_analytics(closed_month, MONTH, date(2024, 4, 30))
+        assert result['source'] == 'mixed'
+        assert result['months_from_database'] == ['2024-04']
+        assert result['count'] == 4
+
+    def test_change_discards_snapshot(self, snapshot_root, closed_month):
+        """Test editing a payslip of a snapshotted month removes the stale snapshot."""
+        path = write_snapshot(closed_month, MONTH)
+        payslip = Payslip.objects.filter(hub_id=closed_month).first()
+        payslip.notes = 'changed'
+        payslip.save()
+        assert not os.path.exists(path)
+
+    def test_command(self, snapshot_root, closed_month):
+        """Test the management command writes the snapshot."""
+        call_command('snapshot_payroll_period', hub_id=str(closed_month), period='2024-03')
+        assert os.path.exists(snapshot_path(closed_month, MONTH))
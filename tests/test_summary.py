@@ -0,0 +1,67 @@
+"""Tests for payroll summary aggregation."""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from payroll.models import Payslip
+from payroll.summary import payroll_summary
+
+
+@pytest.fixture
+def summary_payslips(db, hub_id):
+    """Payslips across two months, two statuses and another hub."""
+    employee_id = uuid.uuid4()
+    rows = [
+        (hub_id, date(2025, 1, 1), 'paid', '1000.00', '200.00'),
+        (hub_id, date(2025, 2, 1), 'draft', '1500.00', '300.00'),
+        (hub_id, date(2025, 2, 1), 'paid', '500.00', '100.00'),
+        (uuid.uuid4(), date(2025, 2, 1), 'paid', '9999.00', '0.00'),
+    ]
+    for hub, start, status, gross, deductions in rows:
+        Payslip.objects.create(
+            hub_id=hub, employee_id=employee_id, employee_name='Ana',
+            period_start=start, period_end=start.replace(day=28), status=status,
+            gross_salary=Decimal(gross), deductions=Decimal(deductions),
+            net_salary=Decimal(gross) - Decimal(deductions),
+        )
+
+
+@pytest.mark.django_db
+class TestPayrollSummary:
+    """Summary aggregation tests."""
+
+    def test_totals_in_one_query(self, hub_id, summary_payslips, django_assert_num_queries):
+        """Test totals and per-status figures come from one query."""
+        with django_assert_num_queries(1):
+            result = payroll_summary(hub_id)
+        assert result['count'] == 3
+        assert Decimal(result['total_net']) == Decimal('2400.00')
+        assert result['by_status'] == {'draft': 1, 'confirmed': 0, 'paid': 2, 'cancelled': 0}
+        assert Decimal(result['amounts_by_status']['paid']['gross']) == Decimal('1500.00')
+
+    def test_period_filter(self, hub_id, summary_payslips):
+        """Test period range filtering."""
+        result = payroll_summary(hub_id, period_start='2025-02-01', period_end='2025-02-28')
+        assert result['count'] == 2
+
+    def test_breakdown_by_month(self, hub_id, summary_payslips, django_assert_num_queries):
+        """Test per-month breakdown in one query."""
+        with django_assert_num_queries(1):
+            result = payroll_summary(hub_id, group_by='month')
+        assert [row['month'] for row in result['breakdown']] == ['2025-01', '2025-02']
+        assert Decimal(result['breakdown'][1]['total_gross']) == Decimal('2000.00')
+        assert result['count'] == 3
+
+    def test_breakdown_by_employee(self, hub_id, summary_payslips):
+        """Test per-employee breakdown."""
+        result = payroll_summary(hub_id, group_by='employee')
+        assert len(result['breakdown']) == 1
+        assert result['breakdown'][0]['count'] == 3
+
+    def test_empty(self, hub_id, db):
+        """Test an empty hub summarizes to zeros."""
+        result = payroll_summary(hub_id, group_by='month')
+        assert result['count'] == 0
+        assert result['total_net'] == '0.00'
+        assert result['breakdown'] == []
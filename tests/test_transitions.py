@@ -0,0 +1,86 @@
+"""Tests for bulk payslip status transitions."""
+import uuid
+import pytest
+from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from payroll.models import EmployeeYearToDate, Payslip, PayslipAuditLog
+from payroll.transitions import bulk_transition
+
+
+@pytest.fixture
+def batch(db, hub_id):
+    """Three draft payslips and one paid payslip."""
+    statuses = ['draft', 'draft', 'draft', 'paid']
+    return [
+        Payslip.objects.create(
+            hub_id=hub_id, employee_id=uuid.uuid4(), employee_name=f'Employee {i}',
+            period_start=date(2025, 1, 1), period_end=date(2025, 1, 31), status=status,
+        )
+        for i, status in enumerate(statuses)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkTransition:
+    """Set-based state machine tests."""
+
+    def test_confirm_rejects_other_statuses(self, hub_id, batch):
+        """Test only draft payslips are confirmed."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        result = bulk_transition(qs, 'confirm', hub_id)
+        assert result == {'action': 'confirm', 'moved': 3, 'rejected': 1}
+        assert Payslip.objects.filter(hub_id=hub_id, status='confirmed').count() == 3
+
+    def test_pay_sets_paid_date(self, hub_id, batch):
+        """Test paying sets paid_date in the same update."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        bulk_transition(qs, 'confirm', hub_id)
+        result = bulk_transition(qs, 'pay', hub_id)
+        assert result['moved'] == 3
+        assert Payslip.objects.filter(hub_id=hub_id, status='paid', paid_date__isnull=False).count() == 3
+
+    def test_single_update_statement(self, hub_id, batch):
+        """Test the transition is one UPDATE plus rollup maintenance, without touching year-to-date rows of drafts."""
+        qs = Payslip.objects.filter(hub_id=hub_id)
+        with CaptureQueriesContext(connection) as ctx:
+            bulk_transition(qs, 'cancel', hub_id, requested=4)
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # eligible rows, UPDATE, audit entries, rollup insert + lock + aggregate + upsert; cancelled drafts never counted towards YTD
+        assert len(statements) == 7
+        assert sum(sql.startswith('UPDATE') for sql in statements) == 1
+        assert list(EmployeeYearToDate.objects.filter(hub_id=hub_id).values_list('employee_id', flat=True)) == [batch[3].employee_id]
+
+    def test_updates_only_locked_rows(self, hub_id, batch, monkeypatch):
+        """Test a payslip that starts matching after the rows were locked is neither moved nor audited."""
+        from payroll import transitions
+        original = transitions.transition_values
+
+        def late_match(action):
+            Payslip.objects.filter(pk=batch[3].pk).update(status='draft')
+            return original(action)
+        monkeypatch.setattr(transitions, 'transition_values', late_match)
+        result = bulk_transition(Payslip.objects.filter(hub_id=hub_id), 'confirm', hub_id)
+        assert result == {'action': 'confirm', 'moved': 3, 'rejected': 1}
+        assert Payslip.objects.get(pk=batch[3].pk).status == 'draft'
+        assert set(PayslipAuditLog.objects.filter(action='confirm').values_list('payslip_id', flat=True)) == {p.pk for p in batch[:3]}
+
+    def test_bulk_action_malformed_ids(self, auth_client, hub_id, batch):
+        """Test ids that are not UUIDs are reported as rejected instead of failing the request."""
+        ids = ','.join([str(batch[0].pk), 'bogus'])
+        response = auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': ids, 'action': 'confirm'})
+        assert response.status_code == 200
+        assert '"moved": 1' in response['HX-Trigger']
+        assert '"rejected": 1' in response['HX-Trigger']
+        response = auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': 'bogus', 'action': 'delete'})
+        assert response.status_code == 200
+
+    def test_bulk_action_view(self, auth_client, hub_id, batch):
+        """Test the bulk confirm action reports moved/rejected counts."""
+        ids = ','.join(str(p.pk) for p in batch)
+        response = auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': ids, 'action': 'confirm'})
+        assert response.status_code == 200
+        assert '"moved": 3' in response['HX-Trigger']
+        assert '"rejected": 1' in response['HX-Trigger']
@@ -54,6 +54,22 @@ class TestPayslipViews:
         response = auth_client.get(url, {'sort': 'created_at', 'dir': 'desc'})
         assert response.status_code == 200
 
+    def test_list_cursor_mode(self, auth_client, payslip):
+        """Test opt-in cursor pagination."""
+        url = reverse('payroll:payslips_list')
+        response = auth_client.get(url, {'paging': 'cursor', 'sort': 'net_salary'})
+        assert response.status_code == 200
+        assert response.context['cursor_mode'] is True
+        assert response.context['page_obj'] is None
+
+    def test_list_infinite_scroll(self, auth_client, payslip):
+        """Test per_page=0 loads the next chunk through the scroll sentinel."""
+        url = reverse('payroll:payslips_list')
+        response = auth_client.get(url, {'per_page': 0}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='payslips-sentinel')
+        assert response.status_code == 200
+        assert response.context['infinite_scroll'] is True
+        assert 'datatable-footer' not in response.content.decode()
+
     def test_export_csv(self, auth_client):
         """Test CSV export."""
         url = reverse('payroll:payslips_list')
@@ -61,6 +77,15 @@ class TestPayslipViews:
         assert response.status_code == 200
         assert 'text/csv' in response['Content-Type']
 
+    def test_export_csv_streams_rows(self, auth_client, payslip):
+        """Test CSV export is streamed and contains the rows."""
+        url = reverse('payroll:payslips_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert response.streaming
+        content = b''.join(response.streaming_content).decode()
+        assert content.splitlines()[0].startswith('Status,')
+        assert payslip.employee_name in content
+
     def test_export_excel(self, auth_client):
         """Test Excel export."""
         url = reverse('payroll:payslips_list')
@@ -144,3 +169,16 @@ class TestSettings:
         response = client.get(url)
         assert response.status_code == 302
 
+    def test_runs_progress_polls_while_running(self, auth_client, hub_id):
+        """Test the runs partial polls only while a run is in progress."""
+        from datetime import date
+        from payroll.models import PayrollRun
+        run = PayrollRun.objects.create(hub_id=hub_id, period_start=date(2025, 4, 1), period_end=date(2025, 4, 30), status='running', employees_total=4)
+        run.tasks.create(created_count=1, skipped_count=1)
+        url = reverse('payroll:runs_progress')
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert b'every 2s' in response.content and b'2/4' in response.content
+        PayrollRun.objects.filter(pk=run.pk).update(status='completed')
+        assert b'every 2s' not in auth_client.get(url).content
+
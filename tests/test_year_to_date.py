@@ -0,0 +1,121 @@
+"""Tests for the per-employee year-to-date accumulators."""
+import io
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.urls import reverse
+
+from payroll.ai_tools import GetEmployeeYearToDate
+from payroll.models import EmployeeYearToDate, Payslip
+from payroll.transitions import bulk_transition
+from payroll.year_to_date import rebuild_year_to_date, year_to_date, year_to_date_many
+
+
+def _payslip(hub_id, employee_id, month, status='draft', gross='1000.00', year=2025):
+    return Payslip.objects.create(
+        hub_id=hub_id, employee_id=employee_id, employee_name='Ana Garcia',
+        period_start=date(year, month, 1), period_end=date(year, month, 28),
+        gross_salary=Decimal(gross), deductions=Decimal(gross) / 5, net_salary=Decimal(gross) * 4 / 5,
+        status=status,
+    )
+
+
+@pytest.fixture
+def employee_id():
+    return uuid.uuid4()
+
+
+@pytest.mark.django_db
+class TestYearToDate:
+    """Accumulator maintenance tests."""
+
+    def test_drafts_do_not_count(self, hub_id, employee_id):
+        """Test draft payslips leave the accumulators alone."""
+        _payslip(hub_id, employee_id, 1)
+        assert not EmployeeYearToDate.objects.filter(hub_id=hub_id).exists()
+        assert year_to_date(hub_id, employee_id, 2025)['payslip_count'] == 0
+
+    def test_confirm_pay_cancel(self, hub_id, employee_id):
+        """Test single-payslip transitions keep the accumulator current."""
+        january = _payslip(hub_id, employee_id, 1, status='confirmed')
+        february = _payslip(hub_id, employee_id, 2, status='confirmed', gross='2000.00')
+        ytd = year_to_date(hub_id, employee_id, 2025)
+        assert ytd['payslip_count'] == 2
+        assert ytd['gross_total'] == '3000.00'
+        assert ytd['deductions_total'] == '600.00'
+        assert ytd['paid_total'] == '0.00'
+        assert ytd['last_period'] == '2025-02-01'
+
+        january = Payslip.objects.get(pk=january.pk)
+        january.status = 'paid'
+        january.save()
+        assert year_to_date(hub_id, employee_id, 2025)['paid_total'] == '800.00'
+
+        february = Payslip.objects.get(pk=february.pk)
+        february.status = 'cancelled'
+        february.save()
+        ytd = year_to_date(hub_id, employee_id, 2025)
+        assert ytd['payslip_count'] == 1
+        assert ytd['gross_total'] == '1000.00'
+
+    def test_years_are_separate(self, hub_id, employee_id):
+        """Test payslips count towards the year of their period_start only."""
+        _payslip(hub_id, employee_id, 12, status='paid', year=2024)
+        _payslip(hub_id, employee_id, 1, status='paid')
+        assert year_to_date(hub_id, employee_id, 2024)['payslip_count'] == 1
+        assert year_to_date(hub_id, employee_id, 2025)['payslip_count'] == 1
+
+    def test_bulk_transition(self, hub_id):
+        """Test bulk transitions refresh every affected employee."""
+        employees = [uuid.uuid4() for _ in range(3)]
+        for employee in employees:
+            _payslip(hub_id, employee, 1)
+        bulk_transition(Payslip.objects.filter(hub_id=hub_id), 'confirm', hub_id)
+        rows = year_to_date_many(hub_id, employees, 2025)
+        assert set(rows) == set(employees)
+        assert all(row.payslip_count == 1 for row in rows.values())
+
+    def test_bulk_delete_view(self, auth_client, admin_user):
+        """Test the bulk delete action removes deleted payslips from the accumulators."""
+        hub_id = admin_user.hub_id
+        employee = uuid.uuid4()
+        payslip = _payslip(hub_id, employee, 3, status='confirmed')
+        _payslip(hub_id, employee, 4, status='confirmed')
+        auth_client.post(reverse('payroll:payslips_bulk_action'), {'ids': str(payslip.pk), 'action': 'delete'})
+        assert year_to_date(hub_id, employee, 2025)['payslip_count'] == 1
+
+    def test_rebuild(self, hub_id, employee_id):
+        """Test rebuilding restores rows written behind the accumulators' back."""
+        payslip = _payslip(hub_id, employee_id, 5, status='paid')
+        EmployeeYearToDate.objects.all().delete()
+        Payslip.objects.filter(pk=payslip.pk).update(gross_salary=Decimal('1500.00'))
+        assert rebuild_year_to_date(hub_id) == 1
+        assert year_to_date(hub_id, employee_id, 2025)['gross_total'] == '1500.00'
+        call_command('rebuild_payroll_rollups', hub_id=str(hub_id), stdout=io.StringIO())
+
+    def test_lookup_is_one_query(self, hub_id, employee_id, django_assert_num_queries):
+        """Test a YTD lookup is a single indexed read."""
+        _payslip(hub_id, employee_id, 1, status='confirmed')
+        with django_assert_num_queries(1):
+            year_to_date(hub_id, employee_id, 2025)
+
+    def test_ai_tool(self, hub_id, employee_id):
+        """Test the AI tool reads the accumulator of the session hub."""
+        _payslip(hub_id, employee_id, 1, status='paid')
+        _payslip(uuid.uuid4(), employee_id, 1, status='paid')
+        request = RequestFactory().get('/')
+        request.session = {'hub_id': str(hub_id)}
+        result = GetEmployeeYearToDate().execute({'employee_id': str(employee_id), 'year': 2025}, request)
+        assert result['payslip_count'] == 1
+        assert result['paid_total'] == '800.00'
+
+    def test_ai_tool_malformed_employee(self, hub_id):
+        """Test an employee_id that is not a UUID returns a tool error instead of raising."""
+        request = RequestFactory().get('/')
+        request.session = {'hub_id': str(hub_id)}
+        result = GetEmployeeYearToDate().execute({'employee_id': 'emp-42', 'year': 2025}, request)
+        assert set(result) == {'error'}
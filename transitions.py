@@ -0,0 +1,94 @@
+"""
+Payslip status state machine.
+
+draft → confirmed → paid, and draft/confirmed → cancelled. Bulk transitions
+lock the payslips whose status allows the action (``WHERE status IN
+(<sources>)``) and update exactly those ids, so payslips in any other
+status are left untouched and reported as rejected. The moved payslips are
+audited with one ``bulk_create`` per ``AUDIT_BATCH_SIZE`` rows in the same
+transaction.
+"""
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from .audit import audit_value, record_bulk
+from .models import Payslip
+from .signals import payslips_changed
+from .year_to_date import counts_towards_ytd
+
+# Payslip ids per UPDATE (below SQLite's variable limit)
+UPDATE_CHUNK_SIZE = 10000
+
+# action: (statuses it can be applied to, resulting status)
+TRANSITIONS = {
+    'confirm': (('draft',), 'confirmed'),
+    'pay': (('confirmed',), 'paid'),
+    'cancel': (('draft', 'confirmed'), 'cancelled'),
+}
+
+
+def parse_ids(values):
+    """
+    ``(ids, malformed)`` of the payslip ids a caller passed: the distinct
+    valid ones as UUIDs, and how many distinct values are not UUIDs (they
+    count as rejected rather than failing the ``id__in`` filter).
+    """
+    ids, malformed = set(), set()
+    for value in values:
+        try:
+            ids.add(uuid.UUID(str(value).strip()))
+        except ValueError:
+            malformed.add(value)
+    return ids, len(malformed)
+
+
+def can_transition(status, action):
+    return action in TRANSITIONS and status in TRANSITIONS[action][0]
+
+
+def transition_values(action):
+    """Field values written by ``action`` (``paid_date`` is set together with ``paid``)."""
+    now = timezone.now()
+    values = {'status': TRANSITIONS[action][1], 'updated_at': now}
+    if action == 'pay':
+        values['paid_date'] = now.date()
+    return values
+
+
+def bulk_transition(qs, action, hub_id, requested=None):
+    """
+    Apply ``action`` to every payslip of ``qs`` whose status allows it.
+
+    ``requested`` is the number of payslips the caller asked for (defaults
+    to ``qs.count()``); anything not moved counts as rejected.
+    """
+    if action not in TRANSITIONS:
+        raise ValueError(f'Unknown payslip action: {action}')
+    if requested is None:
+        requested = qs.count()
+    eligible = qs.filter(status__in=TRANSITIONS[action][0])
+    with transaction.atomic():
+        # Locked where the database supports it, so the audit rows match what the UPDATE moves
+        rows = list(eligible.select_for_update().order_by().values_list('id', 'status', 'employee_id', 'period_start'))
+        values = transition_values(action)
+        # Updated by the locked ids, so rows that start matching after the read are left alone
+        locked_ids = [pk for pk, _status, _employee_id, _period_start in rows]
+        moved = 0
+        for offset in range(0, len(locked_ids), UPDATE_CHUNK_SIZE):
+            moved += Payslip.objects.filter(pk__in=locked_ids[offset:offset + UPDATE_CHUNK_SIZE]).update(**values)
+        if moved:
+            paid_date = audit_value('paid_date', values.get('paid_date'))
+            record_bulk(hub_id, action, (
+                (pk, {'status': [status, values['status']], **({'paid_date': [None, paid_date]} if paid_date else {})})
+                for pk, status, _employee_id, _period_start in rows
+            ))
+            # Year-to-date figures only change for payslips leaving or entering a counted status
+            counted = counts_towards_ytd(values['status'])
+            payslips_changed(
+                hub_id,
+                {period_start for _pk, _status, _employee_id, period_start in rows},
+                {employee_id for _pk, status, employee_id, _period_start in rows if counted or counts_towards_ytd(status)},
+            )
+    return {'action': action, 'moved': moved, 'rejected': max(requested - moved, 0)}
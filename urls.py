@@ -1,19 +1,30 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'payroll'
 
+# ASGI deployments can serve the dashboard and payslip list from their async variants
+ASYNC_VIEWS = getattr(settings, 'PAYROLL_ASYNC_VIEWS', False)
+
 urlpatterns = [
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', views.adashboard if ASYNC_VIEWS else views.dashboard, name='dashboard'),
+    path('async/', views.adashboard, name='dashboard_async'),
 
     # Payslip
-    path('payslips/', views.payslips_list, name='payslips_list'),
+    path('payslips/', views.apayslips_list if ASYNC_VIEWS else views.payslips_list, name='payslips_list'),
+    path('async/payslips/', views.apayslips_list, name='payslips_list_async'),
     path('payslips/add/', views.payslip_add, name='payslip_add'),
+    path('payslips/import/', views.payslip_import, name='payslip_import'),
     path('payslips/<uuid:pk>/edit/', views.payslip_edit, name='payslip_edit'),
     path('payslips/<uuid:pk>/delete/', views.payslip_delete, name='payslip_delete'),
     path('payslips/bulk/', views.payslips_bulk_action, name='payslips_bulk_action'),
+    path('payslips/<uuid:pk>/document/', views.payslip_document, name='payslip_document'),
+    path('payslips/documents.zip', views.payslip_documents_zip, name='payslip_documents_zip'),
+    path('payslips/payment-file/', views.payslip_payment_file, name='payslip_payment_file'),
 
     # Settings
     path('settings/', views.settings_view, name='settings'),
+    path('settings/runs/', views.runs_progress, name='runs_progress'),
 ]
@@ -1,9 +1,15 @@
 """
 Payroll Module Views
 """
-from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import HttpResponse
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, render as django_render
 from django.utils import timezone
@@ -12,13 +18,31 @@ from django.views.decorators.http import require_POST
 
 from apps.accounts.decorators import login_required, permission_required
 from apps.core.htmx import htmx_view
-from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import Payslip
+from .models import DeductionRuleSet, Payslip, PayrollRun
+from .audit import audited, record_bulk
+from .caching import acached, cache_stats, cached
+from .calculation import price_payslips
+from . import documents
+from .exports import stream_csv, stream_excel
+from .forms import DeductionRuleSetForm
+from .generation import month_bounds, parse_period
+from .imports import import_payslips, iter_rows
+from .instrumentation import instrumented
+from .pagination import keyset_page
+from .payments import PAYMENT_FORMATS, PaymentError, PaymentFile
+from .rulesets import hub_rules
+from .search import filter_search
+from .signals import payslips_changed
+from .summary import apayroll_summary, payroll_summary
+from .transitions import TRANSITIONS, bulk_transition, parse_ids
+from .year_to_date import YTD_STATUSES
 from apps.core.scheduled_tasks import get_module_scheduled_tasks
 
 PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
+# per_page=0 ("All") streams the list in chunks of this size via infinite scroll
+INFINITE_SCROLL_CHUNK = 48
 
 
 # ======================================================================
@@ -26,12 +50,24 @@ PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
 # ======================================================================
 
 @login_required
+@instrumented
 @with_module_nav('payroll', 'dashboard')
 @htmx_view('payroll/pages/index.html', 'payroll/partials/dashboard_content.html')
 def dashboard(request):
     hub_id = request.session.get('hub_id')
+    today = timezone.now().date()
+    month_start, month_end = month_bounds(today.year, today.month)
+    return cached(hub_id, 'dashboard', (month_start,), lambda: _build_dashboard_context(hub_id, month_start, month_end))
+
+
+def _build_dashboard_context(hub_id, month_start, month_end):
+    overall = payroll_summary(hub_id)
+    current_month = payroll_summary(hub_id, month_start, month_end)
     return {
-        'total_payslips': Payslip.objects.filter(hub_id=hub_id, is_deleted=False).count(),
+        'total_payslips': overall['count'],
+        'summary': overall,
+        'month_summary': current_month,
+        'pending_payslips': overall['by_status']['draft'] + overall['by_status']['confirmed'],
     }
 
 
@@ -49,73 +85,130 @@ PAYSLIP_SORT_FIELDS = {
     'created_at': 'created_at',
 }
 
-def _build_payslips_context(hub_id, per_page=10):
-    qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False).order_by('status')
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(1)
-    return {
-        'payslips': page_obj,
-        'page_obj': page_obj,
-        'search_query': '',
-        'sort_field': 'status',
-        'sort_dir': 'asc',
-        'current_view': 'table',
-        'per_page': per_page,
-    }
-
-def _render_payslips_list(request, hub_id, per_page=10):
-    ctx = _build_payslips_context(hub_id, per_page)
-    return django_render(request, 'payroll/partials/payslips_list.html', ctx)
+def _apply_calculation(obj, data, hub_id):
+    """Price deductions and net with the hub's rules when the form leaves deductions blank."""
+    rules = hub_rules(hub_id)
+    if rules and not data.get('deductions'):
+        price_payslips([obj], rules)
 
-@login_required
-@with_module_nav('payroll', 'payslips')
-@htmx_view('payroll/pages/payslips.html', 'payroll/partials/payslips_content.html')
-def payslips_list(request):
-    hub_id = request.session.get('hub_id')
-    search_query = request.GET.get('q', '').strip()
-    sort_field = request.GET.get('sort', 'status')
-    sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
-    current_view = request.GET.get('view', 'table')
-    per_page = int(request.GET.get('per_page', 12))
+def _payslips_query(params, hub_id):
+    """List parameters (from GET, or the list state posted with a mutation) and the matching, ordered queryset."""
+    search_query = params.get('q', '').strip()
+    sort_field = params.get('sort', 'status')
+    sort_dir = params.get('dir', 'asc')
+    current_view = params.get('view', 'table')
+    per_page = int(params.get('per_page', 12))
     if per_page not in PER_PAGE_CHOICES:
         per_page = 12
 
     qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False)
 
     if search_query:
-        qs = qs.filter(Q(employee_name__icontains=search_query) | Q(status__icontains=search_query) | Q(notes__icontains=search_query))
+        qs = filter_search(qs, search_query)
 
     order_by = PAYSLIP_SORT_FIELDS.get(sort_field, 'status')
     if sort_dir == 'desc':
         order_by = f'-{order_by}'
-    qs = qs.order_by(order_by)
+    qs = qs.order_by(order_by, '-id' if sort_dir == 'desc' else 'id')
+    context = {
+        'search_query': search_query, 'sort_field': sort_field,
+        'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+    }
+    return qs, order_by, context
+
+def _fill_page(context, qs, order_by, page_number=1, cursor=None, paging=None):
+    """Add the requested page (numbered, or keyset for "All"/cursor paging) to ``context``."""
+    per_page, sort_dir = context['per_page'], context['sort_dir']
+    if per_page == 0 or paging == 'cursor':
+        page = keyset_page(qs, order_by.lstrip('-'), sort_dir == 'desc', per_page or INFINITE_SCROLL_CHUNK, cursor)
+        context.update({
+            'payslips': page.rows, 'page_obj': None, 'cursor_mode': True,
+            'infinite_scroll': per_page == 0,
+            'next_cursor': page.next_cursor, 'prev_cursor': page.prev_cursor,
+        })
+    else:
+        paginator = Paginator(qs, per_page)
+        page_obj = paginator.get_page(page_number)
+        context.update({'payslips': page_obj, 'page_obj': page_obj, 'counter': _page_counter(page_obj)})
+    return context
+
+def _page_counter(page_obj):
+    """State of the "Showing x-y of n" counter, also posted back by the table with each mutation."""
+    rows = len(page_obj)
+    return {
+        'total': page_obj.paginator.count, 'start': page_obj.start_index(),
+        'end': page_obj.start_index() + rows - 1, 'rows': rows, 'page': page_obj.number,
+    }
+
+def _render_payslips_list(request, hub_id):
+    """Re-render the whole table with the sort, search and page the mutation posted."""
+    params = request.POST
+    qs, order_by, context = _payslips_query(params, hub_id)
+    _fill_page(context, qs, order_by, params.get('list_page', 1), paging=params.get('paging'))
+    return django_render(request, 'payroll/partials/payslips_list.html', context)
+
+def _list_counter(params):
+    """The counter state (total, first row number, rows shown, page) posted by the table, or None."""
+    try:
+        return {key: int(params[f'list_{key}']) for key in ('total', 'start', 'rows', 'page')}
+    except (KeyError, ValueError):
+        return None
+
+def _oob_response(request, hub_id, updated=(), removed_ids=(), rerender=False):
+    """
+    Answer a list mutation with out-of-band swaps of just the rows it touched.
+
+    ``updated`` rows are re-rendered in place, ``removed_ids`` rows are
+    deleted and the "Showing x-y of n" counter is adjusted from the state
+    the table posted. The whole table is only re-rendered when ``rerender``
+    is set (a row moved in the sort order) or a page was emptied.
+    """
+    removed_ids = [str(pk) for pk in removed_ids]
+    counter = _list_counter(request.POST)
+    if counter and removed_ids:
+        counter['total'] = max(counter['total'] - len(removed_ids), 0)
+        counter['rows'] -= len(removed_ids)
+        rerender = rerender or counter['rows'] <= 0
+    if rerender:
+        return _render_payslips_list(request, hub_id)
+    if counter and removed_ids:
+        counter['end'] = counter['start'] + counter['rows'] - 1
+    response = django_render(request, 'payroll/partials/payslips_oob.html', {
+        'updated': updated, 'removed_ids': removed_ids, 'counter': counter if removed_ids else None,
+    })
+    response['HX-Reswap'] = 'none'
+    return response
+
+@login_required
+@instrumented
+@with_module_nav('payroll', 'payslips')
+@htmx_view('payroll/pages/payslips.html', 'payroll/partials/payslips_content.html')
+def payslips_list(request):
+    hub_id = request.session.get('hub_id')
+    qs, order_by, context = _payslips_query(request.GET, hub_id)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
         fields = ['status', 'net_salary', 'deductions', 'gross_salary', 'employee_id', 'employee_name']
         headers = ['Status', 'Net Salary', 'Deductions', 'Gross Salary', 'Employee Id', 'Employee Name']
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='payslips.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='payslips.xlsx')
+            return stream_csv(qs, fields=fields, headers=headers, filename='payslips.csv')
+        return stream_excel(qs, fields=fields, headers=headers, filename='payslips.xlsx')
 
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
+    _fill_page(
+        context, qs, order_by, request.GET.get('page', 1),
+        cursor=request.GET.get('cursor'), paging=request.GET.get('paging'),
+    )
+    if context.get('cursor_mode') and request.htmx and request.htmx.target == 'payslips-sentinel':
+        return django_render(request, 'payroll/partials/payslips_rows.html', context)
 
     if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'payroll/partials/payslips_list.html', {
-            'payslips': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
+        return django_render(request, 'payroll/partials/payslips_list.html', context)
 
-    return {
-        'payslips': page_obj, 'page_obj': page_obj,
-        'search_query': search_query, 'sort_field': sort_field,
-        'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-    }
+    return context
 
 @login_required
+@instrumented
 @htmx_view('payroll/pages/payslip_add.html', 'payroll/partials/payslip_add_content.html')
 def payslip_add(request):
     hub_id = request.session.get('hub_id')
@@ -141,6 +234,7 @@ def payslip_add(request):
         obj.status = status
         obj.paid_date = paid_date
         obj.notes = notes
+        _apply_calculation(obj, request.POST, hub_id)
         obj.save()
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('payroll:payslips_list')
@@ -148,11 +242,29 @@ def payslip_add(request):
     return {}
 
 @login_required
+@permission_required('payroll.add_payslip')
+@instrumented
+@htmx_view('payroll/pages/payslip_import.html', 'payroll/partials/payslip_import_content.html')
+def payslip_import(request):
+    hub_id = request.session.get('hub_id')
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            return django_render(request, 'payroll/partials/payslip_import_result.html', {'error': _('Choose a CSV or Excel file to import.')})
+        result = import_payslips(iter_rows(upload.file, upload.name), hub_id)
+        return django_render(request, 'payroll/partials/payslip_import_result.html', {'result': result})
+    return {}
+
+@login_required
+@audited
+@instrumented
 @htmx_view('payroll/pages/payslip_edit.html', 'payroll/partials/payslip_edit_content.html')
 def payslip_edit(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(Payslip, pk=pk, hub_id=hub_id, is_deleted=False)
     if request.method == 'POST':
+        sort_field = PAYSLIP_SORT_FIELDS.get(request.POST.get('sort'), 'status')
+        sort_value = getattr(obj, sort_field)
         obj.employee_id = request.POST.get('employee_id', '').strip()
         obj.employee_name = request.POST.get('employee_name', '').strip()
         obj.period_start = request.POST.get('period_start') or None
@@ -163,37 +275,283 @@ def payslip_edit(request, pk):
         obj.status = request.POST.get('status', '').strip()
         obj.paid_date = request.POST.get('paid_date') or None
         obj.notes = request.POST.get('notes', '').strip()
+        _apply_calculation(obj, request.POST, hub_id)
         obj.save()
-        return _render_payslips_list(request, hub_id)
+        if not (request.htmx and request.htmx.target == 'datatable-body'):
+            response = HttpResponse(status=204)
+            response['HX-Redirect'] = reverse('payroll:payslips_list')
+            return response
+        obj.refresh_from_db()
+        search_query = request.POST.get('q', '').strip()
+        if search_query and not filter_search(Payslip.objects.filter(pk=obj.pk), search_query).exists():
+            return _oob_response(request, hub_id, removed_ids=[obj.pk])
+        return _oob_response(request, hub_id, updated=[obj], rerender=getattr(obj, sort_field) != sort_value)
     return {'obj': obj}
 
 @login_required
 @require_POST
+@audited
+@instrumented
 def payslip_delete(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(Payslip, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
-    return _render_payslips_list(request, hub_id)
+    return _oob_response(request, hub_id, removed_ids=[obj.pk])
+
+@login_required
+@instrumented
+def payslip_document(request, pk):
+    """Printable payslip (``?format=pdf|html``), served from the render cache."""
+    hub_id = request.session.get('hub_id')
+    obj = get_object_or_404(Payslip, pk=pk, hub_id=hub_id, is_deleted=False)
+    fmt = request.GET.get('format') or documents.default_format()
+    if fmt not in documents.FORMATS or (fmt == 'pdf' and not documents.pdf_available()):
+        raise Http404('Unsupported document format')
+    try:
+        fileobj = open(documents.cached_document(obj, fmt), 'rb')
+    except FileNotFoundError:
+        # Replaced by a rendering of a newer version of the payslip meanwhile
+        obj.refresh_from_db()
+        fileobj = open(documents.cached_document(obj, fmt), 'rb')
+    return FileResponse(
+        fileobj,
+        content_type=documents.CONTENT_TYPES[fmt],
+        as_attachment=request.GET.get('download') == '1',
+        filename=documents.document_filename(obj, fmt),
+    )
+
+@login_required
+@instrumented
+def payslip_documents_zip(request):
+    """ZIP of every payslip document of a month (``?period=YYYY-MM``), streamed while it is built."""
+    hub_id = request.session.get('hub_id')
+    fmt = request.GET.get('format') or documents.default_format()
+    if fmt not in documents.FORMATS or (fmt == 'pdf' and not documents.pdf_available()):
+        raise Http404('Unsupported document format')
+    try:
+        period_start = parse_period(request.GET.get('period'))[0]
+    except ValueError:
+        raise Http404('Invalid period')
+    response = StreamingHttpResponse(documents.iter_period_zip(hub_id, period_start, fmt), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="payslips-{period_start:%Y-%m}-{fmt}.zip"'
+    return response
+
+@login_required
+@permission_required('payroll.change_payslip')
+@audited
+@instrumented
+def payslip_payment_file(request):
+    """
+    Bank transfer file of a month's confirmed payslips (``period``, ``format=sepa|fixed``).
+
+    A POST with ``mark_paid=1`` also marks the included payslips paid once
+    the whole file has been sent.
+    """
+    hub_id = request.session.get('hub_id')
+    params = request.POST if request.method == 'POST' else request.GET
+    fmt = params.get('format', 'sepa')
+    if fmt not in PAYMENT_FORMATS:
+        raise Http404('Unsupported payment file format')
+    try:
+        period_start = parse_period(params.get('period'))[0]
+    except ValueError:
+        raise Http404('Invalid period')
+    try:
+        payment_file = PaymentFile(hub_id, period_start, fmt)
+    except PaymentError as exc:
+        return HttpResponse(str(exc), status=400, content_type='text/plain; charset=utf-8')
+    mark_paid = request.method == 'POST' and params.get('mark_paid') == '1'
+    response = StreamingHttpResponse(payment_file.iter_file(mark_paid=mark_paid), content_type=payment_file.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{payment_file.filename}"'
+    return response
+
+def _transition_response(request, hub_id, qs, result):
+    """Re-render the moved rows; rows that left the current search are removed."""
+    if not result['moved']:
+        return _oob_response(request, hub_id)
+    if request.POST.get('sort', 'status') == 'status':
+        return _oob_response(request, hub_id, rerender=True)
+    rows = list(qs)
+    search_query = request.POST.get('q', '').strip()
+    if not search_query:
+        return _oob_response(request, hub_id, updated=rows)
+    matching = set(filter_search(qs, search_query).values_list('id', flat=True))
+    return _oob_response(
+        request, hub_id,
+        updated=[row for row in rows if row.pk in matching],
+        removed_ids=[row.pk for row in rows if row.pk not in matching],
+    )
 
 @login_required
 @require_POST
+@audited
+@instrumented
 def payslips_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
+    ids, malformed = parse_ids(i for i in request.POST.get('ids', '').split(',') if i.strip())
     action = request.POST.get('action', '')
     qs = Payslip.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    result = None
     if action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
-    return _render_payslips_list(request, hub_id)
+        with transaction.atomic():
+            # Locked where the database supports it, and updated by id, so the audit rows match the UPDATE
+            removed = list(qs.select_for_update().order_by().values_list('id', 'employee_id', 'status', 'period_start'))
+            removed_ids = [pk for pk, _employee_id, _status, _period_start in removed]
+            if removed_ids:
+                Payslip.objects.filter(pk__in=removed_ids).update(is_deleted=True, deleted_at=timezone.now())
+                record_bulk(hub_id, 'delete', ((pk, {'is_deleted': [False, True]}) for pk in removed_ids))
+                payslips_changed(
+                    hub_id,
+                    {period_start for _pk, _employee_id, _status, period_start in removed},
+                    {employee_id for _pk, employee_id, status, _period_start in removed if status in YTD_STATUSES},
+                )
+        response = _oob_response(request, hub_id, removed_ids=removed_ids)
+    elif action in TRANSITIONS:
+        result = bulk_transition(qs, action, hub_id, requested=len(ids) + malformed)
+        response = _transition_response(request, hub_id, qs, result)
+    else:
+        response = _oob_response(request, hub_id)
+    if result:
+        response['HX-Trigger'] = json.dumps({'payslipsBulkResult': result})
+    return response
+
+
+RECENT_RUNS = 5
+
+
+def _runs_context(hub_id):
+    """Latest runs of a hub with progress summed from their task rows (no payslip scans)."""
+    runs = list(
+        PayrollRun.objects.filter(hub_id=hub_id, is_deleted=False)
+        .annotate(
+            processed=Coalesce(Sum('tasks__created_count'), 0) + Coalesce(Sum('tasks__skipped_count'), 0),
+        )
+        .order_by('-period_start')[:RECENT_RUNS]
+    )
+    for run in runs:
+        run.percent = min(100, round(100 * run.processed / run.employees_total)) if run.employees_total else (100 if run.status == 'completed' else 0)
+    return {'payroll_runs': runs, 'runs_active': any(run.status in ('pending', 'running') for run in runs)}
 
 
 @login_required
 @permission_required('payroll.manage_settings')
+@instrumented
 @with_module_nav('payroll', 'settings')
 @htmx_view('payroll/pages/settings.html', 'payroll/partials/settings_content.html')
 def settings_view(request):
+    hub_id = request.session.get('hub_id')
+    rule_set = DeductionRuleSet.objects.filter(hub_id=hub_id).first() or DeductionRuleSet(hub_id=hub_id)
+    form = DeductionRuleSetForm(request.POST or None, instance=rule_set)
+    rules_saved = request.method == 'POST' and form.is_valid()
+    if rules_saved:
+        form.save()
     return {
-        'scheduled_tasks': get_module_scheduled_tasks('payroll'),}
+        'scheduled_tasks': get_module_scheduled_tasks('payroll'),
+        'cache_stats': cache_stats(),
+        'rules_form': form,
+        'rules_saved': rules_saved,
+        **_runs_context(hub_id),
+    }
+
+
+@login_required
+@permission_required('payroll.manage_settings')
+@instrumented
+def runs_progress(request):
+    hub_id = request.session.get('hub_id')
+    return django_render(request, 'payroll/partials/payroll_runs.html', _runs_context(hub_id))
+
 
+
+# ======================================================================
+# Async (ASGI) variants
+# ======================================================================
+#
+# Under ASGI these fetch their data on the async ORM, so no worker thread
+# waits on the database. Only the hub's login check and the final template
+# render (which need the sync decorators) run through ``sync_to_async``;
+# the render gets a fully materialized context and issues no queries.
+
+def alogin_required(view):
+    """``login_required`` for coroutine views (the check itself runs off the event loop)."""
+    gate = sync_to_async(login_required(lambda request, *args, **kwargs: None))
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        denied = await gate(request, *args, **kwargs)
+        if denied is not None:
+            return denied
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _async_render(nav_view, page, partial):
+    @with_module_nav('payroll', nav_view)
+    @htmx_view(page, partial)
+    def render_context(request, context):
+        return context
+    return sync_to_async(render_context)
+
+
+_render_dashboard = _async_render('dashboard', 'payroll/pages/index.html', 'payroll/partials/dashboard_content.html')
+_render_payslips = _async_render('payslips', 'payroll/pages/payslips.html', 'payroll/partials/payslips_content.html')
+
+
+async def _abuild_dashboard_context(hub_id, month_start, month_end):
+    # One after the other: the async ORM runs every query on the same connection thread
+    overall = await apayroll_summary(hub_id)
+    current_month = await apayroll_summary(hub_id, month_start, month_end)
+    return {
+        'total_payslips': overall['count'],
+        'summary': overall,
+        'month_summary': current_month,
+        'pending_payslips': overall['by_status']['draft'] + overall['by_status']['confirmed'],
+    }
+
+
+@alogin_required
+@instrumented
+async def adashboard(request):
+    hub_id = await request.session.aget('hub_id')
+    today = timezone.now().date()
+    month_start, month_end = month_bounds(today.year, today.month)
+    context = await acached(hub_id, 'dashboard', (month_start,), lambda: _abuild_dashboard_context(hub_id, month_start, month_end))
+    return await _render_dashboard(request, context)
+
+
+async def apaginate(qs, per_page, page_number):
+    """
+    ``Paginator(qs, per_page).get_page(page_number)`` on the async ORM.
+
+    The COUNT runs first and the page SELECT second. Django runs async ORM
+    queries through thread-sensitive ``sync_to_async`` on one connection,
+    so awaiting them together would not overlap them. An out-of-range page
+    is clamped to the last page before it is fetched.
+    """
+    paginator = Paginator(qs, per_page)
+    try:
+        number = max(int(page_number), 1)
+    except (TypeError, ValueError):
+        number = 1
+    paginator.count = await qs.acount()
+    number = min(number, paginator.num_pages)
+    offset = (number - 1) * per_page
+    rows = [row async for row in qs[offset:offset + per_page]]
+    return Page(rows, number, paginator)
+
+
+@alogin_required
+@instrumented
+async def apayslips_list(request):
+    """Async ``payslips_list``; exports and cursor paging (no COUNT involved) use the sync view."""
+    if request.GET.get('export') in ('csv', 'excel') or request.GET.get('paging') == 'cursor' or request.GET.get('per_page') == '0':
+        return await sync_to_async(payslips_list)(request)
+    hub_id = await request.session.aget('hub_id')
+    qs, _order_by, context = await sync_to_async(_payslips_query)(request.GET, hub_id)
+    page_obj = await apaginate(qs, context['per_page'], request.GET.get('page', 1))
+    context.update({'payslips': page_obj, 'page_obj': page_obj, 'counter': _page_counter(page_obj)})
+    if request.htmx and request.htmx.target == 'datatable-body':
+        return await sync_to_async(django_render)(request, 'payroll/partials/payslips_list.html', context)
+    return await _render_payslips(request, context)
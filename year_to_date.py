@@ -0,0 +1,143 @@
+"""
+Per-employee year-to-date accumulators.
+
+``EmployeeYearToDate`` keeps one row per (hub_id, employee_id, tax year)
+with the count and gross/deductions/net sums of the employee's confirmed
+and paid payslips, plus the net already paid. Payslips count towards the
+calendar year of their ``period_start``. Writes refresh only the
+(employee, year) pairs they touch, in the writing transaction, so a YTD
+lookup is one indexed read instead of an aggregation over the employee's
+payslips. The rows are locked before they are recomputed, so concurrent
+writers for one employee and year take turns and the last one sees the
+others' payslips.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import EmployeeYearToDate, Payslip
+from .summary import money
+
+# Statuses whose payslips count towards the accumulators
+YTD_STATUSES = ('confirmed', 'paid')
+# Employees aggregated per query when many are refreshed at once
+REFRESH_CHUNK = 1000
+YTD_AMOUNTS = (
+    ('payslip_count', 'payslip_count'), ('gross', 'gross_total'), ('deductions', 'deductions_total'),
+    ('net', 'net_total'), ('paid', 'paid_total'),
+)
+
+
+def tax_year(value):
+    """Tax year of a period date (or ISO date string)."""
+    return Payslip._meta.get_field('period_start').to_python(value).year
+
+
+def counts_towards_ytd(status):
+    return status in YTD_STATUSES
+
+
+def _aggregate(hub_id, employee_ids, year):
+    return {
+        row['employee_id']: row
+        for row in (
+            Payslip.objects.filter(
+                hub_id=hub_id, is_deleted=False, status__in=YTD_STATUSES, employee_id__in=employee_ids,
+                period_start__year=year,
+            )
+            .order_by().values('employee_id')
+            .annotate(
+                payslip_count=Count('id'), gross=Sum('gross_salary'), deductions=Sum('deductions'),
+                net=Sum('net_salary'), paid=Sum('net_salary', filter=Q(status='paid')),
+                last_period=Max('period_start'),
+            )
+        )
+    }
+
+
+def refresh_year_to_date(hub_id, employee_ids, dates):
+    """Recompute the accumulators of ``employee_ids`` for the tax years containing ``dates``."""
+    to_uuid = Payslip._meta.get_field('employee_id').to_python
+    employee_ids = sorted({to_uuid(employee_id) for employee_id in employee_ids if employee_id})
+    years = sorted({tax_year(value) for value in dates if value})
+    if not hub_id or not employee_ids or not years:
+        return
+    with transaction.atomic(savepoint=False):
+        for year in years:
+            for offset in range(0, len(employee_ids), REFRESH_CHUNK):
+                chunk = employee_ids[offset:offset + REFRESH_CHUNK]
+                _lock_year_to_date(hub_id, chunk, year)
+                _recompute_year_to_date(hub_id, chunk, year)
+
+
+def _lock_year_to_date(hub_id, employee_ids, year):
+    """Create the missing rows of ``employee_ids`` for ``year`` and lock them all, in key order (no lock on SQLite)."""
+    EmployeeYearToDate.objects.bulk_create(
+        [EmployeeYearToDate(hub_id=hub_id, employee_id=employee_id, tax_year=year) for employee_id in employee_ids],
+        ignore_conflicts=True,
+    )
+    list(
+        EmployeeYearToDate.objects.select_for_update()
+        .filter(hub_id=hub_id, tax_year=year, employee_id__in=employee_ids).order_by('employee_id').values_list('pk', flat=True)
+    )
+
+
+def _recompute_year_to_date(hub_id, employee_ids, year):
+    found = _aggregate(hub_id, employee_ids, year)
+    rows = []
+    for employee_id in employee_ids:
+        row = found.get(employee_id, {})
+        rows.append(EmployeeYearToDate(
+            hub_id=hub_id, employee_id=employee_id, tax_year=year,
+            last_period=row.get('last_period'),
+            **{field: row.get(key) or 0 for key, field in YTD_AMOUNTS},
+        ))
+    EmployeeYearToDate.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=['hub_id', 'employee_id', 'tax_year'],
+        update_fields=[field for _key, field in YTD_AMOUNTS] + ['last_period', 'updated_at'],
+    )
+
+
+def rebuild_year_to_date(hub_id):
+    """Recompute every (employee, year) of a hub, including stale rows that no longer have payslips."""
+    pairs = set(
+        Payslip.objects.filter(hub_id=hub_id, is_deleted=False, status__in=YTD_STATUSES)
+        .order_by().values_list('employee_id', 'period_start__year').distinct()
+    )
+    pairs.update(EmployeeYearToDate.objects.filter(hub_id=hub_id).values_list('employee_id', 'tax_year'))
+    by_year = {}
+    for employee_id, year in pairs:
+        by_year.setdefault(year, set()).add(employee_id)
+    for year, employee_ids in by_year.items():
+        refresh_year_to_date(hub_id, employee_ids, [f'{year}-01-01'])
+    return len(pairs)
+
+
+def _as_dict(row, employee_id, year):
+    return {
+        'employee_id': str(employee_id),
+        'tax_year': year,
+        'payslip_count': row.payslip_count if row else 0,
+        **{field: money(getattr(row, field, 0)) for _key, field in YTD_AMOUNTS[1:]},
+        'last_period': str(row.last_period) if row and row.last_period else None,
+    }
+
+
+def year_to_date(hub_id, employee_id, year):
+    """Year-to-date figures of one employee (zeros when nothing counted yet); one indexed read."""
+    row = EmployeeYearToDate.objects.filter(hub_id=hub_id, employee_id=employee_id, tax_year=year).first()
+    return _as_dict(row, employee_id, year)
+
+
+def year_to_date_many(hub_id, employee_ids, year):
+    """
+    ``{employee_id: EmployeeYearToDate}`` for many employees of a hub, e.g.
+    for a month-end tax run; employees without a row are left out.
+    """
+    employee_ids = list(employee_ids)
+    rows = {}
+    for offset in range(0, len(employee_ids), REFRESH_CHUNK):
+        chunk = employee_ids[offset:offset + REFRESH_CHUNK]
+        for row in EmployeeYearToDate.objects.filter(hub_id=hub_id, tax_year=year, employee_id__in=chunk):
+            rows[row.employee_id] = row
+    return rows